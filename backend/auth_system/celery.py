@@ -0,0 +1,9 @@
+import os
+from celery import Celery
+
+# Celery workers load the same Django settings as the web process
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'auth_system.settings')
+
+app = Celery('auth_system')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
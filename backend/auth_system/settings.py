@@ -2,6 +2,7 @@ from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
 import os
+import tempfile
 
 load_dotenv()
 
@@ -84,6 +85,46 @@ DATABASES = {
 # Construct the DATABASE_URL from the DATABASES settings
 DATABASE_URL = f"postgres://{os.getenv('DB_USER')}:{os.getenv('DB_PWD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
 
+# CACHE
+# Use Redis when several workers run so invalidation is shared between them
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds a user's cached team roles are kept (invalidated early on change). Roles are
+# only cached across requests with a shared backend such as Redis, not LocMemCache
+TEAM_ROLES_CACHE_TIMEOUT = 300
+
+# Exported Google Doc content, cached per file revision in memory and on disk
+DOCUMENT_CONTENT_CACHE_DIR = os.getenv(
+    "DOCUMENT_CONTENT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sop-document-content")
+)
+DOCUMENT_CONTENT_CACHE_MEMORY_BYTES = 32 * 1024 * 1024
+DOCUMENT_CONTENT_CACHE_DISK_BYTES = 512 * 1024 * 1024
+
+# Background upload jobs: "local" runs them on a thread pool in the web
+# process, "celery" hands them to Celery workers (which must share UPLOAD_JOB_DIR)
+UPLOAD_JOB_BACKEND = os.getenv("UPLOAD_JOB_BACKEND", "local")
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", 4))
+UPLOAD_JOB_DIR = os.getenv("UPLOAD_JOB_DIR", os.path.join(tempfile.gettempdir(), "sop-upload-jobs"))
+# Seconds without progress after which a running job counts as abandoned by a crashed
+# worker, so a redelivered task may run it again
+UPLOAD_JOB_STALE_AFTER = 900
+
+# CELERY
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", os.getenv("REDIS_URL"))
+CELERY_TASK_ACKS_LATE = True
+
 # EMAIL
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = "smtp.gmail.com"
@@ -95,9 +136,58 @@ DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL")
 
 # GOOGLEDRIVE
 GOOGLE_CLIENT_SECRETS_FILE = os.path.join(BASE_DIR, 'client_secret.json')
+# Bytes sent per request of a resumable upload (a multiple of 256 KB)
+GOOGLE_DRIVE_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+# Send Drive API calls to another server (e.g. a local fake Drive) when set
+GOOGLE_DRIVE_API_BASE_URL = os.getenv("GOOGLE_DRIVE_API_BASE_URL")
+# Retries of transient Drive failures use jittered exponential backoff (seconds)
+GOOGLE_DRIVE_MAX_ATTEMPTS = 3
+GOOGLE_DRIVE_RETRY_BASE_DELAY = 0.5
+GOOGLE_DRIVE_RETRY_MAX_DELAY = 8
+# Idle Drive clients (with open connections) kept per process, across all users
+GOOGLE_DRIVE_CLIENT_POOL_SIZE = 64
+# Threads per process for multi-file uploads, and files accepted per request
+GOOGLE_DRIVE_UPLOAD_WORKERS = int(os.getenv("GOOGLE_DRIVE_UPLOAD_WORKERS", 8))
+GOOGLE_DRIVE_MAX_FILES_PER_UPLOAD = 50
+# Changes read per call when syncing Document metadata from the Drive changes feed
+GOOGLE_DRIVE_CHANGES_PAGE_SIZE = 1000
+# Stored access tokens are refreshed in the background this many seconds before they expire
+GOOGLE_DRIVE_TOKEN_REFRESH_MARGIN = 600
+GOOGLE_DRIVE_TOKEN_REFRESH_TIMEOUT = 10
+# Seconds the background refresh leaves a token alone after refreshing it failed
+GOOGLE_DRIVE_TOKEN_REFRESH_RETRY = 1800
+# Seconds a page of a user's Drive file listing is cached (?refresh=true bypasses it)
+GOOGLE_DRIVE_FILE_LIST_CACHE_TIMEOUT = 60
 
 # OpenAI
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Point the client at another server, e.g. a proxy or a local fake (default: api.openai.com)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+# Connection pool of the shared client; idle connections are kept alive this many seconds
+OPENAI_MAX_CONNECTIONS = 20
+# The async views (under ASGI) hold a connection, but no thread, per in-flight completion
+OPENAI_ASYNC_MAX_CONNECTIONS = 500
+OPENAI_KEEPALIVE_EXPIRY = 60
+OPENAI_MAX_RETRIES = 2
+# Seconds to connect, and to wait for a response (or the next streamed chunk) per endpoint
+OPENAI_CONNECT_TIMEOUT = 5
+OPENAI_TIMEOUTS = {
+    "generate": 60,
+    "improve": 60,
+    "summarise": 20,
+}
+# SOPs longer than this many tokens are summarised per section (split on their
+# headings, OPENAI_SUMMARY_WORKERS at a time per process), then merged
+OPENAI_SUMMARY_SECTION_TOKENS = 3000
+OPENAI_SUMMARY_SECTION_MAX_TOKENS = 200
+OPENAI_SUMMARY_WORKERS = 8
+
+# Summaries and improvements cached by a hash of the request: "locmem" keeps
+# them per process, "django" uses the AI_CACHE_ALIAS cache shared by all workers
+AI_CACHE_BACKEND = os.getenv("AI_CACHE_BACKEND", "django" if os.getenv("REDIS_URL") else "locmem")
+AI_CACHE_ALIAS = "default"
+AI_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+AI_CACHE_MAX_ENTRIES = 1000
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -263,5 +353,7 @@ LOGGING = {
 
 # Add to settings.py if using django-crontab
 CRONJOBS = [
-    ('0 7 * * *', 'django.core.management.call_command', ['send_review_reminders'], {}, '>> /path/to/logs/review_reminders.log 2>&1')
+    ('0 7 * * *', 'django.core.management.call_command', ['send_review_reminders'], {}, '>> /path/to/logs/review_reminders.log 2>&1'),
+    ('*/15 * * * *', 'django.core.management.call_command', ['sync_drive_changes'], {}, '>> /path/to/logs/drive_sync.log 2>&1'),
+    ('*/5 * * * *', 'django.core.management.call_command', ['refresh_drive_credentials'], {}, '>> /path/to/logs/drive_credentials.log 2>&1'),
 ]
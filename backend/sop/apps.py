@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SopConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sop'
+
+    def ready(self):
+        # Register membership cache invalidation handlers
+        from . import signals  # noqa: F401
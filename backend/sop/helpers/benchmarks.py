@@ -0,0 +1,18 @@
+import datetime
+import math
+from oauth2client.client import OAuth2Credentials
+
+
+def fake_credentials():
+    """Non-expiring credentials accepted by the fake Drive server"""
+    return OAuth2Credentials(
+        'fake-access-token', 'fake-client', 'fake-secret', 'fake-refresh',
+        datetime.datetime(2999, 1, 1), 'https://oauth2.googleapis.com/token', 'benchmark'
+    ).to_json()
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a list of timings"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
@@ -0,0 +1,100 @@
+import hashlib
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+from ..models import TeamMembership
+from .permission_helpers import get_membership_version
+
+
+def get_team_state(user):
+    """
+    Aggregate the teams and memberships visible to a user in one query
+
+    Task and team responses embed team names and member lists, so any
+    change to those has to move the validators as well.
+    """
+    return TeamMembership.objects.filter(team__team_memberships__user=user).aggregate(
+        memberships=Count('id'),
+        memberships_updated=Max('updated_at'),
+        teams_updated=Max('team__updated_at'),
+    )
+
+
+def compute_validators(request, *querysets):
+    """
+    Return (etag, last_modified) for the querysets as seen by the requesting user
+
+    Computed in SQL from the row count and latest updated_at of each
+    queryset plus the user's team state, without loading any rows; the
+    models index updated_at so these aggregates stay index scans. Today's
+    date is included because fields such as ``days_until_review`` change
+    at midnight without any row changing.
+    """
+    parts = [
+        request.user.pk,
+        get_membership_version(request.user.pk),
+        request.get_full_path(),
+        getattr(request, 'accepted_media_type', ''),
+        timezone.now().date(),
+    ]
+    timestamps = []
+
+    for queryset in querysets:
+        state = queryset.order_by().aggregate(count=Count('pk'), updated=Max('updated_at'))
+        parts.extend([state['count'], state['updated']])
+        timestamps.append(state['updated'])
+
+    team_state = get_team_state(request.user)
+    parts.extend(team_state.values())
+    timestamps.extend([team_state['memberships_updated'], team_state['teams_updated']])
+
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    timestamps = [timestamp for timestamp in timestamps if timestamp]
+    return quote_etag(digest), max(timestamps) if timestamps else None
+
+
+def conditional_response(request, querysets, build_response):
+    """
+    Return 304 Not Modified if the client's ETag still matches, otherwise
+    build the response and attach the validators
+
+    Only If-None-Match decides a 304: deleting a row does not move
+    max(updated_at), so If-Modified-Since alone could hide deletions.
+    """
+    etag, last_modified = compute_validators(request, *querysets)
+
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    response = build_response()
+    if response.status_code == 200:
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        # Responses are per user and must be revalidated before reuse
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ['Authorization', 'Cookie'])
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Viewset mixin answering unchanged list and detail GETs with 304
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return conditional_response(
+            request, [queryset], lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        # Permission checks run before the validators so access changes still apply
+        instance = self.get_object()
+        queryset = self.get_queryset().filter(pk=instance.pk)
+        return conditional_response(
+            request, [queryset], lambda: Response(self.get_serializer(instance).data)
+        )
@@ -0,0 +1,343 @@
+import email
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+GOOGLE_DOC_MIME_TYPE = 'application/vnd.google-apps.document'
+
+# Types Drive turns into a Google Doc when uploaded with convert=true
+CONVERTIBLE_MIME_TYPES = {
+    'text/plain',
+    'text/html',
+    'application/msword',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+}
+
+
+class FakeDriveServer:
+    """
+    In-process stand-in for the parts of the Drive v2 API the app uses
+
+    Supports resumable uploads (with conversion), copy, delete, metadata,
+    export links, permissions, the changes feed and batch requests. Every
+    HTTP round trip, including a whole batch, is delayed by ``latency``
+    seconds and counted, as is every new TCP connection, so client code
+    can be measured against realistic network costs.
+
+    Failures can be injected at random (``error_rate`` of round trips
+    answer ``error_status``) or on demand with ``fail_next()``.
+
+        with FakeDriveServer(latency=0.05, error_rate=0.01) as drive:
+            settings.GOOGLE_DRIVE_API_BASE_URL = drive.url
+    """
+
+    def __init__(self, latency=0.0, host='127.0.0.1', port=0, error_rate=0.0, error_status=503, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.forced_errors = []
+        self.injected_errors = 0
+        self.files = {}
+        self.contents = {}
+        self.permissions = {}
+        self.uploads = {}
+        self.changes = []
+        self.round_trips = 0
+        self.connections = 0
+        self.calls = []
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self.make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reset_counters(self):
+        with self.lock:
+            self.round_trips = 0
+            self.connections = 0
+            self.injected_errors = 0
+            self.calls = []
+
+    def fail_next(self, count=1, status=503):
+        """Answer the next ``count`` round trips with ``status``"""
+        with self.lock:
+            self.forced_errors.extend([status] * count)
+
+    def injected_error(self):
+        """Return the status to fail this round trip with, or None to serve it"""
+        with self.lock:
+            if self.forced_errors:
+                status = self.forced_errors.pop(0)
+            elif self.error_rate and self.random.random() < self.error_rate:
+                status = self.error_status
+            else:
+                return None
+            self.injected_errors += 1
+        return status
+
+    def create_file(self, title, mime_type, data=b''):
+        file_id = uuid.uuid4().hex
+        metadata = {
+            'kind': 'drive#file',
+            'id': file_id,
+            'title': title,
+            'mimeType': mime_type,
+            'modifiedDate': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            'alternateLink': f'https://docs.google.com/document/d/{file_id}/edit',
+            'embedLink': f'https://docs.google.com/document/d/{file_id}/preview',
+            'fileSize': str(len(data)),
+            'labels': {'trashed': False},
+        }
+        if mime_type == GOOGLE_DOC_MIME_TYPE:
+            metadata['exportLinks'] = {
+                export_type: f'{self.url}export/{file_id}?mimeType={export_type}'
+                for export_type in ('text/html', 'text/plain')
+            }
+        with self.lock:
+            self.files[file_id] = metadata
+            self.contents[file_id] = bytes(data)
+            self.record_change(file_id)
+        return dict(metadata)
+
+    def update_file(self, file_id, **metadata):
+        """Change a file as another Drive client would, e.g. a rename"""
+        with self.lock:
+            self.files[file_id].update(
+                metadata, modifiedDate=datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+            )
+            self.record_change(file_id)
+        return dict(self.files[file_id])
+
+    def record_change(self, file_id):
+        """Append to the changes feed; call with the lock held"""
+        drive_file = self.files.get(file_id)
+        self.changes.append({
+            'kind': 'drive#change',
+            'id': str(len(self.changes) + 1),
+            'fileId': file_id,
+            'deleted': drive_file is None,
+            'file': dict(drive_file) if drive_file else None,
+        })
+
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with server.lock:
+                    server.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle_request(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                with server.lock:
+                    server.round_trips += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+                status = server.injected_error()
+                if status:
+                    status, headers, payload = server.error(status, 'Injected failure')
+                else:
+                    status, headers, payload = server.dispatch(self.command, self.path, self.headers, body, self)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = handle_request
+
+        return Handler
+
+    def dispatch(self, method, path, headers, body, handler=None):
+        """Route one API call and return (status, headers, body bytes)"""
+        parts = urlsplit(path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        segments = [segment for segment in parts.path.split('/') if segment]
+        with self.lock:
+            self.calls.append((method, parts.path))
+
+        if segments[:1] == ['export'] and len(segments) == 2:
+            return self.export(segments[1], query)
+        if segments[:3] == ['batch', 'drive', 'v2']:
+            return self.handle_batch(headers, body)
+        if segments[:3] == ['upload', 'drive', 'v2']:
+            return self.handle_upload(method, query, headers, body, handler)
+        if segments[:3] == ['drive', 'v2', 'changes']:
+            return self.handle_changes(method, segments[3:], query)
+        if segments[:2] != ['drive', 'v2'] or len(segments) < 3 or segments[2] != 'files':
+            return self.error(404, 'Not Found')
+
+        file_id = segments[3] if len(segments) > 3 else None
+        action = segments[4] if len(segments) > 4 else None
+        if file_id is None:
+            if method == 'GET':
+                return self.list_files(query)
+            return self.error(405, 'Method Not Allowed')
+        if file_id not in self.files:
+            return self.error(404, f'File not found: {file_id}')
+
+        if action is None and method == 'GET':
+            return self.json_response(200, self.files[file_id])
+        if action is None and method == 'DELETE':
+            with self.lock:
+                self.files.pop(file_id, None)
+                self.contents.pop(file_id, None)
+                self.record_change(file_id)
+            return 204, {}, b''
+        if action == 'copy' and method == 'POST':
+            data = json.loads(body or b'{}')
+            source = self.files[file_id]
+            return self.json_response(200, self.create_file(
+                data.get('title', source['title']), data.get('mimeType', source['mimeType']),
+                self.contents.get(file_id, b'')
+            ))
+        if action == 'permissions' and method == 'POST':
+            permission = dict(json.loads(body or b'{}'), id=uuid.uuid4().hex, kind='drive#permission')
+            with self.lock:
+                self.permissions.setdefault(file_id, []).append(permission)
+            return self.json_response(200, permission)
+        return self.error(404, 'Not Found')
+
+    def export(self, file_id, query):
+        """Download a Google Doc through one of its export links"""
+        if file_id not in self.files:
+            return self.error(404, f'File not found: {file_id}')
+        content_type = query.get('mimeType', 'text/html')
+        return 200, {'Content-Type': f'{content_type}; charset=utf-8'}, self.contents.get(file_id, b'')
+
+    def list_files(self, query):
+        """File listing paged by maxResults; page tokens are offsets into the listing"""
+        with self.lock:
+            files = [dict(f) for f in self.files.values() if not f['labels']['trashed']]
+        start = int(query.get('pageToken', 0))
+        page_size = int(query.get('maxResults', 100))
+        page = {'kind': 'drive#fileList', 'items': files[start:start + page_size]}
+        if start + page_size < len(files):
+            page['nextPageToken'] = str(start + page_size)
+        return self.json_response(200, page)
+
+    def handle_changes(self, method, segments, query):
+        """Changes feed: page tokens are the id of the next change to return"""
+        if method != 'GET':
+            return self.error(405, 'Method Not Allowed')
+        with self.lock:
+            next_token = str(len(self.changes) + 1)
+            if segments == ['startPageToken']:
+                return self.json_response(200, {'kind': 'drive#startPageToken', 'startPageToken': next_token})
+            if segments:
+                return self.error(404, 'Not Found')
+
+            start = int(query.get('pageToken', next_token)) - 1
+            page_size = int(query.get('maxResults', 100))
+            items = self.changes[start:start + page_size]
+            page = {'kind': 'drive#changeList', 'items': items}
+            if start + page_size < len(self.changes):
+                page['nextPageToken'] = str(start + page_size + 1)
+            else:
+                page['newStartPageToken'] = next_token
+        return self.json_response(200, page)
+
+    def handle_upload(self, method, query, headers, body, handler):
+        """Resumable upload: a POST opens a session, PUTs send the chunks"""
+        upload_id = query.get('upload_id')
+        if method == 'POST' and query.get('uploadType') == 'resumable':
+            upload_id = uuid.uuid4().hex
+            with self.lock:
+                self.uploads[upload_id] = {
+                    'metadata': json.loads(body or b'{}'),
+                    'convert': query.get('convert') == 'true',
+                    'mime_type': headers.get('X-Upload-Content-Type', 'application/octet-stream'),
+                    'data': bytearray(),
+                }
+            host = handler.headers.get('Host') if handler else '127.0.0.1'
+            location = f'http://{host}/upload/drive/v2/files?uploadType=resumable&upload_id={upload_id}'
+            return 200, {'Location': location}, b''
+
+        if method == 'PUT' and upload_id in self.uploads:
+            upload = self.uploads[upload_id]
+            upload['data'].extend(body)
+            total = headers.get('Content-Range', '').rsplit('/', 1)[-1]
+            if total != '*' and len(upload['data']) < int(total):
+                return 308, {'Range': f"bytes=0-{len(upload['data']) - 1}"}, b''
+
+            with self.lock:
+                self.uploads.pop(upload_id, None)
+            mime_type = upload['metadata'].get('mimeType') or upload['mime_type']
+            if upload['convert'] and mime_type in CONVERTIBLE_MIME_TYPES:
+                mime_type = GOOGLE_DOC_MIME_TYPE
+            title = upload['metadata'].get('title', 'Untitled')
+            return self.json_response(200, self.create_file(title, mime_type, bytes(upload['data'])))
+
+        return self.error(404, 'Upload session not found')
+
+    def handle_batch(self, headers, body):
+        """Answer a multipart/mixed batch with one embedded response per part"""
+        content_type = headers.get('Content-Type', '')
+        message = email.message_from_bytes(
+            f'Content-Type: {content_type}\r\n\r\n'.encode('utf-8') + body
+        )
+        boundary = uuid.uuid4().hex
+        chunks = []
+        for part in message.get_payload():
+            request = part.get_payload()
+            if isinstance(request, list):
+                request = request[0].as_string()
+            head, _, part_body = request.replace('\r\n', '\n').partition('\n\n')
+            lines = head.split('\n')
+            method, path = lines[0].split(' ')[:2]
+            part_headers = dict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+            status, _, payload = self.dispatch(method, path, part_headers, part_body.encode('utf-8'))
+
+            # Long Content-IDs arrive folded over several lines
+            content_id = ' '.join(part['Content-ID'].split()).strip('<>')
+            chunks.append(
+                f'--{boundary}\r\n'
+                'Content-Type: application/http\r\n'
+                f'Content-ID: <response-{content_id}>\r\n\r\n'
+                f'HTTP/1.1 {status} OK\r\n'
+                'Content-Type: application/json\r\n'
+                f'Content-Length: {len(payload)}\r\n\r\n'
+                f"{payload.decode('utf-8')}\r\n"
+            )
+        chunks.append(f'--{boundary}--\r\n')
+        return 200, {'Content-Type': f'multipart/mixed; boundary={boundary}'}, ''.join(chunks).encode('utf-8')
+
+    def json_response(self, status, data):
+        return status, {'Content-Type': 'application/json'}, json.dumps(data).encode('utf-8')
+
+    def error(self, status, message):
+        return self.json_response(status, {'error': {'code': status, 'message': message}})
@@ -1,23 +1,135 @@
+import time
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
 from rest_framework import status
 from rest_framework.response import Response
 from ..models import Team, TeamMembership
 
-def validate_team_membership(user, team_id):
+# Cache keys for the user -> {team_id: role} map and its version counter
+MEMBERSHIP_VERSION_KEY = 'team_roles:version:{user_id}'
+TEAM_ROLES_KEY = 'team_roles:{user_id}:{version}'
+
+# Backends whose entries are private to one process, where another worker's
+# invalidation would never be seen
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def _team_key(team):
+    """Normalise a Team instance or team id into an integer id"""
+    if isinstance(team, Team):
+        return team.pk
+    try:
+        return int(team)
+    except (TypeError, ValueError):
+        return None
+
+
+def roles_cache_enabled():
+    """Whether team roles may be cached across requests, i.e. the cache is shared by every worker"""
+    return not isinstance(caches['default'], PROCESS_LOCAL_CACHES)
+
+
+def get_membership_version(user_id):
+    """Return the current version of a user's memberships (0 when roles are not cached)"""
+    if not roles_cache_enabled():
+        return 0
+    key = MEMBERSHIP_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so an evicted counter never reuses an old version
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump_versions(user_ids):
+    for user_id in user_ids:
+        key = MEMBERSHIP_VERSION_KEY.format(user_id=user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def bump_membership_version(*user_ids):
+    """
+    Invalidate the cached team roles of the given users
+
+    Bumped immediately and again once the transaction commits, so a map
+    read from the database before the commit is never reused.
+    """
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    if not user_ids or not roles_cache_enabled():
+        return
+    _bump_versions(user_ids)
+    transaction.on_commit(lambda: _bump_versions(user_ids))
+
+
+def load_team_roles(user):
+    """Return a user's {team_id: role} map from the cache or the database"""
+    if not roles_cache_enabled():
+        return dict(TeamMembership.objects.filter(user=user).values_list('team_id', 'role'))
+    key = TEAM_ROLES_KEY.format(user_id=user.pk, version=get_membership_version(user.pk))
+    roles = cache.get(key)
+    if roles is None:
+        roles = dict(TeamMembership.objects.filter(user=user).values_list('team_id', 'role'))
+        cache.set(key, roles, settings.TEAM_ROLES_CACHE_TIMEOUT)
+    return roles
+
+
+def get_team_roles(request):
+    """
+    Return the requesting user's memberships as {team_id: role}
+
+    Read from the cross-request cache when the cache is shared between
+    workers (otherwise one query) the first time it is needed and kept on
+    the request, so every permission check in the request shares it.
+    """
+    roles = getattr(request, '_team_roles', None)
+    if roles is None:
+        roles = load_team_roles(request.user) if request.user.is_authenticated else {}
+        request._team_roles = roles
+    return roles
+
+
+def get_team_role(request, team):
+    """Return the user's role in the team, or None if they are not a member"""
+    if team is None:
+        return None
+    return get_team_roles(request).get(_team_key(team))
+
+
+def is_team_owner(request, team):
+    """Check whether the requesting user owns the team"""
+    return get_team_role(request, team) == 'owner'
+
+
+def reset_team_roles(request):
+    """Discard the request's membership map after the user's memberships change"""
+    request._team_roles = None
+
+
+def validate_team_membership(request, team_id):
     """Validate a user's membership in a team"""
     if not team_id:
         return None, None
-    
-    try:
-        team = Team.objects.get(id=team_id)
-        # Verify user is a member of the team
-        if not TeamMembership.objects.filter(team=team, user=user).exists():
-            return None, Response(
-                {"error": "You are not a member of this team"}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-        return team, None
-    except Team.DoesNotExist:
+
+    team_key = _team_key(team_id)
+    team = Team.objects.filter(id=team_key).first() if team_key is not None else None
+    if team is None:
         return None, Response(
-            {"error": f"Team with ID {team_id} not found"}, 
+            {"error": f"Team with ID {team_id} not found"},
             status=status.HTTP_404_NOT_FOUND
-        )
\ No newline at end of file
+        )
+
+    # Verify user is a member of the team
+    if get_team_role(request, team) is None:
+        return None, Response(
+            {"error": "You are not a member of this team"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return team, None
@@ -0,0 +1,124 @@
+import json
+import logging
+from django.http import StreamingHttpResponse
+from ..services.openai_client import acreate_completion, create_completion
+
+logger = logging.getLogger(__name__)
+
+
+def is_true(value):
+    """Read a boolean option sent as JSON or as a form/query string value"""
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+def request_flag(request, name):
+    """Whether a boolean option is set in the request body or query string"""
+    return is_true(request.data.get(name, request.query_params.get(name, False)))
+
+
+def wants_stream(request):
+    """Whether the client asked for server-sent events"""
+    return request_flag(request, 'stream')
+
+
+def sse_event(data, event=None):
+    """Encode one server-sent event with a JSON payload"""
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data)}")
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+def completion_events(stream, on_complete=None):
+    """
+    Forward the content deltas of a streamed chat completion as events
+
+    Each delta is sent as it arrives, followed by a ``done`` event, or an
+    ``error`` event if the upstream call fails part way. ``on_complete``
+    receives the full text once the completion finished. When the client
+    disconnects, the server closes this generator and the upstream
+    response is closed with it, which cancels the generation.
+    """
+    parts = []
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                parts.append(content)
+                yield sse_event({'content': content})
+        if on_complete:
+            on_complete(''.join(parts))
+        yield sse_event({}, event='done')
+    except Exception as e:
+        logger.error("Streamed completion failed: %s", e)
+        yield sse_event({'error': str(e)}, event='error')
+    finally:
+        stream.close()
+
+
+def event_stream_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def stream_completion(endpoint, on_complete=None, **params):
+    """
+    Start a streamed chat completion and return it as an event-stream response
+
+    The upstream request is made before the response is returned, so an
+    error raised while starting it can still be answered with a status code.
+    """
+    stream = create_completion(endpoint, stream=True, **params)
+    return event_stream_response(completion_events(stream, on_complete))
+
+
+def stream_text(text):
+    """Event-stream response sending already known text, e.g. a cached completion"""
+    return event_stream_response(iter([sse_event({'content': text}), sse_event({}, event='done')]))
+
+
+async def acompletion_events(stream, on_complete=None):
+    """
+    Async version of ``completion_events`` for the async OpenAI client
+
+    Under ASGI a client disconnect cancels the response, which closes
+    this generator and with it the upstream stream. ``on_complete`` is
+    awaited with the full text.
+    """
+    parts = []
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                parts.append(content)
+                yield sse_event({'content': content})
+        if on_complete:
+            await on_complete(''.join(parts))
+        yield sse_event({}, event='done')
+    except Exception as e:
+        logger.error("Streamed completion failed: %s", e)
+        yield sse_event({'error': str(e)}, event='error')
+    finally:
+        await stream.close()
+
+
+async def astream_completion(endpoint, on_complete=None, **params):
+    """Start a streamed completion on the async client; see ``stream_completion``"""
+    stream = await acreate_completion(endpoint, stream=True, **params)
+    return event_stream_response(acompletion_events(stream, on_complete))
+
+
+def astream_text(text):
+    """Event-stream response sending already known text from an async view"""
+    async def events():
+        yield sse_event({'content': text})
+        yield sse_event({}, event='done')
+    return event_stream_response(events())
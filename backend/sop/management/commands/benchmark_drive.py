@@ -0,0 +1,144 @@
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from sop.helpers.benchmarks import fake_credentials, percentile
+from sop.helpers.fake_drive import FakeDriveServer
+from sop.models import Document, UserAccount
+from sop.services.drive_clients import drive_client_pool
+from sop.services.google_drive_service import GoogleDriveService, GOOGLE_DOC_MIME_TYPE
+from sop.views import GoogleDriveFileContentView, DocumentDeleteView
+
+SCENARIOS = ('upload', 'content', 'delete')
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark document upload, content and delete against a local fake Drive '
+        'server at several concurrency levels, reporting throughput and p50/p95/p99 '
+        'latency. Creates a temporary user and documents in the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operations', type=int, default=50, help='Operations per scenario and concurrency level')
+        parser.add_argument('--concurrency', default='1,4,16', help='Comma-separated concurrency levels')
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma-separated scenarios to run')
+        parser.add_argument('--latency', type=float, default=50, help='Simulated round-trip latency in ms')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of Drive round trips that fail')
+        parser.add_argument('--size', type=int, default=16 * 1024, help='Document size in bytes')
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError('--concurrency must be a comma-separated list of integers.')
+
+        self.credentials = fake_credentials()
+        self.content = ('<p>' + 'x' * options['size'] + '</p>').encode('utf-8')
+        self.factory = APIRequestFactory()
+        self.user = UserAccount.objects.create_user(
+            email=f'bench-drive-{time.time_ns()}@example.com', password=None, name='Drive Benchmark'
+        )
+
+        self.stdout.write(
+            f"{'scenario':<10}{'concurrency':>12}{'ops':>6}{'errors':>8}{'ops/s':>10}"
+            f"{'p50 (ms)':>11}{'p95 (ms)':>11}{'p99 (ms)':>11}"
+        )
+        try:
+            with tempfile.TemporaryDirectory() as cache_dir, \
+                    FakeDriveServer(latency=options['latency'] / 1000, error_rate=options['error_rate']) as drive, \
+                    override_settings(GOOGLE_DRIVE_API_BASE_URL=drive.url, DOCUMENT_CONTENT_CACHE_DIR=cache_dir):
+                self.drive = drive
+                for scenario in scenarios:
+                    for concurrency in levels:
+                        operation = getattr(self, f'prepare_{scenario}')(options['operations'])
+                        self.report(scenario, concurrency, *self.run(operation, options['operations'], concurrency))
+        finally:
+            drive_client_pool.clear()
+            # Removes the benchmark documents as well
+            self.user.delete()
+
+    def run(self, operation, operations, concurrency):
+        """Run operation(0..operations-1) on concurrency threads; return timings, errors and wall time"""
+        timings = []
+        errors = []
+        next_index = iter(range(operations))
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        index = next(next_index, None)
+                    if index is None:
+                        return
+                    start = time.perf_counter()
+                    try:
+                        succeeded = operation(index)
+                    except Exception:
+                        succeeded = False
+                    elapsed = (time.perf_counter() - start) * 1000
+                    with lock:
+                        timings.append(elapsed)
+                        if not succeeded:
+                            errors.append(index)
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for _ in range(concurrency):
+                executor.submit(worker)
+        return timings, len(errors), time.perf_counter() - start
+
+    def report(self, scenario, concurrency, timings, errors, wall_time):
+        self.stdout.write(
+            f'{scenario:<10}{concurrency:>12}{len(timings):>6}{errors:>8}{len(timings) / wall_time:>10.1f}'
+            f'{percentile(timings, 50):>11.1f}{percentile(timings, 95):>11.1f}{percentile(timings, 99):>11.1f}'
+        )
+
+    def create_documents(self, count):
+        """Create Google Docs on the fake server with a Document row for each"""
+        documents = []
+        for index in range(count):
+            drive_file = self.drive.create_file(f'Benchmark SOP {index}', GOOGLE_DOC_MIME_TYPE, self.content)
+            documents.append(Document(
+                title=drive_file['title'], file_url=drive_file['alternateLink'],
+                google_drive_file_id=drive_file['id'], owner=self.user
+            ))
+        return Document.objects.bulk_create(documents)
+
+    def call_view(self, view, method, document):
+        request = getattr(self.factory, method)('/')
+        request.session = {'google_drive_credentials': self.credentials}
+        force_authenticate(request, user=self.user)
+        return view(request, document_id=document.id)
+
+    def prepare_upload(self, operations):
+        text = self.content.decode('utf-8')
+
+        def upload(index):
+            with GoogleDriveService(self.credentials) as drive_service:
+                drive_service.upload_document(f'Benchmark SOP {index}', text_content=text, content_type='html')
+            return True
+        return upload
+
+    def prepare_content(self, operations):
+        # A fresh document per operation, so every request takes the uncached path
+        documents = self.create_documents(operations)
+        view = GoogleDriveFileContentView.as_view()
+        return lambda index: self.call_view(view, 'get', documents[index]).status_code == 200
+
+    def prepare_delete(self, operations):
+        documents = self.create_documents(operations)
+        view = DocumentDeleteView.as_view()
+        return lambda index: self.call_view(view, 'delete', documents[index]).status_code == 204
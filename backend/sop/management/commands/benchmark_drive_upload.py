@@ -0,0 +1,81 @@
+import io
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from googleapiclient.http import MediaIoBaseUpload
+from sop.helpers.benchmarks import fake_credentials, percentile
+from sop.helpers.fake_drive import FakeDriveServer
+from sop.services.drive_clients import DriveClient
+from sop.services.google_drive_service import GoogleDriveService, GOOGLE_DOC_MIME_TYPE
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure document upload latency against a local fake Drive server, '
+        'comparing the previous call sequence with the current pipeline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uploads', type=int, default=20, help='Uploads per pipeline')
+        parser.add_argument('--latency', type=float, default=50, help='Simulated round-trip latency in ms')
+        parser.add_argument('--size', type=int, default=64 * 1024, help='Document size in bytes')
+        parser.add_argument(
+            '--legacy-sleep', type=float, default=1.0,
+            help='Fixed delay the previous pipeline slept before fetching the link (seconds)'
+        )
+
+    def handle(self, *args, **options):
+        credentials = fake_credentials()
+        text = 'x' * options['size']
+
+        with FakeDriveServer(latency=options['latency'] / 1000) as drive, \
+                override_settings(GOOGLE_DRIVE_API_BASE_URL=drive.url):
+            results = {
+                'previous': self.measure(drive, options['uploads'], lambda: self.legacy_upload(
+                    credentials, text, options['legacy_sleep'])),
+                'current': self.measure(drive, options['uploads'], lambda: self.upload(credentials, text)),
+            }
+
+        self.stdout.write(f"{'pipeline':<12}{'p50 (ms)':>12}{'p95 (ms)':>12}{'mean (ms)':>12}{'round trips':>14}")
+        for name, (timings, round_trips) in results.items():
+            self.stdout.write(
+                f'{name:<12}{percentile(timings, 50):>12.1f}{percentile(timings, 95):>12.1f}'
+                f'{statistics.mean(timings):>12.1f}{round_trips:>14.1f}'
+            )
+        previous_p50 = percentile(results['previous'][0], 50)
+        current_p50 = percentile(results['current'][0], 50)
+        self.stdout.write(f'p50 speedup: {previous_p50 / current_p50:.1f}x')
+
+    def measure(self, drive, uploads, upload):
+        """Return per-upload timings in ms and mean HTTP round trips"""
+        timings = []
+        drive.reset_counters()
+        for _ in range(uploads):
+            start = time.perf_counter()
+            upload()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings, drive.round_trips / uploads
+
+    def upload(self, credentials, text):
+        with GoogleDriveService(credentials) as drive_service:
+            return drive_service.upload_document('Benchmark SOP', text_content=text)
+
+    def legacy_upload(self, credentials, text, sleep):
+        """Replay the earlier call sequence: upload, copy, delete, permission, sleep, metadata"""
+        # A fresh client per upload, as every request built its own before pooling
+        service = DriveClient(credentials).service
+        media = MediaIoBaseUpload(io.BytesIO(text.encode('utf-8')), mimetype='text/plain', resumable=True)
+        request = service.files().insert(body={'title': 'Benchmark SOP'}, media_body=media, convert=True)
+        uploaded = None
+        while uploaded is None:
+            _, uploaded = request.next_chunk()
+
+        copied = service.files().copy(
+            fileId=uploaded['id'], body={'title': 'Benchmark SOP', 'mimeType': GOOGLE_DOC_MIME_TYPE}
+        ).execute()
+        service.files().delete(fileId=uploaded['id']).execute()
+        service.permissions().insert(fileId=copied['id'], body={'type': 'anyone', 'role': 'writer'}).execute()
+        time.sleep(sleep)
+        return service.files().get(fileId=copied['id']).execute()
@@ -0,0 +1,188 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Max
+from django.utils import timezone
+from sop.models import UserAccount, Team, TeamMembership, Task, Document
+from sop.pagination import TaskCursorPagination
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large task/document set and report hot query timings '
+        'without and with the model indexes. Run against a scratch database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1_000_000, help='Number of tasks to seed')
+        parser.add_argument('--documents', type=int, default=100_000, help='Number of documents to seed')
+        parser.add_argument('--teams', type=int, default=200, help='Number of teams to seed')
+        parser.add_argument('--users', type=int, default=1000, help='Number of users to seed')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query')
+        parser.add_argument('--no-seed', action='store_true', help='Reuse rows already in the database')
+        parser.add_argument('--batch-size', type=int, default=10_000, help='bulk_create batch size')
+
+    def handle(self, *args, **options):
+        if not options['no_seed']:
+            self.seed(options)
+
+        if not Task.objects.exists():
+            raise CommandError('No tasks to benchmark; run without --no-seed first.')
+
+        queries = self.build_queries()
+        before = self.time_queries(queries, options['repeat'], with_indexes=False)
+        after = self.time_queries(queries, options['repeat'], with_indexes=True)
+
+        self.stdout.write(f"{'query':<40}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+        for name in queries:
+            speedup = before[name] / after[name] if after[name] else float('inf')
+            self.stdout.write(f'{name:<40}{before[name]:>14.2f}{after[name]:>14.2f}{speedup:>9.1f}x')
+
+    def seed(self, options):
+        """Create users, teams, memberships, tasks and documents in batches"""
+        batch_size = options['batch_size']
+        run_id = int(time.time())
+        self.stdout.write('Seeding users and teams...')
+
+        users = UserAccount.objects.bulk_create([
+            UserAccount(email=f'bench{run_id}-{i}@example.com', name=f'Bench User {i}', password='!')
+            for i in range(options['users'])
+        ], batch_size=batch_size)
+        teams = Team.objects.bulk_create([
+            Team(name=f'Bench Team {i}', created_by=random.choice(users))
+            for i in range(options['teams'])
+        ], batch_size=batch_size)
+
+        memberships = []
+        for team in teams:
+            members = random.sample(users, min(len(users), 10))
+            memberships.extend(
+                TeamMembership(user=user, team=team, role='owner' if index == 0 else 'member')
+                for index, user in enumerate(members)
+            )
+        TeamMembership.objects.bulk_create(memberships, batch_size=batch_size)
+
+        today = timezone.now().date()
+        statuses = [choice[0] for choice in Task.Status.choices]
+        remaining = options['tasks']
+        self.stdout.write(f'Seeding {remaining} tasks...')
+        while remaining > 0:
+            count = min(batch_size, remaining)
+            Task.objects.bulk_create([
+                Task(
+                    description='Benchmark task',
+                    assigned_to=random.choice(users),
+                    team=random.choice(teams) if random.random() < 0.8 else None,
+                    due_date=today + timedelta(days=random.randint(-365, 365)),
+                    status=random.choice(statuses),
+                )
+                for _ in range(count)
+            ], batch_size=batch_size)
+            remaining -= count
+
+        remaining = options['documents']
+        self.stdout.write(f'Seeding {remaining} documents...')
+        while remaining > 0:
+            count = min(batch_size, remaining)
+            Document.objects.bulk_create([
+                Document(
+                    title='Benchmark document',
+                    file_url='https://docs.google.com/document/d/benchmark/edit',
+                    owner=random.choice(users),
+                    team=random.choice(teams) if random.random() < 0.8 else None,
+                    review_date=today + timedelta(days=random.randint(-365, 365)),
+                    review_reminder_sent=random.random() < 0.9,
+                )
+                for _ in range(count)
+            ], batch_size=batch_size)
+            remaining -= count
+
+    def build_queries(self):
+        """Return the hot query shapes, parameterised with existing rows"""
+        sample_task = Task.objects.filter(team__isnull=False).order_by('?').first()
+        membership = TeamMembership.objects.first()
+        today = timezone.now().date()
+        team_id = sample_task.team_id if sample_task else None
+        assignee_id = sample_task.assigned_to_id if sample_task else None
+        seek = TaskCursorPagination().seek_filter
+        # A cursor 90% of the way through the list, as reached by following next links
+        deep_offset = Task.objects.count() * 9 // 10
+        deep_cursor = list(Task.objects.order_by('due_date', 'id').values_list('due_date', 'id')[deep_offset])
+
+        queries = {
+            'open tasks by team and due date': lambda: list(
+                Task.objects.filter(team_id=team_id).exclude(status='complete').order_by('due_date')[:50]
+            ),
+            'tasks by team and status': lambda: list(
+                Task.objects.filter(team_id=team_id, status=Task.Status.IN_PROGRESS)
+            ),
+            'tasks by assignee and due range': lambda: list(
+                Task.objects.filter(
+                    assigned_to_id=assignee_id,
+                    due_date__gte=today,
+                    due_date__lte=today + timedelta(days=30)
+                )
+            ),
+            'task keyset page': lambda: list(
+                Task.objects.filter(seek([today, 0])).order_by('due_date', 'id')[:50]
+            ),
+            'task keyset page (deep)': lambda: list(
+                Task.objects.filter(seek(deep_cursor)).order_by('due_date', 'id')[:50]
+            ),
+            'task offset page (deep)': lambda: list(
+                Task.objects.order_by('due_date', 'id')[deep_offset:deep_offset + 50]
+            ),
+            'task list validators by team': lambda: Task.objects.filter(team_id=team_id).aggregate(
+                count=Count('pk'), updated=Max('updated_at')
+            ),
+            'unreminded documents by review date': lambda: list(
+                Document.objects.filter(
+                    review_date__lte=today + timedelta(days=14),
+                    review_date__gt=today,
+                    review_reminder_sent=False
+                )
+            ),
+        }
+        if membership:
+            # The permission helpers load every role of the user at once
+            queries['team roles of a user'] = lambda: dict(
+                TeamMembership.objects.filter(user_id=membership.user_id).values_list('team_id', 'role')
+            )
+        return queries
+
+    def model_indexes(self):
+        """Yield (model, index) for every index declared in model Meta"""
+        for model in (Task, Document):
+            for index in model._meta.indexes:
+                yield model, index
+
+    def time_queries(self, queries, repeat, with_indexes):
+        """Time each query with the Meta indexes present or temporarily dropped"""
+        if not with_indexes:
+            with connection.schema_editor() as editor:
+                for model, index in self.model_indexes():
+                    editor.remove_index(model, index)
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            results = {}
+            for name, query in queries.items():
+                query()  # warm up caches
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    query()
+                    timings.append((time.perf_counter() - start) * 1000)
+                results[name] = statistics.median(timings)
+            return results
+        finally:
+            if not with_indexes:
+                with connection.schema_editor() as editor:
+                    for model, index in self.model_indexes():
+                        editor.add_index(model, index)
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from sop.services.drive_credentials import refresh_expiring_credentials
+
+
+class Command(BaseCommand):
+    help = 'Refresh stored Google Drive access tokens that are about to expire'
+
+    def handle(self, *args, **options):
+        refreshed, failed = refresh_expiring_credentials()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {refreshed} Drive tokens, {failed} failed'))
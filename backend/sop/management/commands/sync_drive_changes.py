@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from sop.models import DriveSyncState, UserAccount
+from sop.services.drive_credentials import refresh_credential
+from sop.services.drive_sync import sync_drive_changes
+
+
+class Command(BaseCommand):
+    help = 'Apply changes from each user\'s Google Drive changes feed to their documents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only sync the user with this email')
+
+    def handle(self, *args, **options):
+        # Every user with stored Drive credentials, whether or not they have synced before
+        users = UserAccount.objects.filter(drive_credential__isnull=False)
+        if options['user']:
+            users = users.filter(email=options['user'])
+
+        for user in users:
+            state, _ = DriveSyncState.objects.get_or_create(user=user)
+            try:
+                # Scheduled syncs may wait for an expired token to be refreshed; requests never do
+                credentials = refresh_credential(user.pk, margin=0, wait=True).credentials
+                counts = sync_drive_changes(state, credentials)
+            except Exception as e:
+                # One user's expired credentials should not stop the others
+                self.stderr.write(self.style.ERROR(f'Sync failed for {user.email}: {e}'))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f"Synced {user.email}: {counts['changes']} changes, {counts['updated']} documents updated"
+            ))
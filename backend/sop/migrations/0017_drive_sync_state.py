@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-17 03:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sop', '0016_upload_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='document',
+            name='google_drive_file_id',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True),
+        ),
+        migrations.CreateModel(
+            name='DriveSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('credentials', models.TextField(blank=True)),
+                ('page_token', models.CharField(blank=True, max_length=255)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='drive_sync_state', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.4 on 2026-10-17 04:06
+
+import datetime
+import json
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_sync_credentials(apps, schema_editor):
+    """Move credentials stored for scheduled syncs into the credential store"""
+    DriveSyncState = apps.get_model('sop', 'DriveSyncState')
+    DriveCredential = apps.get_model('sop', 'DriveCredential')
+    for state in DriveSyncState.objects.exclude(credentials=''):
+        token_expiry = json.loads(state.credentials).get('token_expiry')
+        if token_expiry:
+            token_expiry = datetime.datetime.strptime(token_expiry, '%Y-%m-%dT%H:%M:%SZ').replace(
+                tzinfo=datetime.timezone.utc
+            )
+        DriveCredential.objects.update_or_create(
+            user_id=state.user_id,
+            defaults={'credentials': state.credentials, 'token_expiry': token_expiry or None},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sop', '0017_drive_sync_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriveCredential',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('credentials', models.TextField()),
+                ('token_expiry', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='drive_credential', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(copy_sync_credentials, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='drivesyncstate',
+            name='credentials',
+        ),
+    ]
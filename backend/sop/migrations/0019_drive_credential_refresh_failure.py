@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-17 04:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sop', '0018_drive_credential'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='drivecredential',
+            name='refresh_error',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='drivecredential',
+            name='refresh_failed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
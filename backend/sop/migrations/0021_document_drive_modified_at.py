@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-17 05:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sop', '0020_task_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='drive_modified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
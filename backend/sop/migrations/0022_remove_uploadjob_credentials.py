@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-17 05:14
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sop', '0021_document_drive_modified_at'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='uploadjob',
+            name='credentials',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-17 05:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sop', '0022_remove_uploadjob_credentials'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='teammembership',
+            name='membership_owner_idx',
+        ),
+    ]
@@ -1,3 +1,7 @@
+import os
+import uuid
+from datetime import timedelta
+from django.core.files.storage import FileSystemStorage
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.conf import settings
@@ -89,6 +93,7 @@ class Team(models.Model):
         through='TeamMembership',  # Join table with role information
         related_name='teams'  
     )
+    updated_at = models.DateTimeField(auto_now=True)  # Used for conditional GET validators
     
     def __str__(self):
         """String representation of team"""
@@ -123,9 +128,11 @@ class TeamMembership(models.Model):
         choices=ROLE_CHOICES,
         default='member'
     )
+    updated_at = models.DateTimeField(auto_now=True)  # Used for conditional GET validators
     
     class Meta:
-        unique_together = ('user', 'team')  # Prevents duplicate memberships
+        # Prevents duplicate memberships; its index also serves the role lookups, filter(user=...)
+        unique_together = ('user', 'team')
     
     def __str__(self):
         """String representation of membership"""
@@ -169,6 +176,25 @@ class Task(models.Model):
     )
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Task list filters: team/assignee with status and due date ranges
+            models.Index(fields=['team', 'status', 'due_date'], name='task_team_status_due_idx'),
+            models.Index(fields=['assigned_to', 'status', 'due_date'], name='task_assignee_status_due_idx'),
+            # Keyset pagination order
+            models.Index(fields=['due_date', 'id'], name='task_due_date_id_idx'),
+            # Conditional GET validators: COUNT and MAX(updated_at) per team or assignee
+            models.Index(fields=['updated_at'], name='task_updated_idx'),
+            models.Index(fields=['team', 'updated_at'], name='task_team_updated_idx'),
+            models.Index(fields=['assigned_to', 'updated_at'], name='task_assignee_updated_idx'),
+            # Open tasks of a team by due date
+            models.Index(
+                fields=['team', 'due_date'],
+                condition=~models.Q(status='complete'),
+                name='task_open_team_due_idx'
+            ),
+        ]
     
     def __str__(self):
         """String representation of task"""
@@ -184,7 +210,7 @@ class Document(models.Model):
     """
     title = models.CharField(max_length=255)
     file_url = models.URLField()  # URL to access the document
-    google_drive_file_id = models.CharField(max_length=255, blank=True, null=True)
+    google_drive_file_id = models.CharField(max_length=255, blank=True, null=True, db_index=True)
     owner = models.ForeignKey(UserAccount, on_delete=models.CASCADE)
     team = models.ForeignKey(
         Team, 
@@ -194,11 +220,118 @@ class Document(models.Model):
     )
     created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
+    drive_modified_at = models.DateTimeField(null=True, blank=True)  # Google Drive's modifiedDate of the file
     review_date = models.DateField(null=True, blank=True)  # Optional date for review reminder
     review_reminder_sent = models.BooleanField(default=False)  # Tracks if review reminder was sent
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order, overall and per team/owner
+            models.Index(fields=['updated_at', 'id'], name='doc_updated_id_idx'),
+            models.Index(fields=['team', 'updated_at', 'id'], name='doc_team_updated_idx'),
+            models.Index(fields=['owner', 'updated_at', 'id'], name='doc_owner_updated_idx'),
+            # Review reminder scan only looks at documents not yet reminded
+            models.Index(
+                fields=['review_date'],
+                condition=models.Q(review_reminder_sent=False),
+                name='doc_unreminded_review_idx'
+            ),
+        ]
     
     def __str__(self):
         """String representation of document"""
         return self.title
 
 
+class UploadJobStorage(FileSystemStorage):
+    """File storage in ``UPLOAD_JOB_DIR``, read each time it is used rather than at import"""
+
+    @property
+    def base_location(self):
+        return settings.UPLOAD_JOB_DIR
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+
+def upload_job_storage():
+    """Storage for payloads waiting to be uploaded by a background job"""
+    return UploadJobStorage()
+
+
+class UploadJob(models.Model):
+    """
+    Background upload of a document to Google Drive
+
+    Holds the submitted payload until a worker has uploaded it, then
+    links to the Document row it created. Clients poll the job for
+    its status and progress.
+    """
+
+    class Status(models.TextChoices):
+        """Lifecycle of an upload job"""
+        QUEUED = 'queued', _('Queued')
+        RUNNING = 'running', _('Running')
+        SUCCEEDED = 'succeeded', _('Succeeded')
+        FAILED = 'failed', _('Failed')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(UserAccount, on_delete=models.CASCADE, related_name='upload_jobs')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True)
+    title = models.CharField(max_length=255)
+    review_date = models.DateField(null=True, blank=True)
+    content_type = models.CharField(max_length=20, blank=True)
+    text_content = models.TextField(blank=True)
+    file = models.FileField(upload_to='%Y/%m/%d/', storage=upload_job_storage, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)  # Percent complete
+    error = models.TextField(blank=True)
+    document = models.ForeignKey(Document, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """String representation of upload job"""
+        return f"{self.title} ({self.status})"
+
+
+class DriveCredential(models.Model):
+    """
+    A user's Google Drive OAuth credentials
+
+    Kept outside the session so a token refreshed by one worker, or ahead
+    of expiry by the background refresh, is used by every later request.
+    """
+    user = models.OneToOneField(UserAccount, on_delete=models.CASCADE, related_name='drive_credential')
+    credentials = models.TextField()  # OAuth2Credentials JSON
+    token_expiry = models.DateTimeField(null=True, blank=True, db_index=True)
+    refresh_failed_at = models.DateTimeField(null=True, blank=True)
+    refresh_error = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def expires_within(self, seconds):
+        """Whether the access token expires in the next ``seconds`` (or has expired)"""
+        if self.token_expiry is None:
+            return False
+        return self.token_expiry <= timezone.now() + timedelta(seconds=seconds)
+
+    def __str__(self):
+        """String representation of Drive credentials"""
+        return f"Drive credentials for {self.user}"
+
+
+class DriveSyncState(models.Model):
+    """
+    Position of a user's Drive changes feed
+
+    The sync engine resumes from ``page_token`` so each run only reads
+    what changed since the last one.
+    """
+    user = models.OneToOneField(UserAccount, on_delete=models.CASCADE, related_name='drive_sync_state')
+    page_token = models.CharField(max_length=255, blank=True)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        """String representation of sync state"""
+        return f"Drive sync for {self.user}"
@@ -0,0 +1,167 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset (cursor) pagination
+
+    Clients that do not send a ``page_size`` or cursor query parameter
+    still receive the full, unpaginated list. Paginated requests seek
+    past the last row of the previous page on the ordering columns
+    instead of using OFFSET, so a deep page costs the same as the first.
+    """
+    # Columns used for both ORDER BY and the seek condition; the last
+    # one must be unique so that every row has a distinct position
+    ordering = ('id',)
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, cursor_query_param=None):
+        if cursor_query_param:
+            self.cursor_query_param = cursor_query_param
+
+    def is_requested(self, request):
+        """Return True if the client asked for a paginated response"""
+        params = request.query_params
+        return self.page_size_query_param in params or self.cursor_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return self.get_page(queryset, request)
+
+    def get_page(self, queryset, request):
+        """Return one page of the queryset, starting after the request's cursor"""
+        self.request = request
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['r'])
+
+        # Walk backwards for "previous" links, then flip the page back
+        order_by = [f'-{name}' if reverse else name for name in self.ordering]
+        queryset = queryset.order_by(*order_by)
+        if cursor:
+            queryset = queryset.filter(self.seek_filter(cursor['v'], reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        """Read the page size from the query string, capped at max_page_size"""
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size < 1:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def seek_filter(self, values, reverse=False):
+        """
+        Build the row-value comparison (a, b) > (x, y) as
+        a >= x AND (a > x OR (a = x AND b > y))
+
+        The expanded OR alone gives the planner no range on the leading
+        column, so the redundant ``a >= x`` is what lets the composite
+        index start the scan at the cursor instead of at the first row.
+        """
+        lookup = 'lt' if reverse else 'gt'
+        condition = Q()
+        for index, name in enumerate(self.ordering):
+            clause = Q(**{f'{name}__{lookup}': values[index]})
+            for prior, prior_name in enumerate(self.ordering[:index]):
+                clause &= Q(**{prior_name: values[prior]})
+            condition |= clause
+        if len(self.ordering) > 1:
+            condition = Q(**{f'{self.ordering[0]}__{lookup}e': values[0]}) & condition
+        return condition
+
+    def decode_cursor(self, request):
+        """Decode the cursor query parameter into ordering values"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            values = data['v']
+            if len(values) != len(self.ordering):
+                raise ValueError('cursor does not match ordering')
+            fields = [self.model._meta.get_field(name) for name in self.ordering]
+            return {
+                'v': [field.to_python(value) for field, value in zip(fields, values)],
+                'r': bool(data.get('r')),
+            }
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse=False):
+        """Encode the ordering values of a row into a link for the given direction"""
+        values = [
+            self.model._meta.get_field(name).value_to_string(row)
+            for name in self.ordering
+        ]
+        payload = json.dumps({'v': values, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_data(self, data):
+        """Wrap a serialized page with its navigation links"""
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+
+class TaskCursorPagination(KeysetPagination):
+    """Tasks ordered by due date, ties broken by id"""
+    ordering = ('due_date', 'id')
+
+
+class DocumentCursorPagination(KeysetPagination):
+    """Documents ordered by last update"""
+    ordering = ('updated_at', 'id')
+
+
+class TeamCursorPagination(KeysetPagination):
+    """Teams ordered by primary key"""
+    ordering = ('id',)
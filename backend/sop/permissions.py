@@ -1,23 +1,22 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 from rest_framework import permissions
-from .models import TeamMembership
+from .helpers.permission_helpers import get_team_role
 
 class IsOwnerOrAssignedUser(BasePermission):
     def has_object_permission(self, request, view, obj):
         # Allow read-only access for all team members
         if request.method in SAFE_METHODS:
-            return TeamMembership.objects.filter(user=request.user, team=obj.team).exists()
-        
+            return get_team_role(request, obj.team_id) is not None
+
         # Check if the user is the assigned user of the task
-        if obj.assigned_to == request.user:
+        if obj.assigned_to_id is not None and obj.assigned_to_id == request.user.pk:
             return True
-        
+
         # Check if the user is an owner of the team
-        if obj.team:
-            membership = TeamMembership.objects.filter(user=request.user, team=obj.team, role='owner').exists()
-            if membership:
+        if obj.team_id:
+            if get_team_role(request, obj.team_id) == 'owner':
                 return True
-        
+
         return False
 
 class IsTeamOwner(BasePermission):
@@ -27,14 +26,10 @@ class IsTeamOwner(BasePermission):
     def has_object_permission(self, request, view, obj):
         # Read permissions are allowed for any team member
         if request.method in SAFE_METHODS:
-            return TeamMembership.objects.filter(user=request.user, team=obj).exists()
-        
+            return get_team_role(request, obj) is not None
+
         # Write permissions are only allowed to the team owner
-        return TeamMembership.objects.filter(
-            user=request.user, 
-            team=obj, 
-            role='owner'
-        ).exists()
+        return get_team_role(request, obj) == 'owner'
 
 class IsTeamMemberOrTaskOwner(permissions.BasePermission):
     """
@@ -47,20 +42,19 @@ class IsTeamMemberOrTaskOwner(permissions.BasePermission):
         user = request.user
 
         # Personal task, assigned to this user
-        if obj.assigned_to == user and obj.team is None:
+        if obj.assigned_to_id is not None and obj.assigned_to_id == user.pk and obj.team_id is None:
             return True
 
         # Team task
-        if obj.team:
-            try:
-                membership = TeamMembership.objects.get(user=user, team=obj.team)
-            except TeamMembership.DoesNotExist:
+        if obj.team_id:
+            role = get_team_role(request, obj.team_id)
+            if role is None:
                 return False
 
             if request.method in permissions.SAFE_METHODS:
                 return True
 
             # ✅ Only allow write access if they are the owner of the task's team
-            return membership.role == 'owner'
+            return role == 'owner'
 
         return False
@@ -2,10 +2,12 @@ import logging
 import datetime
 from djoser.serializers import UserCreateSerializer as DjoserUserCreateSerializer
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.validators import UniqueValidator
-from sop.models import Team, TeamMembership, Task, Document
+from sop.models import Team, TeamMembership, Task, Document, UploadJob
 
 # Get the user model from settings
 User = get_user_model()
@@ -38,6 +40,54 @@ class UserCreateSerializer(DjoserUserCreateSerializer):
         return list(obj.teams.values_list('id', flat=True))
 
 
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets and expansion control for read requests
+
+    ``?fields=a,b`` limits the response to the listed fields.
+    ``?expand=x,y`` picks which of the serializer's ``expandable_fields``
+    (nested or derived fields that cost extra work) are included; the
+    others are left out. Without either parameter the full
+    representation is returned, so existing clients are unaffected.
+    """
+    expandable_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is None and expand is None:
+            fields, expand = self.get_requested_shape(self.context.get('request'))
+        if fields is not None or expand is not None:
+            self.restrict_fields(fields, expand)
+
+    @staticmethod
+    def get_requested_shape(request):
+        """Read the fields/expand query parameters of a read request"""
+        if request is None or request.method not in SAFE_METHODS:
+            return None, None
+
+        def split(name):
+            value = request.query_params.get(name)
+            if value is None:
+                return None
+            return {item.strip() for item in value.split(',') if item.strip()}
+
+        return split('fields'), split('expand')
+
+    def restrict_fields(self, fields, expand):
+        """Drop every field that was not requested"""
+        keep = set(self.fields)
+        if expand is not None:
+            keep -= set(self.expandable_fields) - set(expand)
+        if fields is not None:
+            keep &= set(fields) | set(expand or ())
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+
 class TeamMembershipSerializer(serializers.ModelSerializer):
     """
     Team membership serializer
@@ -54,7 +104,7 @@ class TeamMembershipSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'team', 'role', 'user_name', 'team_name']
 
 
-class TeamSerializer(serializers.ModelSerializer):
+class TeamSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Team serializer with nested membership information
     
@@ -63,14 +113,57 @@ class TeamSerializer(serializers.ModelSerializer):
     """
     # Include nested serializer for team members with roles
     members = TeamMembershipSerializer(source='team_memberships', many=True, read_only=True)
+    expandable_fields = ('members',)
     
     class Meta:
         model = Team
         fields = ['id', 'name', 'description', 'created_by', 'members']
         read_only_fields = ['created_by', 'members']
 
+    @staticmethod
+    def setup_eager_loading(queryset, field_names=None):
+        """
+        Prefetch memberships and their users when members are serialized
+        """
+        if field_names is None or 'members' in field_names:
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'team_memberships',
+                    queryset=TeamMembership.objects.select_related('user')
+                )
+            )
+        return queryset
+
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field that resolves ids from a preloaded ``related_cache``
+
+    Bulk endpoints load every referenced row with one ``in_bulk`` query per
+    model and pass them in the context as {model: {pk: instance}}, so
+    validating a batch does not run a lookup per item. Without the cache
+    the field behaves like PrimaryKeyRelatedField.
+    """
+
+    def to_internal_value(self, data):
+        related_cache = self.context.get('related_cache')
+        if related_cache is None:
+            return super().to_internal_value(data)
 
-class TaskSerializer(serializers.ModelSerializer):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+        instance = related_cache.get(self.get_queryset().model, {}).get(pk)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
+
+
+class TaskSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Task serializer with additional fields and validation
     
@@ -81,6 +174,8 @@ class TaskSerializer(serializers.ModelSerializer):
     assigned_to_name = serializers.SerializerMethodField()
     team_name = serializers.SerializerMethodField()
     team_members = serializers.SerializerMethodField()
+    expandable_fields = ('assigned_to_name', 'team_name', 'team_members')
+    serializer_related_field = CachedPrimaryKeyRelatedField
     
     class Meta:
         model = Task
@@ -91,6 +186,31 @@ class TaskSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at', 'assigned_to_name', 'team_name', 'team_members']
+
+    @staticmethod
+    def setup_eager_loading(queryset, field_names=None):
+        """
+        Load assignees, teams and team memberships up front
+
+        Keeps the number of queries for a task list constant instead
+        of running a membership query for every task. Only relations
+        needed by the serialized fields are loaded.
+        """
+        if field_names is None:
+            field_names = TaskSerializer.Meta.fields
+
+        if 'assigned_to_name' in field_names:
+            queryset = queryset.select_related('assigned_to')
+        if 'team_name' in field_names or 'team_members' in field_names:
+            queryset = queryset.select_related('team')
+        if 'team_members' in field_names:
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'team__team_memberships',
+                    queryset=TeamMembership.objects.select_related('user')
+                )
+            )
+        return queryset
     
     def get_assigned_to_name(self, obj):
         """
@@ -109,9 +229,12 @@ class TaskSerializer(serializers.ModelSerializer):
         return None
     
     def get_team_members(self, obj):
+        """
+        Return the memberships of the task's team, using prefetched rows when available
+        """
         if obj.team:
             # Include team members when task has a team
-            members = TeamMembership.objects.filter(team=obj.team)
+            members = obj.team.team_memberships.all()
             return TeamMembershipSerializer(members, many=True).data
         return []
     
@@ -135,7 +258,12 @@ class TaskSerializer(serializers.ModelSerializer):
         
         if team and assigned_to:
             # Ensure user is a member of the team they're being assigned a task for
-            team_member_exists = team.members.filter(id=assigned_to.id).exists()
+            # (bulk requests preload the (team_id, user_id) pairs for the whole batch)
+            team_member_pairs = self.context.get('team_member_pairs')
+            if team_member_pairs is not None:
+                team_member_exists = (team.pk, assigned_to.pk) in team_member_pairs
+            else:
+                team_member_exists = team.members.filter(id=assigned_to.id).exists()
             if not team_member_exists:
                 raise serializers.ValidationError(
                     {"assigned_to": "This user is not a member of the specified team"}
@@ -144,7 +272,7 @@ class TaskSerializer(serializers.ModelSerializer):
         return data
     
 
-class DocumentSerializer(serializers.ModelSerializer):
+class DocumentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Document serializer for SOP documents
     
@@ -156,6 +284,7 @@ class DocumentSerializer(serializers.ModelSerializer):
     team_name = serializers.ReadOnlyField(source='team.name')
     owner_name = serializers.ReadOnlyField(source='owner.name')
     days_until_review = serializers.SerializerMethodField()
+    expandable_fields = ('team_name', 'owner_name', 'days_until_review')
 
     class Meta:
         model = Document
@@ -174,6 +303,17 @@ class DocumentSerializer(serializers.ModelSerializer):
             'days_until_review',
         ]
 
+    @staticmethod
+    def setup_eager_loading(queryset, field_names=None):
+        """
+        Join the owner and team only when their names are serialized
+        """
+        if field_names is None or 'owner_name' in field_names:
+            queryset = queryset.select_related('owner')
+        if field_names is None or 'team_name' in field_names:
+            queryset = queryset.select_related('team')
+        return queryset
+
     def get_team_name(self, obj):
         """
         Return team name or "Personal" for documents not in a team
@@ -202,4 +342,18 @@ class DocumentSerializer(serializers.ModelSerializer):
             review_date = obj.review_date
             
         delta = review_date - today
-        return delta.days
\ No newline at end of file
+        return delta.days
+
+
+class UploadJobSerializer(serializers.ModelSerializer):
+    """
+    Status of a background document upload
+
+    Includes the created document once the job has succeeded.
+    """
+    document = DocumentSerializer(read_only=True)
+
+    class Meta:
+        model = UploadJob
+        fields = ['id', 'title', 'status', 'progress', 'error', 'document', 'created_at', 'updated_at']
+        read_only_fields = fields
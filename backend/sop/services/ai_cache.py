@@ -0,0 +1,185 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+
+
+def make_key(params):
+    """Hash of everything that decides a completion: model, prompts, content and parameters"""
+    encoded = json.dumps(params, sort_keys=True, separators=(',', ':'))
+    return 'ai_completion:' + hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class AICompletionCache:
+    """
+    Cache of AI completions keyed by a hash of the request
+
+    Repeating a summary or improvement of unchanged content returns the
+    stored text without calling OpenAI. Subclasses store the entries and
+    count hits and misses where the entries live.
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, params):
+        """Return the cached completion text for these parameters, or None"""
+        text = self._get(make_key(params))
+        self._count('misses' if text is None else 'hits')
+        return text
+
+    def set(self, params, text):
+        self._set(make_key(params), text)
+
+    async def aget(self, params):
+        """Async version of ``get`` for async views"""
+        text = await self._aget(make_key(params))
+        await self._acount('misses' if text is None else 'hits')
+        return text
+
+    async def aset(self, params, text):
+        await self._aset(make_key(params), text)
+
+    def stats(self):
+        """Hits, misses and hit rate of the lookups counted so far"""
+        hits, misses = self._counts()
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+        }
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    async def _acount(self, name):
+        self._count(name)
+
+    def _counts(self):
+        with self._stats_lock:
+            return self.hits, self.misses
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def _set(self, key, text):
+        raise NotImplementedError
+
+    # In-process entries are read without blocking, so the async versions can call the sync ones
+    async def _aget(self, key):
+        return self._get(key)
+
+    async def _aset(self, key, text):
+        self._set(key, text)
+
+
+class LocMemAICache(AICompletionCache):
+    """In-process cache evicting expired entries, then the least recently used"""
+
+    def __init__(self, timeout, max_entries):
+        super().__init__(timeout)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, text = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return text
+
+    def _set(self, key, text):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            stats['entries'] = len(self._entries)
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DjangoAICache(AICompletionCache):
+    """
+    Entries kept in one of the Django caches (e.g. Redis) and shared by all workers
+
+    Expiry is the cache's timeout; eviction follows the backend's own
+    policy, such as Redis with ``maxmemory-policy allkeys-lru``. Hits and
+    misses are counted in the same cache, so the stats cover every worker.
+    """
+    stats_key = 'ai_completion:stats:'
+
+    def __init__(self, timeout, alias):
+        super().__init__(timeout)
+        self.alias = alias
+
+    def _get(self, key):
+        return caches[self.alias].get(key)
+
+    def _set(self, key, text):
+        caches[self.alias].set(key, text, self.timeout)
+
+    async def _aget(self, key):
+        return await caches[self.alias].aget(key)
+
+    async def _aset(self, key, text):
+        await caches[self.alias].aset(key, text, self.timeout)
+
+    def _count(self, name):
+        cache = caches[self.alias]
+        # add() leaves an existing counter alone; incr() is atomic on Redis
+        cache.add(self.stats_key + name, 0, None)
+        cache.incr(self.stats_key + name)
+
+    async def _acount(self, name):
+        cache = caches[self.alias]
+        await cache.aadd(self.stats_key + name, 0, None)
+        await cache.aincr(self.stats_key + name)
+
+    def _counts(self):
+        counts = caches[self.alias].get_many([self.stats_key + 'hits', self.stats_key + 'misses'])
+        return counts.get(self.stats_key + 'hits', 0), counts.get(self.stats_key + 'misses', 0)
+
+
+_ai_cache = None
+_ai_cache_config = None
+
+
+def get_ai_cache():
+    """Return the process-wide AI completion cache configured from settings"""
+    global _ai_cache, _ai_cache_config
+    config = (
+        settings.AI_CACHE_BACKEND,
+        settings.AI_CACHE_TIMEOUT,
+        settings.AI_CACHE_MAX_ENTRIES,
+        settings.AI_CACHE_ALIAS,
+    )
+    if _ai_cache is None or _ai_cache_config != config:
+        backend, timeout, max_entries, alias = config
+        if backend == 'django':
+            _ai_cache = DjangoAICache(timeout, alias)
+        else:
+            _ai_cache = LocMemAICache(timeout, max_entries)
+        _ai_cache_config = config
+    return _ai_cache
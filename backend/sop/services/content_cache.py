@@ -0,0 +1,202 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentContentCache:
+    """
+    Two-tier cache for exported Google Doc HTML
+
+    Entries are keyed by (file_id, modifiedDate), so an edit in Drive
+    produces a new key and stale content is never served. The first tier
+    is an in-process LRU bounded by total size. The second tier lives on
+    disk and is content-addressed: small pointer files map a key to the
+    sha256 of its content, and each distinct body is stored once as a
+    blob. Blobs are evicted least recently used first, with the pointers
+    to them, once the tier grows past its size limit.
+    """
+    # Eviction frees space down to this share of disk_bytes, so the blob
+    # directory is scanned once per batch of writes rather than on every set
+    evict_to = 0.9
+
+    def __init__(self, directory, memory_bytes=32 * 1024 * 1024, disk_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.key_dir = os.path.join(directory, 'keys')
+        self.blob_dir = os.path.join(directory, 'blobs')
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._disk_size = None  # Bytes in the blob tier as counted by this process; None until scanned
+        self._lock = threading.Lock()
+        os.makedirs(self.key_dir, exist_ok=True)
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(file_id, modified):
+        return hashlib.sha1(f'{file_id}|{modified}'.encode('utf-8')).hexdigest()
+
+    def get(self, file_id, modified):
+        """Return the cached content for this revision of the file, or None"""
+        key = self.make_key(file_id, modified)
+        with self._lock:
+            content = self._memory.get(key)
+            if content is not None:
+                self._memory.move_to_end(key)
+                return content
+
+        content = self._read_disk(key)
+        if content is not None:
+            self._remember(key, content)
+        return content
+
+    def set(self, file_id, modified, content):
+        """Store the content of this revision of the file in both tiers"""
+        key = self.make_key(file_id, modified)
+        self._remember(key, content)
+        try:
+            self._write_disk(key, content)
+        except OSError as e:
+            # The memory tier still works if the disk is full or read-only
+            logger.warning("Could not write document content cache: %s", e)
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+
+    def _remember(self, key, content):
+        size = len(content.encode('utf-8'))
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_size -= len(previous.encode('utf-8'))
+            self._memory[key] = content
+            self._memory_size += size
+            while self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted.encode('utf-8'))
+
+    def _read_disk(self, key):
+        try:
+            with open(os.path.join(self.key_dir, key), 'r') as pointer:
+                digest = pointer.read().strip()
+            blob_path = os.path.join(self.blob_dir, digest)
+            with open(blob_path, 'rb') as blob:
+                data = blob.read()
+        except (OSError, ValueError):
+            return None
+
+        # A truncated or replaced blob no longer matches its address
+        if hashlib.sha256(data).hexdigest() != digest:
+            return None
+        try:
+            os.utime(blob_path)  # Mark as recently used for eviction
+        except OSError:
+            pass
+        return data.decode('utf-8')
+
+    def _write_disk(self, key, content):
+        data = content.encode('utf-8')
+        if len(data) > self.disk_bytes:
+            return
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = os.path.join(self.blob_dir, digest)
+
+        added = 0
+        if os.path.exists(blob_path):
+            os.utime(blob_path)
+        else:
+            self._atomic_write(blob_path, data)
+            added = len(data)
+        self._atomic_write(os.path.join(self.key_dir, key), digest.encode('ascii'))
+
+        with self._lock:
+            if self._disk_size is not None:
+                self._disk_size += added
+            over_limit = self._disk_size is None or self._disk_size > self.disk_bytes
+        if over_limit:
+            self._evict()
+
+    def _atomic_write(self, path, data):
+        # Write then rename so concurrent readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                handle.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _evict(self):
+        """
+        Delete the least recently used blobs and their pointers until the
+        tier is back under ``evict_to`` of its limit
+
+        Also recounts the tier, which other processes may have written to.
+        """
+        blobs = []
+        total = 0
+        with os.scandir(self.blob_dir) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                blobs.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        evicted = set()
+        if total > self.disk_bytes:
+            for _, size, path in sorted(blobs):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                evicted.add(os.path.basename(path))
+                total -= size
+                if total <= self.disk_bytes * self.evict_to:
+                    break
+        with self._lock:
+            self._disk_size = total
+        if evicted:
+            self._remove_pointers(evicted)
+
+    def _remove_pointers(self, digests):
+        """Delete the key files pointing at any of the given blobs"""
+        with os.scandir(self.key_dir) as entries:
+            for entry in entries:
+                try:
+                    with open(entry.path, 'r') as pointer:
+                        if pointer.read().strip() in digests:
+                            os.remove(entry.path)
+                except OSError:
+                    continue
+
+
+_content_cache = None
+_content_cache_config = None
+
+
+def get_content_cache():
+    """Return the process-wide content cache configured from settings"""
+    global _content_cache, _content_cache_config
+    config = (
+        settings.DOCUMENT_CONTENT_CACHE_DIR,
+        settings.DOCUMENT_CONTENT_CACHE_MEMORY_BYTES,
+        settings.DOCUMENT_CONTENT_CACHE_DISK_BYTES,
+    )
+    if _content_cache is None or _content_cache_config != config:
+        _content_cache = DocumentContentCache(*config)
+        _content_cache_config = config
+    return _content_cache
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+import requests
+from django.conf import settings
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from oauth2client import clientsecrets
+from oauth2client.client import OAuth2Credentials
+from pydrive2.auth import GoogleAuth, InvalidConfigError
+from pydrive2.drive import GoogleDrive
+
+logger = logging.getLogger(__name__)
+
+# Shared keep-alive session for plain HTTP calls to Google, such as export downloads
+export_session = requests.Session()
+
+
+def build_drive_service(http, root_url):
+    """Build a Drive v2 client whose requests go to root_url instead of Google"""
+    document = json.loads(get_static_doc('drive', 'v2'))
+    document['rootUrl'] = root_url.rstrip('/') + '/'
+    return build_from_document(document, http=http)
+
+
+@lru_cache(maxsize=None)
+def get_client_config():
+    """
+    Read the OAuth client config once per process
+
+    Returns the same mapping GoogleAuth.LoadClientConfigFile builds, so it
+    can be assigned to ``client_config`` without touching the disk again.
+    """
+    try:
+        client_type, client_info = clientsecrets.loadfile(settings.GOOGLE_CLIENT_SECRETS_FILE)
+    except clientsecrets.InvalidClientSecretsError as error:
+        raise InvalidConfigError("Invalid client secrets file %s" % error)
+    if client_type not in (clientsecrets.TYPE_WEB, clientsecrets.TYPE_INSTALLED):
+        raise InvalidConfigError("Unknown client_type of client config file")
+
+    try:
+        return {
+            'client_id': client_info['client_id'],
+            'client_secret': client_info['client_secret'],
+            'auth_uri': client_info['auth_uri'],
+            'token_uri': client_info['token_uri'],
+            'revoke_uri': client_info.get('revoke_uri'),
+            'redirect_uri': client_info['redirect_uris'][0],
+        }
+    except KeyError:
+        raise InvalidConfigError("Insufficient client config in file")
+
+
+def new_google_auth(load_client_config=False):
+    """
+    Build a GoogleAuth from in-memory settings
+
+    Passing the settings directly skips GoogleAuth's attempt to read a
+    settings.yaml file on every construction. The login flow asks for
+    offline access, so Google issues the refresh token that stored
+    credentials are renewed with.
+    """
+    auth_settings = dict(GoogleAuth.DEFAULT_SETTINGS)
+    auth_settings['client_config_file'] = settings.GOOGLE_CLIENT_SECRETS_FILE
+    auth_settings['get_refresh_token'] = True
+    gauth = GoogleAuth(settings=auth_settings)
+    if load_client_config:
+        gauth.client_config.update(get_client_config())
+    return gauth
+
+
+class DriveClient:
+    """An authorized GoogleAuth/GoogleDrive pair bound to one set of credentials"""
+
+    def __init__(self, credentials_json):
+        self.gauth = new_google_auth()
+        try:
+            self.gauth.credentials = OAuth2Credentials.from_json(credentials_json)
+            self._drive = GoogleDrive(self.gauth)
+        except Exception as e:
+            logger.error("Failed to initialize Google Drive client: %s", e, exc_info=True)
+            raise ValueError("Invalid Google Drive credentials.")
+
+    @property
+    def drive(self):
+        """Return the PyDrive2 wrapper, sharing the API client built by ``service``"""
+        # PyDrive2 would otherwise build its own client for Google, ignoring GOOGLE_DRIVE_API_BASE_URL
+        self.service
+        return self._drive
+
+    @property
+    def service(self):
+        """Return the Drive API client, building it (and its HTTP connection) on first use"""
+        if self.gauth.service is None:
+            self.gauth.Authorize()
+            # Point the client at another server, e.g. a local fake Drive
+            if settings.GOOGLE_DRIVE_API_BASE_URL:
+                self.gauth.service = build_drive_service(self.gauth.http, settings.GOOGLE_DRIVE_API_BASE_URL)
+        return self.gauth.service
+
+
+class DriveClientPool:
+    """
+    Per-process pool of Drive clients keyed by credential identity
+
+    A client keeps its authorized HTTP connections and parsed API
+    description, so later requests with the same credentials skip the
+    TLS handshake and discovery setup. Clients are checked out for
+    exclusive use, since httplib2 connections are not thread-safe, and
+    the least recently used credentials are dropped once more than
+    ``max_size`` clients are idle.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self._idle = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_max_size(self):
+        return self.max_size if self.max_size is not None else settings.GOOGLE_DRIVE_CLIENT_POOL_SIZE
+
+    @staticmethod
+    def make_key(credentials_json):
+        # The API endpoint is part of the identity so a client is never reused against another server
+        identity = f'{settings.GOOGLE_DRIVE_API_BASE_URL}|{credentials_json}'
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def acquire(self, credentials_json):
+        """Check out an idle client for these credentials, or build a new one"""
+        key = self.make_key(credentials_json)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self._idle.move_to_end(key)
+                return key, idle.pop()
+        return key, DriveClient(credentials_json)
+
+    def release(self, key, client):
+        """Return a client to the pool, evicting the least recently used ones"""
+        max_size = self.get_max_size()
+        if max_size <= 0:
+            return
+        with self._lock:
+            self._idle.setdefault(key, []).append(client)
+            self._idle.move_to_end(key)
+            while self.size() > max_size:
+                oldest_key, clients = next(iter(self._idle.items()))
+                clients.pop(0)
+                if not clients:
+                    del self._idle[oldest_key]
+
+    def size(self):
+        return sum(len(clients) for clients in self._idle.values())
+
+    def clear(self):
+        with self._lock:
+            self._idle.clear()
+
+    @contextmanager
+    def client(self, credentials_json):
+        """Use a pooled client for the duration of a with block"""
+        key, client = self.acquire(credentials_json)
+        try:
+            yield client
+        finally:
+            self.release(key, client)
+
+
+drive_client_pool = DriveClientPool()
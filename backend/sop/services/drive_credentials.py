@@ -0,0 +1,142 @@
+import datetime
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from oauth2client import transport
+from oauth2client.client import OAuth2Credentials
+from ..models import DriveCredential
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY = 'google_drive_credentials'
+
+
+def credentials_expiry(credentials_json):
+    """Return the access token's expiry as an aware datetime, or None if unknown"""
+    try:
+        expiry = OAuth2Credentials.from_json(credentials_json).token_expiry
+    except Exception:
+        return None
+    return expiry.replace(tzinfo=datetime.timezone.utc) if expiry else None
+
+
+def store_credentials(user, credentials_json):
+    """Save a user's Drive credentials, replacing any stored before"""
+    credential, _ = DriveCredential.objects.update_or_create(
+        user=user,
+        defaults={
+            'credentials': credentials_json,
+            'token_expiry': credentials_expiry(credentials_json),
+            'refresh_failed_at': None,
+            'refresh_error': '',
+        },
+    )
+    return credential
+
+
+def get_drive_credentials(request):
+    """
+    Return the Drive credentials JSON to use for this request, or None
+
+    The stored credentials win over the session copy, since the background
+    refresh keeps them current; credentials in the session are stored the
+    first time they are seen, or when the user signed in to Drive again.
+    """
+    session_json = request.session.get(SESSION_KEY)
+    if not request.user.is_authenticated:
+        return session_json
+
+    credential = DriveCredential.objects.filter(user=request.user).first()
+    if session_json and (credential is None or _is_newer(session_json, credential)):
+        credential = store_credentials(request.user, session_json)
+    if credential is None or fresh_credentials(credential) is None:
+        return None
+    return credential.credentials
+
+
+def _is_newer(credentials_json, credential):
+    if credentials_json == credential.credentials:
+        return False
+    expiry = credentials_expiry(credentials_json)
+    return expiry is not None and (credential.token_expiry is None or expiry > credential.token_expiry)
+
+
+def fresh_credentials(credential):
+    """
+    Return the stored credentials if their access token is still valid, else None
+
+    Requests never call the token endpoint: the background refresh renews
+    tokens before they expire, so an expired token means that refresh has
+    not run or has failed (e.g. the user revoked access) and the caller
+    fails fast, asking the user to sign in to Drive again.
+    """
+    if not credential.expires_within(0):
+        return credential
+    logger.warning(
+        "Drive access token for user %s has expired%s", credential.user_id,
+        f" (refresh failed: {credential.refresh_error})" if credential.refresh_failed_at else "",
+    )
+    return None
+
+
+def refresh_credential(user_id, margin=None, wait=False):
+    """
+    Refresh a user's access token if it expires within ``margin`` seconds
+
+    The row is locked while the token endpoint is called, so only one
+    worker refreshes a given token. Without ``wait`` a row locked by
+    another worker is skipped and None is returned. A failed refresh is
+    recorded on the row and the error re-raised.
+    """
+    if margin is None:
+        margin = settings.GOOGLE_DRIVE_TOKEN_REFRESH_MARGIN
+    try:
+        with transaction.atomic():
+            credential = DriveCredential.objects.select_for_update(skip_locked=not wait).filter(user_id=user_id).first()
+            # Another worker may have refreshed it while we waited for the lock
+            if credential is None or not credential.expires_within(margin):
+                return credential
+
+            credentials = OAuth2Credentials.from_json(credential.credentials)
+            credentials.refresh(transport.get_http_object(timeout=settings.GOOGLE_DRIVE_TOKEN_REFRESH_TIMEOUT))
+            credential.credentials = credentials.to_json()
+            credential.token_expiry = credentials_expiry(credential.credentials)
+            credential.refresh_failed_at = None
+            credential.refresh_error = ''
+            credential.save(update_fields=[
+                'credentials', 'token_expiry', 'refresh_failed_at', 'refresh_error', 'updated_at'
+            ])
+    except Exception as e:
+        DriveCredential.objects.filter(user_id=user_id).update(
+            refresh_failed_at=timezone.now(), refresh_error=str(e)[:255]
+        )
+        raise
+    return credential
+
+
+def refresh_expiring_credentials():
+    """
+    Refresh every stored token expiring within the refresh margin; returns (refreshed, failed)
+
+    Tokens whose refresh failed recently are left until
+    ``GOOGLE_DRIVE_TOKEN_REFRESH_RETRY`` has passed, or the user signs in again.
+    """
+    now = timezone.now()
+    margin = settings.GOOGLE_DRIVE_TOKEN_REFRESH_MARGIN
+    user_ids = DriveCredential.objects.filter(
+        token_expiry__lte=now + datetime.timedelta(seconds=margin)
+    ).exclude(
+        refresh_failed_at__gt=now - datetime.timedelta(seconds=settings.GOOGLE_DRIVE_TOKEN_REFRESH_RETRY)
+    ).values_list('user_id', flat=True)
+
+    refreshed = failed = 0
+    for user_id in user_ids:
+        try:
+            if refresh_credential(user_id, margin) is not None:
+                refreshed += 1
+        except Exception as e:
+            # Revoked or expired refresh tokens need the user to sign in again
+            logger.warning("Refreshing Drive credentials for user %s failed: %s", user_id, e)
+            failed += 1
+    return refreshed, failed
@@ -1,76 +1,152 @@
 # Disclaimer: Portions of this code were generated by ChatGPT and were reviewed and modified to fit the requirements of the project.
-import json
+import io
 import logging
-import os
-import tempfile
+import random
+import threading
 import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
-from pydrive2.auth import GoogleAuth
-from pydrive2.drive import GoogleDrive
-from oauth2client.client import OAuth2Credentials
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseUpload
+from .drive_clients import drive_client_pool
 
 logger = logging.getLogger(__name__)
 
+GOOGLE_DOC_MIME_TYPE = 'application/vnd.google-apps.document'
+
+# Metadata requested with every write so no follow-up lookup is needed
+FILE_FIELDS = 'id, title, mimeType, alternateLink, webViewLink, embedLink'
+
+# HTTP statuses worth retrying; anything else in 4xx will fail again
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Most calls Drive accepts in one batch request
+DRIVE_BATCH_LIMIT = 100
+
+
+def with_backoff(func, max_attempts=None, description='Drive request'):
+    """
+    Call func, retrying transient failures with jittered exponential backoff
+
+    The n-th retry waits a random time between 0 and base * 2**n seconds
+    (capped), so concurrent workers do not retry in lockstep.
+    """
+    max_attempts = max_attempts or settings.GOOGLE_DRIVE_MAX_ATTEMPTS
+    for attempt in range(max_attempts):
+        try:
+            return func()
+        except Exception as error:
+            retryable = not isinstance(error, HttpError) or error.resp.status in RETRYABLE_STATUSES
+            if not retryable or attempt == max_attempts - 1:
+                raise
+            delay = random.uniform(0, min(
+                settings.GOOGLE_DRIVE_RETRY_MAX_DELAY,
+                settings.GOOGLE_DRIVE_RETRY_BASE_DELAY * 2 ** attempt
+            ))
+            logger.warning("%s attempt %s failed, retrying in %.2fs: %s", description, attempt + 1, delay, error)
+            time.sleep(delay)
+
+
+def batch_delete_files(service, file_ids):
+    """
+    Delete Drive files with multipart batch requests of up to DRIVE_BATCH_LIMIT calls
+
+    Returns {file_id: error message or None}. Files that are already gone
+    count as deleted.
+    """
+    results = {}
+
+    def record(request_id, response, exception):
+        if exception is None or (isinstance(exception, HttpError) and exception.resp.status == 404):
+            results[request_id] = None
+        else:
+            results[request_id] = str(exception)
+
+    file_ids = list(dict.fromkeys(file_ids))
+    for start in range(0, len(file_ids), DRIVE_BATCH_LIMIT):
+        chunk = file_ids[start:start + DRIVE_BATCH_LIMIT]
+        batch = service.new_batch_http_request(callback=record)
+        for file_id in chunk:
+            batch.add(service.files().delete(fileId=file_id), request_id=file_id)
+        try:
+            with_backoff(batch.execute, description='Batch delete')
+        except Exception as e:
+            logger.error("Batch delete of %s files failed: %s", len(chunk), e)
+            for file_id in chunk:
+                results.setdefault(file_id, str(e))
+    return results
+
+
 # the following was modified from Google Drive documentation:
 class GoogleDriveService:
+    """
+    Uploads documents to Google Drive with a pooled client
+
+    Use as a context manager (or call close()) so the client goes back
+    to the pool for the next request with the same credentials.
+    """
+
     def __init__(self, credentials_json):
-        self.gauth = GoogleAuth()
-        self.gauth.DEFAULT_SETTINGS['client_config_file'] = settings.GOOGLE_CLIENT_SECRETS_FILE
-        
-        try:
-            credentials = OAuth2Credentials.from_json(credentials_json)
-            self.gauth.credentials = credentials
-            self.drive = GoogleDrive(self.gauth)
-        except Exception as e:
-            logger.error("Failed to initialize Google Drive service: %s", e, exc_info=True)
-            raise ValueError("Invalid Google Drive credentials.")
-
-    def upload_document(self, title, text_content=None, file_obj=None, content_type='text/plain'):
-        """Upload a document to Google Drive and return its metadata"""
-        # Create file in Google Drive
-        gfile = self.drive.CreateFile({'title': title})
-        
-        # Create a temporary file
-        temp_file = None
-        file_path = None
-        mime_type = content_type
-        
-        try:
-            if text_content:
-                file_path, mime_type = self._create_temp_file_from_text(text_content, content_type, title)
-            elif file_obj:
-                file_path, mime_type = self._create_temp_file_from_upload(file_obj)
-                
-            # Set content file and MIME type
-            gfile.SetContentFile(file_path)
-            gfile['mimeType'] = mime_type
-            
-            # Upload and convert the file
-            self._upload_file(gfile)
-            
-            # Convert to Google Docs and set permissions
-            drive_file_id = self._convert_to_google_docs(gfile)
-            self._set_permissions(drive_file_id or gfile['id'])
-            
-            # Get file URL
-            file_url = self._get_file_url(drive_file_id or gfile['id'])
-            
-            return {
-                'file_id': drive_file_id or gfile['id'],
-                'file_url': file_url
-            }
-        finally:
-            # Clean up temporary file
-            if file_path and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except Exception as e:
-                    logger.warning("Could not remove temporary file: %s", e)
-    
+        self._pool_key, self.client = drive_client_pool.acquire(credentials_json)
+        self.gauth = self.client.gauth
+        self.drive = self.client.drive
+
+    def close(self):
+        """Return the Drive client to the pool"""
+        if self.client is not None:
+            drive_client_pool.release(self._pool_key, self.client)
+            self.client = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def upload_document(self, title, text_content=None, file_obj=None, content_type='text/plain', progress=None):
+        """
+        Upload a document to Google Drive and return its metadata
+
+        The file is converted to a Google Doc by the upload itself, which
+        also returns its link. Only files Drive cannot convert on upload
+        need a copy; the sharing permission and removal of the unconverted
+        original then go out together in one batch request.
+
+        ``progress``, if given, is called with the fraction of bytes sent
+        after each uploaded chunk.
+        """
+        # Build a stream over the content instead of copying it to a temporary file
+        if text_content:
+            stream, mime_type = self._stream_from_text(text_content, content_type, title)
+        elif file_obj:
+            stream, mime_type = self._stream_from_upload(file_obj)
+        else:
+            raise ValueError("You must provide either a file or text content.")
+
+        # Upload and convert the file
+        drive_file = self._upload_file(title, stream, mime_type, progress)
+        original_id = None
+
+        if drive_file.get('mimeType') != GOOGLE_DOC_MIME_TYPE:
+            converted = self._convert_to_google_docs(drive_file)
+            if converted:
+                original_id = drive_file['id']
+                drive_file = converted
+
+        self._set_permissions(drive_file['id'], delete_file_id=original_id)
+
+        return {
+            'file_id': drive_file['id'],
+            'file_url': self._get_file_url(drive_file)
+        }
+
+    def _get_service(self):
+        """Return the authorized Drive API client"""
+        return self.client.service
+
     # The following function was generated by ChatGPT and modified to fit the requirements of the project.
-    def _create_temp_file_from_text(self, text_content, content_type, title):
-        """Create a temporary file from text content"""
+    def _stream_from_text(self, text_content, content_type, title):
+        """Wrap text content in an in-memory stream"""
         if content_type == 'html':
             html_content = f"""<!DOCTYPE html>
 <html>
@@ -82,30 +158,20 @@ class GoogleDriveService:
 {text_content}
 </body>
 </html>"""
-            
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.html')
-            temp_file.write(html_content.encode('utf-8'))
-            temp_file.flush()
-            return temp_file.name, 'text/html'
-        else:
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.txt')
-            temp_file.write(text_content.encode('utf-8'))
-            temp_file.flush()
-            return temp_file.name, 'text/plain'
-    
-    # The following function was generated by ChatGPT and modified to fit the requirements of the project.
-    def _create_temp_file_from_upload(self, file_obj):
-        """Create a temporary file from an uploaded file"""
+            return io.BytesIO(html_content.encode('utf-8')), 'text/html'
+        return io.BytesIO(text_content.encode('utf-8')), 'text/plain'
+
+    def _stream_from_upload(self, file_obj):
+        """
+        Return the uploaded file itself as the upload stream
+
+        Django's uploaded files are seekable, so the resumable upload reads
+        them one chunk at a time from memory or Django's own spool file.
+        """
         suffix = '.' + file_obj.name.split('.')[-1].lower()
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        for chunk in file_obj.chunks():
-            temp_file.write(chunk)
-        temp_file.flush()
-        
-        # Determine MIME type based on file extension
-        mime_type = self._get_mime_type(suffix)
-        return temp_file.name, mime_type
-    
+        file_obj.seek(0)
+        return file_obj, self._get_mime_type(suffix)
+
     # The following function was generated by ChatGPT and modified to fit the requirements of the project.
     def _get_mime_type(self, suffix):
         """Get MIME type based on file extension"""
@@ -119,86 +185,127 @@ class GoogleDriveService:
         }
         return mime_types.get(suffix, 'application/octet-stream')
     
-    def _upload_file(self, gfile, max_attempts=3):
-        """Upload file with retry logic"""
-        for attempt in range(max_attempts):
-            try:
-                gfile.Upload({'convert': True})
-                return
-            except Exception as upload_error:
-                logger.error("Upload attempt %s failed: %s", attempt + 1, upload_error, exc_info=True)
-                if attempt == max_attempts - 1:
-                    raise
-                time.sleep(2)  # wait before retrying
-    
-    def _convert_to_google_docs(self, gfile):
-        """Convert file to Google Docs format"""
+    def _upload_file(self, title, stream, mime_type, progress=None):
+        """
+        Upload a stream to Drive in resumable chunks, converting it on insert
+
+        At most one chunk (GOOGLE_DRIVE_UPLOAD_CHUNK_SIZE bytes) is held in
+        memory at a time, whatever the size of the file.
+        """
+        service = self._get_service()
+
+        def upload():
+            stream.seek(0)
+            media = MediaIoBaseUpload(
+                stream,
+                mimetype=mime_type,
+                chunksize=settings.GOOGLE_DRIVE_UPLOAD_CHUNK_SIZE,
+                resumable=True
+            )
+            request = service.files().insert(
+                body={'title': title, 'mimeType': mime_type},
+                media_body=media,
+                convert=True,
+                fields=FILE_FIELDS
+            )
+            response = None
+            while response is None:
+                upload_status, response = request.next_chunk()
+                if upload_status is not None and progress:
+                    progress(upload_status.progress())
+            return response
+
+        return with_backoff(upload, description='Upload')
+
+    def _convert_to_google_docs(self, drive_file):
+        """Copy a file Drive did not convert on upload into Google Docs format"""
+        service = self._get_service()
         try:
-            file_id = gfile['id']
-            
-            url = f"https://www.googleapis.com/drive/v2/files/{file_id}/copy"
-            headers = {
-                'Authorization': f'Bearer {self.gauth.credentials.access_token}',
-                'Content-Type': 'application/json'
-            }
-            payload = {
-                'title': gfile['title'],
-                'mimeType': 'application/vnd.google-apps.document'
-            }
-            
-            response = requests.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-            
-            result = response.json()
-            new_file_id = result.get('id')
-            
-            if new_file_id:
-                # Delete original file
-                gfile.Delete()
-                return new_file_id
-                
-            return None
+            return with_backoff(
+                service.files().copy(
+                    fileId=drive_file['id'],
+                    body={'title': drive_file['title'], 'mimeType': GOOGLE_DOC_MIME_TYPE},
+                    fields=FILE_FIELDS
+                ).execute,
+                description='Convert'
+            )
         except Exception as e:
             logger.warning("Failed to convert to Google Docs format: %s", e)
             return None
-    
-    def _set_permissions(self, file_id):
-        """Set file permissions to allow writing"""
+
+    def _set_permissions(self, file_id, delete_file_id=None):
+        """
+        Set file permissions to allow writing
+
+        When an unconverted original has to be removed as well, both calls
+        are sent in a single batch request.
+        """
+        service = self._get_service()
+        permission_request = service.permissions().insert(
+            fileId=file_id,
+            body={'type': 'anyone', 'role': 'writer'},
+            fields='id'
+        )
+
         try:
-            gfile = self.drive.CreateFile({'id': file_id})
-            permission = {
-                'type': 'anyone',
-                'role': 'writer'
-            }
-            gfile.InsertPermission(permission)
+            if delete_file_id is None:
+                with_backoff(permission_request.execute, description='Set permissions')
+                return
+
+            def log_failure(request_id, response, exception):
+                if exception is not None:
+                    logger.error("Batched Drive request %s failed: %s", request_id, exception)
+
+            batch = service.new_batch_http_request(callback=log_failure)
+            batch.add(permission_request, request_id='permission')
+            batch.add(service.files().delete(fileId=delete_file_id), request_id='delete-original')
+            with_backoff(batch.execute, description='Permission batch')
         except Exception as e:
             logger.error("Failed to set permissions: %s", e)
-    
-    def _get_file_url(self, file_id, max_attempts=3):
-        """Get file URL with retry logic"""
-        gfile = self.drive.CreateFile({'id': file_id})
-        
-        for attempt in range(max_attempts):
-            try:
-                time.sleep(1)  # Add a delay before fetching metadata
-                gfile.FetchMetadata(fields='id, webViewLink, webContentLink, alternateLink, embedLink')
-                
-                file_url = (gfile.get('webViewLink') or 
-                          gfile.get('alternateLink') or 
-                          gfile.get('embedLink'))
-                
-                if file_url:
-                    return file_url
-                    
-                # If webViewLink not available, manually construct the URL
-                if gfile.get('id'):
-                    return f"https://docs.google.com/document/d/{gfile.get('id')}/edit"
-                    
-            except Exception as e:
-                logger.error("Error fetching metadata attempt %s: %s", attempt + 1, e)
-                
-                if attempt == max_attempts - 1:
-                    # Last resort - construct URL manually
-                    return f"https://docs.google.com/document/d/{file_id}/edit"
-        
-        return f"https://docs.google.com/document/d/{file_id}/edit"
\ No newline at end of file
+
+    def _get_file_url(self, drive_file):
+        """Return the file's link from the metadata returned by Drive"""
+        file_url = (drive_file.get('webViewLink') or
+                    drive_file.get('alternateLink') or
+                    drive_file.get('embedLink'))
+        if file_url:
+            return file_url
+
+        # If no link was returned, manually construct the URL
+        return f"https://docs.google.com/document/d/{drive_file['id']}/edit"
+
+
+_upload_executor = None
+_upload_executor_lock = threading.Lock()
+
+
+def get_upload_executor():
+    """Return the process-wide pool that runs concurrent Drive uploads"""
+    global _upload_executor
+    with _upload_executor_lock:
+        if _upload_executor is None:
+            _upload_executor = ThreadPoolExecutor(
+                max_workers=settings.GOOGLE_DRIVE_UPLOAD_WORKERS, thread_name_prefix='drive-upload'
+            )
+    return _upload_executor
+
+
+def upload_documents(credentials_json, uploads):
+    """
+    Upload several documents at once on the shared upload pool
+
+    ``uploads`` is a list of dicts of upload_document keyword arguments.
+    Each upload uses its own pooled client, so the total time is close to
+    that of the slowest file rather than the sum. Returns one result per
+    upload, in order: the upload_document result, or the exception raised.
+    """
+    def upload(kwargs):
+        try:
+            with GoogleDriveService(credentials_json) as drive_service:
+                return drive_service.upload_document(**kwargs)
+        except Exception as e:
+            logger.error("Upload of %s failed: %s", kwargs.get('title'), e)
+            return e
+
+    executor = get_upload_executor()
+    return [future.result() for future in [executor.submit(upload, kwargs) for kwargs in uploads]]
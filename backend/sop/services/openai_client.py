@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from collections import defaultdict, deque
+import httpx
+from django.conf import settings
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+from ..helpers.benchmarks import percentile
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_config = None
+_client_lock = threading.Lock()
+
+
+def get_openai_client():
+    """
+    Return the process-wide OpenAI client configured from settings
+
+    All AI views share its connection pool, so back-to-back calls reuse
+    warm keep-alive connections instead of a new TLS handshake each time.
+    """
+    global _client, _client_config
+    config = (
+        settings.OPENAI_API_KEY,
+        settings.OPENAI_BASE_URL,
+        settings.OPENAI_MAX_CONNECTIONS,
+        settings.OPENAI_KEEPALIVE_EXPIRY,
+        settings.OPENAI_MAX_RETRIES,
+    )
+    with _client_lock:
+        if _client is None or _client_config != config:
+            api_key, base_url, max_connections, keepalive_expiry, max_retries = config
+            http_client = DefaultHttpxClient(limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=keepalive_expiry,
+            ))
+            _client = OpenAI(api_key=api_key, base_url=base_url, max_retries=max_retries, http_client=http_client)
+            _client_config = config
+        return _client
+
+
+# Async clients are bound to the event loop their connections were opened on
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_openai_client():
+    """
+    Return the async OpenAI client for the running event loop
+
+    Under ASGI there is one loop per process, so all async views share one
+    client. Its pool is sized by OPENAI_ASYNC_MAX_CONNECTIONS, since every
+    in-flight completion holds a connection but no thread.
+    """
+    config = (
+        settings.OPENAI_API_KEY,
+        settings.OPENAI_BASE_URL,
+        settings.OPENAI_ASYNC_MAX_CONNECTIONS,
+        settings.OPENAI_KEEPALIVE_EXPIRY,
+        settings.OPENAI_MAX_RETRIES,
+    )
+    loop = asyncio.get_running_loop()
+    cached = _async_clients.get(loop)
+    if cached is None or cached[0] != config:
+        api_key, base_url, max_connections, keepalive_expiry, max_retries = config
+        http_client = DefaultAsyncHttpxClient(limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        ))
+        cached = (config, AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=max_retries, http_client=http_client))
+        _async_clients[loop] = cached
+    return cached[1]
+
+
+def reset_openai_client():
+    """Drop the shared clients so the next call builds new ones"""
+    global _client, _client_config
+    with _client_lock:
+        _client = None
+        _client_config = None
+        _async_clients.clear()
+
+
+def get_timeout(endpoint):
+    """Timeout for one AI endpoint; the read timeout also bounds gaps in a stream"""
+    return httpx.Timeout(settings.OPENAI_TIMEOUTS[endpoint], connect=settings.OPENAI_CONNECT_TIMEOUT)
+
+
+class LatencyRecorder:
+    """Recent upstream latencies per endpoint, kept per process"""
+
+    def __init__(self, samples=1000):
+        self._latencies = defaultdict(lambda: deque(maxlen=samples))
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        with self._lock:
+            self._latencies[endpoint].append(seconds)
+
+    def stats(self):
+        with self._lock:
+            latencies = {endpoint: list(values) for endpoint, values in self._latencies.items() if values}
+        return {
+            endpoint: {
+                'count': len(values),
+                'p50_ms': percentile(values, 50) * 1000,
+                'p95_ms': percentile(values, 95) * 1000,
+            }
+            for endpoint, values in latencies.items()
+        }
+
+    def clear(self):
+        with self._lock:
+            self._latencies.clear()
+
+
+openai_latency = LatencyRecorder()
+
+
+def create_completion(endpoint, **params):
+    """
+    Run a chat completion for an AI endpoint on the shared client
+
+    Applies the endpoint's timeout and records the upstream latency. For
+    a streamed completion that is the time until the stream starts.
+    """
+    client = get_openai_client()
+    started = time.perf_counter()
+    try:
+        return client.chat.completions.create(timeout=get_timeout(endpoint), **params)
+    finally:
+        elapsed = time.perf_counter() - started
+        openai_latency.record(endpoint, elapsed)
+        logger.info("OpenAI %s call took %.0f ms", endpoint, elapsed * 1000)
+
+
+async def acreate_completion(endpoint, **params):
+    """Async version of ``create_completion`` on the async client"""
+    client = get_async_openai_client()
+    started = time.perf_counter()
+    try:
+        return await client.chat.completions.create(timeout=get_timeout(endpoint), **params)
+    finally:
+        elapsed = time.perf_counter() - started
+        openai_latency.record(endpoint, elapsed)
+        logger.info("OpenAI %s call took %.0f ms", endpoint, elapsed * 1000)
@@ -0,0 +1,219 @@
+import asyncio
+import html
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.utils.html import strip_tags
+from .openai_client import acreate_completion, create_completion
+
+logger = logging.getLogger(__name__)
+
+# Where a new section starts: an HTML or Markdown heading, or a line naming one of the SOP sections
+SECTION_START = re.compile(
+    r'(?=<h[1-6][\s>])'
+    r'|^(?=#{1,6}\s)'
+    r'|^(?=(?:\d+\.?\s*)?(?:Title|Purpose|Scope|Responsibilities|Definitions|Procedures?|References)\b)',
+    re.IGNORECASE | re.MULTILINE,
+)
+BLOCK_END = re.compile(r'</(?:p|div|li|tr|h[1-6])>|<br\s*/?>', re.IGNORECASE)
+NON_TEXT = re.compile(r'<(style|script|head)[^>]*>.*?</\1>', re.IGNORECASE | re.DOTALL)
+
+SECTION_PROMPT = (
+    "This is one section of a longer Standard Operating Procedure. Summarise it clearly and concisely, "
+    "keeping any responsibilities, steps and requirements it states."
+)
+MERGE_PROMPT = (
+    "These are summaries of consecutive sections of one Standard Operating Procedure. Combine them into "
+    "a single clear and concise summary of the whole SOP."
+)
+
+
+def estimate_tokens(text):
+    """Rough token count for English text (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+def to_text(fragment):
+    """Plain text of an HTML fragment, one line per block, without styles or markup"""
+    text = BLOCK_END.sub('\n', NON_TEXT.sub('', fragment))
+    text = html.unescape(strip_tags(text))
+    lines = (' '.join(line.split()) for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def split_sections(content, max_tokens=None):
+    """
+    Split SOP content into sections of at most ``max_tokens``
+
+    Splits on the SOP headings first, then splits sections that are still
+    too long on line boundaries (or, for a single huge line, anywhere),
+    and packs neighbouring short sections together so no call is wasted
+    on a heading alone. Returns plain-text sections in document order.
+    """
+    max_tokens = max_tokens or settings.OPENAI_SUMMARY_SECTION_TOKENS
+    max_chars = max_tokens * 4
+    pieces = []
+    for part in SECTION_START.split(content):
+        text = to_text(part)
+        if not text:
+            continue
+        if len(text) <= max_chars:
+            pieces.append(text)
+            continue
+        for line in text.splitlines():
+            pieces.extend(line[start:start + max_chars] for start in range(0, len(line), max_chars))
+
+    sections = []
+    for piece in pieces:
+        if sections and len(sections[-1]) + 1 + len(piece) <= max_chars:
+            sections[-1] += '\n' + piece
+        else:
+            sections.append(piece)
+    return sections
+
+
+def section_params(section):
+    return dict(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": SECTION_PROMPT},
+            {"role": "user", "content": section},
+        ],
+        max_tokens=settings.OPENAI_SUMMARY_SECTION_MAX_TOKENS,
+    )
+
+
+def join_partials(partials):
+    """The partial summaries as one numbered text"""
+    return '\n\n'.join(f"Section {n}:\n{partial}" for n, partial in enumerate(partials, start=1))
+
+
+def merge_params(partials, max_tokens):
+    """Parameters of a pass that merges section summaries"""
+    return dict(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": MERGE_PROMPT},
+            {"role": "user", "content": join_partials(partials)},
+        ],
+        max_tokens=max_tokens,
+    )
+
+
+def merge_batches(partials):
+    """
+    Group consecutive partial summaries into batches that fit in one section
+
+    Every batch holds at least two summaries, so each round of merging
+    at least halves their number.
+    """
+    max_tokens = settings.OPENAI_SUMMARY_SECTION_TOKENS
+    batches = []
+    for partial in partials:
+        if batches and (len(batches[-1]) == 1 or estimate_tokens(join_partials(batches[-1] + [partial])) <= max_tokens):
+            batches[-1].append(partial)
+        else:
+            batches.append([partial])
+    # A summary left on its own joins the batch before it
+    if len(batches) > 1 and len(batches[-1]) == 1:
+        batches[-2].extend(batches.pop())
+    return batches
+
+
+def needs_merging(partials):
+    """Whether the partial summaries are still too long for the final pass"""
+    return len(partials) > 1 and estimate_tokens(join_partials(partials)) > settings.OPENAI_SUMMARY_SECTION_TOKENS
+
+
+_summary_executor = None
+_summary_executor_lock = threading.Lock()
+
+
+def get_summary_executor():
+    """Return the process-wide pool that summarises sections concurrently"""
+    global _summary_executor
+    with _summary_executor_lock:
+        if _summary_executor is None:
+            _summary_executor = ThreadPoolExecutor(
+                max_workers=settings.OPENAI_SUMMARY_WORKERS, thread_name_prefix='sop-summary'
+            )
+    return _summary_executor
+
+
+def run_completions(calls):
+    """Run every completion at once on the summary pool; returns their contents in order"""
+    def complete(params):
+        return create_completion('summarise', **params).choices[0].message.content
+
+    executor = get_summary_executor()
+    return [future.result() for future in [executor.submit(complete, params) for params in calls]]
+
+
+async def arun_completions(calls):
+    """Async version of ``run_completions``, with at most OPENAI_SUMMARY_WORKERS calls in flight"""
+    semaphore = asyncio.Semaphore(settings.OPENAI_SUMMARY_WORKERS)
+
+    async def complete(params):
+        async with semaphore:
+            completion = await acreate_completion('summarise', **params)
+        return completion.choices[0].message.content
+
+    return await asyncio.gather(*(complete(params) for params in calls))
+
+
+def summarise_sections(sections):
+    """
+    Summarise every section at once, merging the summaries in batches
+    until they fit in the final pass
+    """
+    partials = run_completions([section_params(section) for section in sections])
+    while needs_merging(partials):
+        max_tokens = settings.OPENAI_SUMMARY_SECTION_MAX_TOKENS
+        partials = run_completions([merge_params(batch, max_tokens) for batch in merge_batches(partials)])
+    return partials
+
+
+async def asummarise_sections(sections):
+    """Async version of ``summarise_sections`` on the async client"""
+    partials = await arun_completions([section_params(section) for section in sections])
+    while needs_merging(partials):
+        max_tokens = settings.OPENAI_SUMMARY_SECTION_MAX_TOKENS
+        partials = await arun_completions([merge_params(batch, max_tokens) for batch in merge_batches(partials)])
+    return partials
+
+
+def single_pass_params(text, params):
+    """``params`` with the content replaced by its plain text, which fits in one call once markup is gone"""
+    return dict(params, messages=params['messages'][:-1] + [{"role": "user", "content": text}])
+
+
+def map_reduce_params(content, params):
+    """
+    Return the completion parameters that summarise ``content``
+
+    Content that fits in one section keeps the single-pass ``params``
+    (with markup removed if that is what made it too long). Longer
+    content is split on its headings and the sections summarised
+    concurrently; the returned parameters are those of the final pass
+    merging the partial summaries.
+    """
+    if estimate_tokens(content) <= settings.OPENAI_SUMMARY_SECTION_TOKENS:
+        return params
+    sections = split_sections(content)
+    if len(sections) == 1:
+        return single_pass_params(sections[0], params)
+    logger.info("Summarising SOP in %d sections", len(sections))
+    return merge_params(summarise_sections(sections), params['max_tokens'])
+
+
+async def amap_reduce_params(content, params):
+    """Async version of ``map_reduce_params``"""
+    if estimate_tokens(content) <= settings.OPENAI_SUMMARY_SECTION_TOKENS:
+        return params
+    sections = split_sections(content)
+    if len(sections) == 1:
+        return single_pass_params(sections[0], params)
+    logger.info("Summarising SOP in %d sections", len(sections))
+    return merge_params(await asummarise_sections(sections), params['max_tokens'])
@@ -0,0 +1,121 @@
+import datetime
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from ..models import Document, UploadJob
+from .drive_credentials import refresh_credential
+from .google_drive_service import GoogleDriveService
+
+logger = logging.getLogger(__name__)
+
+# Share of the progress bar covered by sending bytes; the rest is conversion and bookkeeping
+UPLOAD_PROGRESS_START = 5
+UPLOAD_PROGRESS_END = 85
+
+_local_executor = None
+
+
+def get_local_executor():
+    """Return the thread pool that runs jobs when UPLOAD_JOB_BACKEND is "local" """
+    global _local_executor
+    if _local_executor is None:
+        _local_executor = ThreadPoolExecutor(
+            max_workers=settings.UPLOAD_JOB_WORKERS, thread_name_prefix='upload-job'
+        )
+    return _local_executor
+
+
+def _run_in_thread(job_id):
+    try:
+        run_upload_job(job_id)
+    finally:
+        # Worker threads open their own connections; do not leak them
+        connections.close_all()
+
+
+def enqueue_upload_job(job):
+    """Hand the job to the configured backend once its row is committed"""
+    job_id = str(job.pk)
+
+    def submit():
+        if settings.UPLOAD_JOB_BACKEND == 'celery':
+            from ..tasks import process_upload_job
+            process_upload_job.delay(job_id)
+        else:
+            get_local_executor().submit(_run_in_thread, job_id)
+
+    transaction.on_commit(submit)
+
+
+def run_upload_job(job_id):
+    """
+    Upload a queued job's payload to Drive and create its Document
+
+    The job is claimed with a conditional UPDATE, so a job delivered twice
+    (e.g. a Celery redelivery) is only processed once. Progress reports
+    double as a heartbeat: a running job that has not reported for
+    ``UPLOAD_JOB_STALE_AFTER`` seconds was left by a crashed worker and
+    may be claimed again.
+    """
+    now = timezone.now()
+    stale = now - datetime.timedelta(seconds=settings.UPLOAD_JOB_STALE_AFTER)
+    claimed = UploadJob.objects.filter(
+        Q(status=UploadJob.Status.QUEUED) | Q(status=UploadJob.Status.RUNNING, updated_at__lt=stale),
+        pk=job_id,
+    ).update(status=UploadJob.Status.RUNNING, progress=UPLOAD_PROGRESS_START, updated_at=now)
+    if not claimed:
+        logger.info("Upload job %s is not queued, skipping", job_id)
+        return
+    job = UploadJob.objects.get(pk=job_id)
+    last_progress = [UPLOAD_PROGRESS_START]
+
+    def report(fraction):
+        percent = UPLOAD_PROGRESS_START + int(fraction * (UPLOAD_PROGRESS_END - UPLOAD_PROGRESS_START))
+        if percent > last_progress[0]:
+            last_progress[0] = percent
+            UploadJob.objects.filter(pk=job.pk).update(progress=percent, updated_at=timezone.now())
+
+    update_fields = []
+    try:
+        # The owner's stored credentials, refreshed here if the job waited past the token's expiry
+        credential = refresh_credential(job.owner_id, margin=0, wait=True)
+        if credential is None:
+            raise ValueError("Not authenticated with Google Drive.")
+        with GoogleDriveService(credential.credentials) as drive_service:
+            if job.file:
+                with job.file.open('rb') as file_obj:
+                    result = drive_service.upload_document(title=job.title, file_obj=file_obj, progress=report)
+            else:
+                result = drive_service.upload_document(
+                    title=job.title,
+                    text_content=job.text_content,
+                    content_type=job.content_type,
+                    progress=report
+                )
+
+        with transaction.atomic():
+            job.document = Document.objects.create(
+                title=job.title,
+                file_url=result['file_url'],
+                google_drive_file_id=result['file_id'],
+                owner_id=job.owner_id,
+                team_id=job.team_id,
+                review_date=job.review_date
+            )
+        job.status = UploadJob.Status.SUCCEEDED
+        job.progress = 100
+        update_fields = ['status', 'progress', 'document']
+    except Exception as e:
+        logger.error("Upload job %s failed: %s", job.pk, e, exc_info=True)
+        job.status = UploadJob.Status.FAILED
+        job.error = str(e)
+        # Keep the progress last reported rather than the value loaded at the start
+        update_fields = ['status', 'error']
+    finally:
+        # The payload is only needed while the job runs
+        if job.file:
+            job.file.delete(save=False)
+        job.save(update_fields=update_fields + ['file', 'updated_at'])
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .helpers.permission_helpers import bump_membership_version
+from .models import UserAccount, Team, TeamMembership
+
+
+@receiver([post_save, post_delete], sender=TeamMembership)
+def membership_changed(sender, instance, **kwargs):
+    """Invalidate the member's cached roles when a membership changes"""
+    bump_membership_version(instance.user_id)
+
+
+@receiver(post_save, sender=Team)
+def team_saved(sender, instance, created, **kwargs):
+    """Invalidate cached roles of every member when a team changes"""
+    # Deleting a team cascades to its memberships, which send their own post_delete
+    if not created:
+        bump_membership_version(*instance.team_memberships.values_list('user_id', flat=True))
+
+
+@receiver(post_save, sender=UserAccount)
+def user_created(sender, instance, created, **kwargs):
+    """Start new users on a fresh version so no stale entry can match"""
+    if created:
+        bump_membership_version(instance.pk)
@@ -0,0 +1,8 @@
+from celery import shared_task
+from .services.upload_jobs import run_upload_job
+
+
+@shared_task
+def process_upload_job(job_id):
+    """Celery entry point for background document uploads"""
+    run_upload_job(job_id)
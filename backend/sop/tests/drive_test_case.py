@@ -0,0 +1,33 @@
+from django.test import override_settings
+
+from sop.helpers.benchmarks import fake_credentials
+from sop.helpers.fake_drive import FakeDriveServer
+from sop.services.drive_clients import drive_client_pool
+
+
+class FakeDriveMixin:
+    """
+    Test case mixin that points the Drive clients at a fresh FakeDriveServer
+
+    Sets ``self.drive`` and ``self.credentials``. Subclasses may set
+    ``drive_latency`` and extra ``drive_settings`` to override.
+    """
+    drive_latency = 0.0
+    drive_settings = {}
+
+    def setUp(self):
+        super().setUp()
+        drive_client_pool.clear()
+        self.addCleanup(drive_client_pool.clear)
+        self.drive = FakeDriveServer(latency=self.drive_latency).start()
+        self.addCleanup(self.drive.stop)
+        settings_override = override_settings(GOOGLE_DRIVE_API_BASE_URL=self.drive.url, **self.drive_settings)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.credentials = fake_credentials()
+
+    def sign_in_to_drive(self, client):
+        """Store the fake credentials in the client's session, as the Drive OAuth callback does"""
+        session = client.session
+        session['google_drive_credentials'] = self.credentials
+        session.save()
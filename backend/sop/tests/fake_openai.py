@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIServer:
+    """
+    In-process stand-in for the OpenAI chat completions endpoint
+
+    Answers every completion with ``Summary <n>`` (n counting requests),
+    streamed as two chunks when the request asks for a stream. Each
+    response is delayed by ``latency`` seconds; requests, TCP connections
+    and the peak number of requests in flight are counted.
+
+        with FakeOpenAIServer(latency=0.5) as server:
+            settings.OPENAI_BASE_URL = server.url
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self.make_handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with server.lock:
+                    server.connections += 1
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with server.lock:
+                    server.requests += 1
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                    text = f'Summary {server.requests}'
+                try:
+                    time.sleep(server.latency)
+                    if request.get('stream'):
+                        self.send_stream(text)
+                    else:
+                        self.send_completion(text)
+                finally:
+                    with server.lock:
+                        server.in_flight -= 1
+
+            def send_completion(self, text):
+                self.send_body('application/json', json.dumps({
+                    'id': 'chatcmpl-1', 'object': 'chat.completion', 'created': 0, 'model': 'gpt-4o',
+                    'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': text}}],
+                }).encode())
+
+            def send_stream(self, text):
+                events = []
+                for part in text.split(' ', 1):
+                    events.append('data: ' + json.dumps({
+                        'id': 'chatcmpl-1', 'object': 'chat.completion.chunk', 'created': 0, 'model': 'gpt-4o',
+                        'choices': [{'index': 0, 'finish_reason': None, 'delta': {'content': part + ' '}}],
+                    }) + '\n\n')
+                events.append('data: [DONE]\n\n')
+                self.send_body('text/event-stream', ''.join(events).encode())
+
+            def send_body(self, content_type, body):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
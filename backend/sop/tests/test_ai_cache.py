@@ -0,0 +1,183 @@
+from unittest.mock import MagicMock, patch
+
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from sop.models import UserAccount
+from sop.services.ai_cache import DjangoAICache, LocMemAICache, get_ai_cache
+from sop.services.openai_client import openai_latency, reset_openai_client
+from sop.tests.test_ai_streaming import FakeStream, chunk, parse_events
+
+PARAMS = {'model': 'gpt-4o', 'messages': [{'role': 'user', 'content': 'SOP'}], 'max_tokens': 300}
+
+
+class AICompletionCacheTests(SimpleTestCase):
+    """Completion cache backends"""
+
+    def test_key_covers_model_prompt_and_parameters(self):
+        ai_cache = LocMemAICache(timeout=60, max_entries=10)
+        ai_cache.set(PARAMS, 'Summary')
+
+        self.assertEqual(ai_cache.get(dict(PARAMS)), 'Summary')
+        self.assertIsNone(ai_cache.get(dict(PARAMS, model='gpt-4o-mini')))
+        self.assertIsNone(ai_cache.get(dict(PARAMS, max_tokens=500)))
+        self.assertIsNone(ai_cache.get(dict(PARAMS, messages=[{'role': 'user', 'content': 'SOP v2'}])))
+        self.assertEqual(ai_cache.stats(), {'hits': 1, 'misses': 3, 'hit_rate': 0.25, 'entries': 1})
+
+    @patch('sop.services.ai_cache.time.monotonic')
+    def test_entries_expire(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        ai_cache = LocMemAICache(timeout=60, max_entries=10)
+        ai_cache.set(PARAMS, 'Summary')
+
+        mock_monotonic.return_value = 159
+        self.assertEqual(ai_cache.get(PARAMS), 'Summary')
+        mock_monotonic.return_value = 160
+        self.assertIsNone(ai_cache.get(PARAMS))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        ai_cache = LocMemAICache(timeout=60, max_entries=2)
+        first, second, third = (dict(PARAMS, max_tokens=n) for n in (1, 2, 3))
+        ai_cache.set(first, 'first')
+        ai_cache.set(second, 'second')
+        ai_cache.get(first)
+        ai_cache.set(third, 'third')
+
+        self.assertEqual(ai_cache.get(first), 'first')
+        self.assertIsNone(ai_cache.get(second))
+        self.assertEqual(ai_cache.get(third), 'third')
+
+    def test_django_backend_uses_the_configured_cache(self):
+        ai_cache = DjangoAICache(timeout=60, alias='default')
+        ai_cache.set(PARAMS, 'Shared summary')
+
+        self.assertEqual(DjangoAICache(timeout=60, alias='default').get(PARAMS), 'Shared summary')
+
+    def test_django_backend_counts_are_shared(self):
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+        DjangoAICache(timeout=60, alias='default').get(PARAMS)
+        worker = DjangoAICache(timeout=60, alias='default')
+        worker.set(PARAMS, 'Shared summary')
+        async_to_sync(worker.aget)(PARAMS)
+
+        stats = DjangoAICache(timeout=60, alias='default').stats()
+        self.assertEqual(stats, {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    @override_settings(AI_CACHE_BACKEND='django')
+    def test_backend_follows_settings(self):
+        self.assertIsInstance(get_ai_cache(), DjangoAICache)
+
+
+@patch('sop.services.openai_client.OpenAI')
+class CachedCompletionViewTests(TestCase):
+    """Summaries and improvements served from the completion cache"""
+
+    def setUp(self):
+        get_ai_cache().clear()
+        reset_openai_client()
+        self.addCleanup(reset_openai_client)
+        self.user = UserAccount.objects.create_user(email='owner@example.com', password='testpassword', name='Owner')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def use_completion(self, mock_openai, text):
+        completion = MagicMock()
+        completion.choices = [MagicMock(message=MagicMock(content=text))]
+        mock_openai.return_value.chat.completions.create.return_value = completion
+        return mock_openai.return_value.chat.completions.create
+
+    def test_repeated_summary_calls_openai_once(self, mock_openai):
+        create = self.use_completion(mock_openai, 'Summary')
+        url = reverse('summarise_sop')
+
+        first = self.client.post(url, {'content': 'Unchanged SOP'}, format='json')
+        second = self.client.post(url, {'content': 'Unchanged SOP'}, format='json')
+
+        self.assertEqual((first['X-AI-Cache'], second['X-AI-Cache']), ('miss', 'hit'))
+        self.assertEqual(second.data, {'summary': 'Summary'})
+        create.assert_called_once()
+
+    def test_changed_content_misses(self, mock_openai):
+        create = self.use_completion(mock_openai, 'Improved')
+        url = reverse('improve_sop')
+
+        self.client.post(url, {'content': 'Version 1'}, format='json')
+        response = self.client.post(url, {'content': 'Version 2'}, format='json')
+
+        self.assertEqual(response['X-AI-Cache'], 'miss')
+        self.assertEqual(create.call_count, 2)
+
+    def test_refresh_bypasses_and_replaces_cached_completion(self, mock_openai):
+        self.use_completion(mock_openai, 'Old summary')
+        url = reverse('summarise_sop')
+        self.client.post(url, {'content': 'SOP'}, format='json')
+
+        self.use_completion(mock_openai, 'New summary')
+        refreshed = self.client.post(url + '?refresh=true', {'content': 'SOP'}, format='json')
+        cached = self.client.post(url, {'content': 'SOP'}, format='json')
+
+        self.assertEqual(refreshed['X-AI-Cache'], 'bypass')
+        self.assertEqual(refreshed.data, {'summary': 'New summary'})
+        self.assertEqual(cached.data, {'summary': 'New summary'})
+
+    def test_streamed_completion_is_cached_and_replayed(self, mock_openai):
+        create = mock_openai.return_value.chat.completions.create
+        create.return_value = FakeStream([chunk('Step 1. '), chunk('Step 2.')])
+        url = reverse('improve_sop')
+        payload = {'content': 'Draft', 'stream': True}
+
+        b''.join(self.client.post(url, payload, format='json').streaming_content)
+        replay = self.client.post(url, payload, format='json')
+        plain = self.client.post(url, {'content': 'Draft'}, format='json')
+
+        self.assertEqual(replay['X-AI-Cache'], 'hit')
+        self.assertEqual(parse_events(b''.join(replay.streaming_content)), [
+            ('message', {'content': 'Step 1. Step 2.'}),
+            ('done', {}),
+        ])
+        self.assertEqual(plain.data, {'improved': 'Step 1. Step 2.'})
+        create.assert_called_once()
+
+    def test_interrupted_stream_is_not_cached(self, mock_openai):
+        create = mock_openai.return_value.chat.completions.create
+        create.return_value = FakeStream([chunk('partial')], error=Exception('connection reset'))
+        url = reverse('summarise_sop')
+
+        b''.join(self.client.post(url, {'content': 'SOP', 'stream': True}, format='json').streaming_content)
+        response = self.client.post(url, {'content': 'SOP', 'stream': True}, format='json')
+
+        self.assertEqual(response['X-AI-Cache'], 'miss')
+
+
+class AIStatsViewTests(TestCase):
+    """AI usage statistics for staff"""
+
+    def setUp(self):
+        get_ai_cache().clear()
+        openai_latency.clear()
+        self.addCleanup(openai_latency.clear)
+        self.url = reverse('ai_stats')
+        self.client = APIClient()
+
+    def test_staff_see_cache_and_latency_stats(self):
+        misses = get_ai_cache().stats()['misses']
+        get_ai_cache().get(PARAMS)
+        openai_latency.record('summarise', 0.2)
+        staff = UserAccount.objects.create_superuser(email='admin@example.com', password='testpassword', name='Admin')
+        self.client.force_authenticate(user=staff)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['cache']['misses'], misses + 1)
+        self.assertEqual(response.data['openai_latency'], {'summarise': {'count': 1, 'p50_ms': 200.0, 'p95_ms': 200.0}})
+
+    def test_other_users_are_refused(self):
+        user = UserAccount.objects.create_user(email='owner@example.com', password='testpassword', name='Owner')
+        self.client.force_authenticate(user=user)
+
+        self.assertEqual(self.client.get(self.url).status_code, 403)
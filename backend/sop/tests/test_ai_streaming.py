@@ -0,0 +1,124 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from sop.models import UserAccount
+from sop.services.ai_cache import get_ai_cache
+from sop.services.openai_client import reset_openai_client
+
+
+def chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class FakeStream:
+    """Streamed completion yielding the given chunks, optionally failing after them"""
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+        self.closed = False
+
+    def __iter__(self):
+        yield from self.chunks
+        if self.error:
+            raise self.error
+
+    def close(self):
+        self.closed = True
+
+
+def parse_events(body):
+    events = []
+    for block in body.decode().strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields.get('event', 'message'), json.loads(fields['data'])))
+    return events
+
+
+@patch('sop.services.openai_client.OpenAI')
+class AIStreamingTests(TestCase):
+    """Server-sent event streaming of AI completions"""
+
+    def setUp(self):
+        get_ai_cache().clear()
+        reset_openai_client()
+        self.addCleanup(reset_openai_client)
+        self.user = UserAccount.objects.create_user(email='owner@example.com', password='testpassword', name='Owner')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def use_stream(self, mock_openai, stream):
+        mock_openai.return_value.chat.completions.create.return_value = stream
+        return mock_openai.return_value.chat.completions.create
+
+    def test_endpoints_stream_content_deltas(self, mock_openai):
+        for name, payload in [
+            ('generate_sop', {'prompt': 'Create an SOP', 'stream': True}),
+            ('improve_sop', {'content': 'Draft SOP', 'stream': True}),
+            ('summarise_sop', {'content': 'Long SOP', 'stream': True}),
+        ]:
+            with self.subTest(name):
+                stream = FakeStream([chunk('<h1>'), chunk(None), SimpleNamespace(choices=[]), chunk('SOP</h1>')])
+                create = self.use_stream(mock_openai, stream)
+
+                response = self.client.post(reverse(name), payload, format='json')
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response['Content-Type'], 'text/event-stream')
+                self.assertTrue(create.call_args.kwargs['stream'])
+                self.assertEqual(parse_events(b''.join(response.streaming_content)), [
+                    ('message', {'content': '<h1>'}),
+                    ('message', {'content': 'SOP</h1>'}),
+                    ('done', {}),
+                ])
+                self.assertTrue(stream.closed)
+
+    def test_stream_query_parameter(self, mock_openai):
+        self.use_stream(mock_openai, FakeStream([chunk('Summary')]))
+
+        response = self.client.post(reverse('summarise_sop') + '?stream=true', {'content': 'SOP'}, format='json')
+
+        self.assertTrue(response.streaming)
+
+    def test_client_disconnect_closes_upstream_stream(self, mock_openai):
+        stream = FakeStream([chunk('one'), chunk('two'), chunk('three')])
+        self.use_stream(mock_openai, stream)
+
+        response = self.client.post(reverse('improve_sop'), {'content': 'Draft', 'stream': True}, format='json')
+        content = iter(response.streaming_content)
+        next(content)
+        # The server closes the response when the client goes away
+        response.close()
+
+        self.assertTrue(stream.closed)
+
+    def test_upstream_failure_mid_stream_sends_error_event(self, mock_openai):
+        self.use_stream(mock_openai, FakeStream([chunk('partial')], error=Exception('connection reset')))
+
+        response = self.client.post(reverse('generate_sop'), {'prompt': 'SOP', 'stream': True}, format='json')
+
+        events = parse_events(b''.join(response.streaming_content))
+        self.assertEqual(events[-1], ('error', {'error': 'connection reset'}))
+
+    def test_failure_starting_stream_returns_error_status(self, mock_openai):
+        mock_openai.return_value.chat.completions.create.side_effect = Exception('invalid api key')
+
+        response = self.client.post(reverse('generate_sop'), {'prompt': 'SOP', 'stream': True}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def test_without_stream_returns_whole_completion(self, mock_openai):
+        completion = MagicMock()
+        completion.choices = [MagicMock(message=MagicMock(content='Summary'))]
+        create = self.use_stream(mock_openai, completion)
+
+        response = self.client.post(reverse('summarise_sop'), {'content': 'SOP'}, format='json')
+
+        self.assertEqual(response.data, {'summary': 'Summary'})
+        self.assertNotIn('stream', create.call_args.kwargs)
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import time
+
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from sop.models import UserAccount
+from sop.services.ai_cache import get_ai_cache
+from sop.services.openai_client import reset_openai_client
+from sop.tests.fake_openai import FakeOpenAIServer
+from sop.tests.test_ai_streaming import parse_events
+
+
+class AsyncAIViewTests(TestCase):
+    """Async AI endpoints against a fake OpenAI server"""
+
+    LATENCY = 0.3
+
+    def setUp(self):
+        self.server = FakeOpenAIServer(latency=self.LATENCY).start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(OPENAI_API_KEY='test-key', OPENAI_BASE_URL=self.server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_openai_client()
+        self.addCleanup(reset_openai_client)
+        get_ai_cache().clear()
+
+        self.user = UserAccount.objects.create_user(email='owner@example.com', password='testpassword', name='Owner')
+        self.auth_headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        self.client = AsyncClient()
+
+    def post(self, name, data):
+        return self.client.post(
+            reverse(name), json.dumps(data), content_type='application/json', headers=self.auth_headers
+        )
+
+    async def test_concurrent_generations_do_not_wait_for_each_other(self):
+        count = 20
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(
+            self.post('async_generate_sop', {'prompt': f'SOP {n}'}) for n in range(count)
+        ))
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual([response.status_code for response in responses], [200] * count)
+        self.assertEqual(self.server.requests, count)
+        self.assertGreater(self.server.max_in_flight, 1)
+        # Run one after another these would take count * LATENCY
+        self.assertLess(elapsed, count * self.LATENCY / 2)
+
+    async def test_summary_is_cached(self):
+        first = await self.post('async_summarise_sop', {'content': 'Unchanged SOP'})
+        second = await self.post('async_summarise_sop', {'content': 'Unchanged SOP'})
+
+        self.assertEqual(json.loads(second.content), {'summary': 'Summary 1'})
+        self.assertEqual((first['X-AI-Cache'], second['X-AI-Cache']), ('miss', 'hit'))
+        self.assertEqual(self.server.requests, 1)
+
+    async def test_improvement_streams_events(self):
+        response = await self.post('async_improve_sop', {'content': 'Draft', 'stream': True})
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([part async for part in response.streaming_content])
+        self.assertEqual(parse_events(body), [
+            ('message', {'content': 'Summary '}),
+            ('message', {'content': '1 '}),
+            ('done', {}),
+        ])
+
+    async def test_requires_authentication(self):
+        response = await self.client.post(
+            reverse('async_generate_sop'), json.dumps({'prompt': 'SOP'}), content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.server.requests, 0)
+
+    async def test_missing_input(self):
+        response = await self.post('async_summarise_sop', {})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content), {'error': 'No content provided'})
+
+    @override_settings(OPENAI_BASE_URL='http://127.0.0.1:1/v1', OPENAI_MAX_RETRIES=0)
+    async def test_upstream_failure_returns_error(self):
+        response = await self.post('async_generate_sop', {'prompt': 'SOP'})
+
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('OpenAI error', json.loads(response.content)['error'])
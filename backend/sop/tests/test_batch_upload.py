@@ -0,0 +1,82 @@
+import datetime
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from sop.models import Document, Team, TeamMembership, UserAccount
+from sop.services.google_drive_service import GOOGLE_DOC_MIME_TYPE
+from sop.tests.drive_test_case import FakeDriveMixin
+
+
+class BatchUploadTests(FakeDriveMixin, TestCase):
+    """Multi-file uploads against the fake Drive server"""
+
+    LATENCY = 0.1
+    drive_latency = LATENCY
+    drive_settings = {'GOOGLE_DRIVE_MAX_ATTEMPTS': 1}
+
+    def setUp(self):
+        super().setUp()
+
+        self.user = UserAccount.objects.create_user(email='owner@example.com', password='testpassword', name='Owner')
+        self.team = Team.objects.create(name='Team', description='A team', created_by=self.user)
+        TeamMembership.objects.create(user=self.user, team=self.team, role='owner')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.sign_in_to_drive(self.client)
+        self.url = reverse('google_drive_batch_upload')
+
+    def make_files(self, count):
+        return [
+            SimpleUploadedFile(f'procedure-{index}.txt', f'Step {index}'.encode('utf-8'), content_type='text/plain')
+            for index in range(count)
+        ]
+
+    def test_files_upload_concurrently(self):
+        start = time.perf_counter()
+        response = self.client.post(self.url, {
+            'files': self.make_files(5), 'team_id': self.team.id, 'review_date': '2030-06-01'
+        }, format='multipart')
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data['results']], ['created'] * 5)
+        self.assertEqual(response.data['results'][0]['document']['title'], 'procedure-0')
+        # Three round trips per file; run one after another this would take 5x as long
+        self.assertLess(elapsed, 3 * self.LATENCY * 3)
+
+        documents = Document.objects.filter(team=self.team)
+        self.assertEqual(documents.count(), 5)
+        self.assertEqual({document.review_date for document in documents}, {datetime.date(2030, 6, 1)})
+        self.assertEqual(
+            {self.drive.files[document.google_drive_file_id]['mimeType'] for document in documents},
+            {GOOGLE_DOC_MIME_TYPE}
+        )
+
+    def test_each_file_gets_its_own_result(self):
+        self.drive.fail_next(1)
+
+        response = self.client.post(self.url, {
+            'files': self.make_files(3), 'titles': ['First', 'Second', 'Third']
+        }, format='multipart')
+
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(sorted(statuses), ['created', 'created', 'error'])
+        self.assertEqual(Document.objects.count(), 2)
+        created_titles = {r['document']['title'] for r in response.data['results'] if r['status'] == 'created'}
+        self.assertEqual(created_titles, set(Document.objects.values_list('title', flat=True)))
+
+    def test_invalid_requests_are_rejected(self):
+        for data in (
+            {},
+            {'files': self.make_files(2), 'titles': ['Only one']},
+            {'files': self.make_files(1), 'review_date': 'next week'},
+        ):
+            response = self.client.post(self.url, data, format='multipart')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.drive.round_trips, 0)
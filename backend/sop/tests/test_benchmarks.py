@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TransactionTestCase
+
+from sop.helpers.benchmarks import percentile
+from sop.models import Document, Task, UserAccount
+
+
+class BenchmarkIndexesCommandTest(TransactionTestCase):
+    """Smoke test for the index benchmark on a tiny data set"""
+
+    def test_reports_each_query_and_restores_indexes(self):
+        out = StringIO()
+        call_command(
+            'benchmark_indexes', tasks=300, documents=50, teams=5, users=20,
+            repeat=1, stdout=out
+        )
+        output = out.getvalue()
+
+        self.assertIn('open tasks by team and due date', output)
+        self.assertIn('unreminded documents by review date', output)
+        self.assertEqual(Task.objects.count(), 300)
+
+        # Dropped indexes are recreated, so a second run can drop them again
+        call_command('benchmark_indexes', no_seed=True, repeat=1, stdout=StringIO())
+
+
+class BenchmarkDriveUploadCommandTest(SimpleTestCase):
+    """Smoke test for the upload latency benchmark against the fake Drive server"""
+
+    def test_reports_both_pipelines(self):
+        out = StringIO()
+        call_command('benchmark_drive_upload', uploads=2, latency=0, size=1024, legacy_sleep=0, stdout=out)
+        output = out.getvalue()
+
+        self.assertIn('previous', output)
+        self.assertIn('current', output)
+        self.assertIn('p50 speedup', output)
+
+
+class BenchmarkDriveCommandTest(TransactionTestCase):
+    """Smoke test for the Drive benchmark suite against the fake Drive server"""
+
+    def test_reports_each_scenario_and_cleans_up(self):
+        out = StringIO()
+        call_command('benchmark_drive', operations=3, concurrency='1,2', latency=0, size=256, stdout=out)
+        output = out.getvalue()
+
+        for scenario in ('upload', 'content', 'delete'):
+            self.assertIn(scenario, output)
+        self.assertIn('p99 (ms)', output)
+        self.assertFalse(Document.objects.exists())
+        self.assertFalse(UserAccount.objects.filter(email__startswith='bench-drive-').exists())
+
+    def test_rejects_unknown_scenarios(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark_drive', scenarios='rename', stdout=StringIO())
+
+
+class PercentileTest(SimpleTestCase):
+    """Nearest-rank percentiles of benchmark timings"""
+
+    def test_nearest_rank(self):
+        values = [5, 1, 4, 2, 3]
+        self.assertEqual(percentile(values, 50), 3)
+        self.assertEqual(percentile(values, 95), 5)
+        self.assertEqual(percentile(values, 0), 1)
+        self.assertEqual(percentile(list(range(1, 101)), 99), 99)
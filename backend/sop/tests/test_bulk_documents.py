@@ -0,0 +1,127 @@
+import datetime
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from sop.models import Document, Team, TeamMembership, UserAccount
+from sop.services.google_drive_service import GOOGLE_DOC_MIME_TYPE
+from sop.tests.drive_test_case import FakeDriveMixin
+
+
+class BulkDocumentTests(FakeDriveMixin, TestCase):
+    """Bulk delete and update of documents against the fake Drive server"""
+
+    def setUp(self):
+        super().setUp()
+
+        self.owner = UserAccount.objects.create_user(email='owner@example.com', password='testpassword', name='Owner')
+        self.member = UserAccount.objects.create_user(email='member@example.com', password='testpassword', name='Member')
+        self.team = Team.objects.create(name='Team', description='A team', created_by=self.owner)
+        self.other_team = Team.objects.create(name='Other', description='Another team', created_by=self.owner)
+        TeamMembership.objects.create(user=self.owner, team=self.team, role='owner')
+        TeamMembership.objects.create(user=self.owner, team=self.other_team, role='owner')
+        TeamMembership.objects.create(user=self.member, team=self.team, role='member')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.owner)
+        self.sign_in_to_drive(self.client)
+        self.url = reverse('document-bulk')
+
+    def create_documents(self, count, team=None, owner=None):
+        documents = []
+        for index in range(count):
+            drive_file = self.drive.create_file(f'SOP {index}', GOOGLE_DOC_MIME_TYPE)
+            documents.append(Document(
+                title=drive_file['title'], file_url=drive_file['alternateLink'],
+                google_drive_file_id=drive_file['id'], owner=owner or self.owner, team=team
+            ))
+        return Document.objects.bulk_create(documents)
+
+    def test_delete_sends_drive_deletes_in_batches_of_100(self):
+        documents = self.create_documents(150, team=self.team)
+        ids = [document.id for document in documents]
+
+        response = self.client.post(self.url, {'action': 'delete', 'ids': ids}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({result['status'] for result in response.data['results']}, {'deleted'})
+        self.assertEqual(self.drive.calls.count(('POST', '/batch/drive/v2')), 2)
+        self.assertEqual(self.drive.round_trips, 2)
+        self.assertEqual(self.drive.files, {})
+        self.assertFalse(Document.objects.filter(id__in=ids).exists())
+
+    def test_delete_reports_each_document(self):
+        mine = self.create_documents(1, team=self.team)[0]
+        theirs = self.create_documents(1, owner=self.member)[0]
+        gone = self.create_documents(1)[0]
+        # Already removed from Drive, so only the database row is left
+        self.drive.files.pop(gone.google_drive_file_id)
+
+        response = self.client.post(
+            self.url, {'action': 'delete', 'ids': [mine.id, theirs.id, gone.id, 999999]}, format='json'
+        )
+
+        statuses = [(result['id'], result['status']) for result in response.data['results']]
+        self.assertEqual(statuses, [
+            (mine.id, 'deleted'), (theirs.id, 'error'), (gone.id, 'deleted'), (999999, 'error'),
+        ])
+        self.assertEqual(list(Document.objects.values_list('id', flat=True)), [theirs.id])
+        self.assertIn(theirs.google_drive_file_id, self.drive.files)
+
+    def test_member_cannot_delete_others_team_documents(self):
+        document = self.create_documents(1, team=self.team)[0]
+        self.client.force_authenticate(user=self.member)
+
+        response = self.client.post(self.url, {'action': 'delete', 'ids': [document.id]}, format='json')
+
+        self.assertEqual(response.data['results'][0]['status'], 'error')
+        self.assertTrue(Document.objects.filter(id=document.id).exists())
+        self.assertEqual(self.drive.round_trips, 0)
+
+    def test_delete_requires_drive_credentials(self):
+        document = self.create_documents(1)[0]
+        client = APIClient()
+        client.force_authenticate(user=self.owner)
+
+        response = client.post(self.url, {'action': 'delete', 'ids': [document.id]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_update_applies_one_statement(self):
+        documents = self.create_documents(20, team=self.team)
+        ids = [document.id for document in documents]
+        changes = {'review_date': '2030-01-31', 'team': self.other_team.id}
+
+        # Session, team roles, documents, then the UPDATE
+        with self.assertNumQueries(4):
+            response = self.client.post(self.url, {'action': 'update', 'ids': ids, 'changes': changes}, format='json')
+
+        self.assertEqual({result['status'] for result in response.data['results']}, {'updated'})
+        self.assertEqual(
+            set(Document.objects.filter(id__in=ids).values_list('review_date', 'team_id')),
+            {(datetime.date(2030, 1, 31), self.other_team.id)}
+        )
+
+    def test_update_rejects_team_the_user_is_not_in(self):
+        document = self.create_documents(1, owner=self.member)[0]
+        self.client.force_authenticate(user=self.member)
+
+        response = self.client.post(
+            self.url, {'action': 'update', 'ids': [document.id], 'changes': {'team': self.other_team.id}},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIsNone(Document.objects.get(id=document.id).team_id)
+
+    def test_invalid_requests_are_rejected(self):
+        for body in (
+            {'action': 'archive', 'ids': [1]},
+            {'action': 'delete', 'ids': []},
+            {'action': 'update', 'ids': [1], 'changes': {}},
+            {'action': 'update', 'ids': [1], 'changes': {'review_date': 'soon'}},
+        ):
+            response = self.client.post(self.url, body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, body)
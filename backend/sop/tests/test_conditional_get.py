@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from sop.models import UserAccount, Team, TeamMembership, Task, Document
+
+
+class ConditionalGetTests(TestCase):
+    """ETag validators let unchanged polls return 304 without serializing"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.owner = UserAccount.objects.create_user(
+            email='owner@example.com', password='testpass123', name='Owner')
+        self.member = UserAccount.objects.create_user(
+            email='member@example.com', password='testpass123', name='Member')
+        self.team = Team.objects.create(name='Team', created_by=self.owner)
+        TeamMembership.objects.create(user=self.owner, team=self.team, role='owner')
+        self.membership = TeamMembership.objects.create(user=self.member, team=self.team, role='member')
+        self.task = Task.objects.create(
+            description='Task', assigned_to=self.owner, team=self.team,
+            due_date=date.today() + timedelta(days=1))
+        Document.objects.create(
+            title='Doc', file_url='https://docs.google.com/document/d/x',
+            owner=self.owner, team=self.team, review_date=date.today() + timedelta(days=30))
+        self.client.force_authenticate(user=self.owner)
+
+    def get_etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', response)
+        return response['ETag']
+
+    def assert_not_modified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def assert_modified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unchanged_lists_return_304(self):
+        for name in ('task-list', 'document-list', 'team-list', 'task-user-and-team-tasks'):
+            url = reverse(name)
+            self.assert_not_modified(url, self.get_etag(url))
+
+    def test_unchanged_detail_returns_304(self):
+        url = reverse('task-detail', args=[self.task.id])
+        self.assert_not_modified(url, self.get_etag(url))
+
+    def test_not_modified_skips_serialization(self):
+        url = reverse('task-list')
+        etag = self.get_etag(url)
+        # Two aggregate queries replace the list query and the prefetches
+        with self.assertNumQueries(2):
+            self.assert_not_modified(url, etag)
+
+    def test_next_day_changes_etag(self):
+        # days_until_review counts down without the document changing
+        url = reverse('document-list')
+        etag = self.get_etag(url)
+        tomorrow = timezone.now() + timedelta(days=1)
+        with patch('django.utils.timezone.now', return_value=tomorrow):
+            self.assert_modified(url, etag)
+
+    def test_task_update_changes_etag(self):
+        url = reverse('task-list')
+        etag = self.get_etag(url)
+        self.task.status = Task.Status.COMPLETE
+        self.task.save()
+        self.assert_modified(url, etag)
+
+    def test_task_delete_changes_etag(self):
+        Task.objects.create(
+            description='Other', assigned_to=self.owner, team=self.team, due_date=date.today())
+        url = reverse('task-list')
+        etag = self.get_etag(url)
+        self.task.delete()
+        self.assert_modified(url, etag)
+
+    def test_membership_change_changes_etag(self):
+        url = reverse('team-list')
+        etag = self.get_etag(url)
+        self.membership.role = 'admin'
+        self.membership.save()
+        self.assert_modified(url, etag)
+
+    def test_query_string_changes_etag(self):
+        url = reverse('task-list')
+        self.assertNotEqual(self.get_etag(url), self.get_etag(url + '?fields=id'))
+
+    def test_permissions_checked_before_304(self):
+        url = reverse('task-detail', args=[self.task.id])
+        etag = self.get_etag(url)
+        outsider = UserAccount.objects.create_user(
+            email='outsider@example.com', password='testpass123', name='Outsider')
+        self.client.force_authenticate(user=outsider)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
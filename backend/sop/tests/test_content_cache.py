@@ -0,0 +1,143 @@
+import os
+import tempfile
+from unittest.mock import patch, MagicMock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+from rest_framework.test import APIClient
+
+from sop.models import Document, UserAccount
+from sop.services.content_cache import DocumentContentCache
+from sop.services.drive_clients import drive_client_pool
+
+
+class DocumentContentCacheTest(TestCase):
+    """Memory and disk tiers of the exported content cache"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cache = DocumentContentCache(self.directory.name, memory_bytes=1024, disk_bytes=4096)
+
+    def test_entries_are_keyed_by_revision(self):
+        self.cache.set('file', '2024-01-01T00:00:00Z', '<p>v1</p>')
+        self.assertEqual(self.cache.get('file', '2024-01-01T00:00:00Z'), '<p>v1</p>')
+        self.assertIsNone(self.cache.get('file', '2024-02-01T00:00:00Z'))
+
+    def test_disk_tier_survives_memory_loss(self):
+        self.cache.set('file', 'rev', '<p>persisted</p>')
+        self.cache.clear_memory()
+        other_process = DocumentContentCache(self.directory.name)
+        self.assertEqual(other_process.get('file', 'rev'), '<p>persisted</p>')
+
+    def test_identical_content_is_stored_once(self):
+        self.cache.set('a', 'rev', 'same body')
+        self.cache.set('b', 'rev', 'same body')
+        self.assertEqual(len(os.listdir(self.cache.blob_dir)), 1)
+        self.assertEqual(len(os.listdir(self.cache.key_dir)), 2)
+
+    def test_disk_tier_is_size_bounded(self):
+        for index in range(10):
+            self.cache.set(f'file-{index}', 'rev', str(index) * 1000)
+        total = sum(os.path.getsize(os.path.join(self.cache.blob_dir, name))
+                    for name in os.listdir(self.cache.blob_dir))
+        self.assertLessEqual(total, 4096)
+
+        self.cache.clear_memory()
+        self.assertIsNone(self.cache.get('file-0', 'rev'))
+        self.assertEqual(self.cache.get('file-9', 'rev'), '9' * 1000)
+        # Pointers to evicted blobs go with them
+        self.assertEqual(len(os.listdir(self.cache.key_dir)), len(os.listdir(self.cache.blob_dir)))
+
+    def test_blob_directory_is_not_scanned_on_every_set(self):
+        with patch('sop.services.content_cache.os.scandir', wraps=os.scandir) as scandir:
+            for index in range(10):
+                self.cache.set(f'file-{index}', 'rev', str(index) * 1000)
+
+        # The first write counts the tier; later ones only scan once it is over the limit
+        self.assertLess(scandir.call_count, 10)
+
+    def test_memory_tier_is_size_bounded(self):
+        self.cache.set('a', 'rev', 'x' * 600)
+        self.cache.set('b', 'rev', 'y' * 600)
+        self.assertNotIn(self.cache.make_key('a', 'rev'), self.cache._memory)
+        self.assertIn(self.cache.make_key('b', 'rev'), self.cache._memory)
+
+
+class FakeDriveFile(dict):
+    def FetchMetadata(self, fields=None):
+        pass
+
+
+class GoogleDriveFileContentCacheTest(TestCase):
+    """The content view reuses exports of unchanged documents"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings_override = override_settings(DOCUMENT_CONTENT_CACHE_DIR=self.directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        drive_client_pool.clear()
+        self.addCleanup(drive_client_pool.clear)
+
+        self.owner = UserAccount.objects.create_user(email='owner@example.com', password='testpassword', name='Owner')
+        self.document = Document.objects.create(
+            title='Old title', file_url='https://docs.google.com/document/d/abc', google_drive_file_id='abc', owner=self.owner)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.owner)
+        session = self.client.session
+        session['google_drive_credentials'] = '{}'
+        session.save()
+        self.url = reverse('google_drive_file_content', args=[self.document.id])
+
+    @patch('sop.views.export_session.get')
+    @patch('sop.services.drive_clients.OAuth2Credentials')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
+    def test_unchanged_document_is_exported_once(self, mock_auth, mock_drive, mock_credentials, mock_get):
+        mock_drive.return_value.CreateFile.side_effect = lambda metadata: FakeDriveFile(
+            title='New title',
+            mimeType='application/vnd.google-apps.document',
+            modifiedDate='2024-05-01T10:00:00.000Z',
+            exportLinks={'text/html': 'https://export.example/abc'},
+        )
+        mock_get.return_value = MagicMock(text='<p>Body</p>')
+
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.title, 'New title')
+
+        with self.assertNumQueries(3):  # session, document and stored credential lookups; metadata is unchanged
+            second = self.client.get(self.url)
+        self.assertEqual(second.data['content'], '<p>Body</p>')
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('sop.views.export_session.get')
+    @patch('sop.services.drive_clients.OAuth2Credentials')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
+    def test_rename_at_an_older_drive_date_moves_the_list_etag(self, mock_auth, mock_drive, mock_credentials, mock_get):
+        mock_drive.return_value.CreateFile.side_effect = lambda metadata: FakeDriveFile(
+            title='New title',
+            mimeType='application/vnd.google-apps.document',
+            modifiedDate='2020-01-01T00:00:00.000Z',
+            exportLinks={'text/html': 'https://export.example/abc'},
+        )
+        mock_get.return_value = MagicMock(text='<p>Body</p>')
+        list_url = reverse('document-list')
+        etag = self.client.get(list_url)['ETag']
+        previous_update = self.document.updated_at
+
+        self.client.get(self.url)
+
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.drive_modified_at, parse_datetime('2020-01-01T00:00:00.000Z'))
+        self.assertGreater(self.document.updated_at, previous_update)
+        response = self.client.get(list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['title'], 'New title')
@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from sop.models import UserAccount, Team, TeamMembership, Task, Document
+
+
+class DashboardTests(TestCase):
+    """Dashboard figures are aggregated in the database"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserAccount.objects.create_user(
+            email='user@example.com', password='testpass123', name='User')
+        self.other = UserAccount.objects.create_user(
+            email='other@example.com', password='testpass123', name='Other')
+        self.team = Team.objects.create(name='Alpha', created_by=self.user)
+        self.other_team = Team.objects.create(name='Beta', created_by=self.other)
+        TeamMembership.objects.create(user=self.user, team=self.team, role='owner')
+        TeamMembership.objects.create(user=self.other, team=self.other_team, role='owner')
+
+        today = date.today()
+        Task.objects.create(description='Overdue', assigned_to=self.user,
+                            due_date=today - timedelta(days=2))
+        Task.objects.create(description='This week', assigned_to=self.user,
+                            due_date=today + timedelta(days=3), status='in_progress')
+        Task.objects.create(description='Done late', assigned_to=self.user,
+                            due_date=today - timedelta(days=5), status='complete')
+        Task.objects.create(description='Team task', team=self.team, due_date=today + timedelta(days=30))
+        Task.objects.create(description='Hidden', team=self.other_team, due_date=today)
+
+        doc = dict(file_url='https://docs.google.com/document/d/x', owner=self.user)
+        Document.objects.create(title='Due soon', review_date=today + timedelta(days=5), **doc)
+        Document.objects.create(title='Overdue', review_date=today - timedelta(days=1), team=self.team, **doc)
+        Document.objects.create(title='Later', review_date=today + timedelta(days=60), **doc)
+
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('dashboard')
+
+    def test_dashboard_counts(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        personal = response.data['tasks']['personal']
+        self.assertEqual(personal['total'], 3)
+        self.assertEqual(personal['not_started'], 1)
+        self.assertEqual(personal['in_progress'], 1)
+        self.assertEqual(personal['complete'], 1)
+        self.assertEqual(personal['overdue'], 1)
+        self.assertEqual(personal['due_this_week'], 1)
+
+        teams = response.data['tasks']['teams']
+        self.assertEqual(len(teams), 1)
+        self.assertEqual(teams[0]['team_name'], 'Alpha')
+        self.assertEqual(teams[0]['total'], 1)
+
+        documents = response.data['documents']
+        self.assertEqual(documents['total'], 3)
+        self.assertEqual(documents['review_due'], 1)
+        self.assertEqual(documents['review_overdue'], 1)
+
+        self.assertEqual(response.data['teams'], {'total': 1, 'owned': 1})
+
+    def test_review_window_is_configurable(self):
+        response = self.client.get(self.url, {'review_days': 90})
+        self.assertEqual(response.data['documents']['review_due'], 2)
+        self.assertEqual(response.data['documents']['review_window_days'], 90)
+
+        response = self.client.get(self.url, {'review_days': 'soon'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_review_window_out_of_range_is_rejected(self):
+        for value in (-1, 366, 99999999999):
+            response = self.client.get(self.url, {'review_days': value})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -4,16 +4,22 @@ from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, PropertyMock
 import datetime
 import json
 
 from sop.models import Document, Team, TeamMembership, UserAccount
+from sop.services.ai_cache import get_ai_cache
+from sop.services.google_drive_service import GOOGLE_DOC_MIME_TYPE
+from sop.services.openai_client import reset_openai_client
 
 class DocumentManagementTest(TestCase):
     """Tests for document management with mocked Google Drive services"""
 
     def setUp(self):
+        get_ai_cache().clear()
+        reset_openai_client()
+        self.addCleanup(reset_openai_client)
         self.owner = UserAccount.objects.create_user(email='owner@example.com', password='testpassword', name='Team Owner')
         self.member = UserAccount.objects.create_user(email='member@example.com', password='testpassword', name='Team Member')
         self.admin = UserAccount.objects.create_user(email='admin@example.com', password='testpassword', name='Team Admin')
@@ -31,8 +37,8 @@ class DocumentManagementTest(TestCase):
         self.client = APIClient()
 
 
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
     def test_list_documents(self, mock_google_auth, mock_google_drive):
         self.client.force_authenticate(user=self.owner)
         url = reverse('document-list')
@@ -40,8 +46,8 @@ class DocumentManagementTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 2)
 
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
     def test_team_member_can_view_team_documents(self, mock_google_auth, mock_google_drive):
         self.client.force_authenticate(user=self.member)
         url = reverse('document-list')
@@ -50,8 +56,8 @@ class DocumentManagementTest(TestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['id'], self.team_doc.id)
 
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
     def test_admin_can_view_team_documents(self, mock_google_auth, mock_google_drive):
         self.client.force_authenticate(user=self.admin)
         url = reverse('document-list')
@@ -59,8 +65,8 @@ class DocumentManagementTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
 
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
     def test_non_member_cannot_view_team_documents(self, mock_google_auth, mock_google_drive):
         self.client.force_authenticate(user=self.non_member)
         url = reverse('document-list')
@@ -68,29 +74,29 @@ class DocumentManagementTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 0)
 
-    @patch('sop.views.requests.post')
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
-    def test_create_document(self, mock_google_auth, mock_drive_instance, mock_requests_post):
-        # Set up the Google Drive mock
-        drive_instance = MagicMock()
-        mock_drive_instance.return_value = drive_instance
-        mock_file = MagicMock()
-        # Ensure index access returns a plain string if needed
-        mock_file.__getitem__.return_value = "new_file_id"
-        # Configure the .get() method to return a plain URL for webViewLink
-        def fake_get(key):
-            if key == 'webViewLink':
-                return "https://docs.google.com/document/d/converted_file_id/edit"
-            return None
-        mock_file.get.side_effect = fake_get
-        drive_instance.CreateFile.return_value = mock_file
-
-        # Simulate a successful conversion via requests.post
-        mock_response = MagicMock()
-        mock_response.json.return_value = {"id": "converted_file_id"}
-        mock_response.raise_for_status.return_value = None
-        mock_requests_post.return_value = mock_response
+    def test_list_documents_with_sparse_fields(self):
+        self.client.force_authenticate(user=self.owner)
+        url = reverse('document-list') + '?fields=id,title,review_date'
+        # Two conditional GET aggregates plus the list query, without owner/team joins
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {'id', 'title', 'review_date'})
+
+    @patch('sop.services.drive_clients.DriveClient.service', new_callable=PropertyMock)
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
+    def test_create_document(self, mock_google_auth, mock_google_drive, mock_service):
+        # The upload goes through the pooled client's Drive API service
+        service = MagicMock()
+        mock_service.return_value = service
+        insert_request = service.files.return_value.insert.return_value
+        insert_request.next_chunk.return_value = (None, {
+            'id': 'converted_file_id',
+            'title': 'New Test Document',
+            'mimeType': GOOGLE_DOC_MIME_TYPE,
+            'webViewLink': 'https://docs.google.com/document/d/converted_file_id/edit',
+        })
 
         self.client.force_authenticate(user=self.owner)
 
@@ -122,13 +128,16 @@ class DocumentManagementTest(TestCase):
         response = self.client.post(url, document_data, format='multipart')
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertTrue(Document.objects.filter(title='New Test Document').exists())
-        self.assertEqual(drive_instance.CreateFile.call_count, 2)
-        mock_file.Upload.assert_called_once()
+        document = Document.objects.get(title='New Test Document')
+        self.assertEqual(document.google_drive_file_id, 'converted_file_id')
+        # Converted by the upload itself, so no copy is needed
+        self.assertTrue(service.files.return_value.insert.call_args.kwargs['convert'])
+        service.files.return_value.copy.assert_not_called()
+        service.permissions.return_value.insert.return_value.execute.assert_called_once()
 
 
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
     def test_delete_document(self, mock_google_auth, mock_google_drive):
         mock_drive_instance = MagicMock()
         mock_google_drive.return_value = mock_drive_instance
@@ -144,8 +153,8 @@ class DocumentManagementTest(TestCase):
         self.assertFalse(Document.objects.filter(id=self.team_doc.id).exists())
         mock_file.Delete.assert_called_once()
 
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
     def test_member_cannot_delete_team_document(self, mock_google_auth, mock_google_drive):
         self.client.force_authenticate(user=self.member)
         url = reverse('document-delete', args=[self.team_doc.id])
@@ -153,8 +162,8 @@ class DocumentManagementTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertTrue(Document.objects.filter(id=self.team_doc.id).exists())
 
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
     def test_admin_cannot_delete_team_document(self, mock_google_auth, mock_google_drive):
         self.client.force_authenticate(user=self.admin)
         url = reverse('document-delete', args=[self.team_doc.id])
@@ -162,9 +171,9 @@ class DocumentManagementTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertTrue(Document.objects.filter(id=self.team_doc.id).exists())
 
-    @patch('sop.views.OpenAI')
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
+    @patch('sop.services.openai_client.OpenAI')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
     def test_generate_sop(self, mock_google_auth, mock_google_drive, mock_openai):
         # Create a dummy OpenAI instance with a chat.completions.create method
         dummy_response = MagicMock()
@@ -215,9 +224,9 @@ class DocumentManagementTest(TestCase):
         self.assertIn('<h1>Generated SOP</h1>', response.data.get('sop', ''))
 
 
-    @patch('sop.views.OpenAI')
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
+    @patch('sop.services.openai_client.OpenAI')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
     def test_summarise_sop(self, mock_google_auth, mock_google_drive, mock_openai):
         # Create a dummy OpenAI instance
         dummy_response = MagicMock()
@@ -262,9 +271,9 @@ class DocumentManagementTest(TestCase):
         self.assertEqual(response.data['summary'], 'This is a summarized version of the document.')
 
 
-    @patch('sop.views.OpenAI')
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
+    @patch('sop.services.openai_client.OpenAI')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
     def test_improve_sop(self, mock_google_auth, mock_google_drive, mock_openai):
         # Create a dummy OpenAI instance
         dummy_response = MagicMock()
@@ -311,8 +320,8 @@ class DocumentManagementTest(TestCase):
         dummy_openai_instance.chat.completions.create.assert_called_once()
         self.assertIn('<h1>Improved Document</h1>', response.data.get('improved', ''))
 
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
     def test_google_drive_error_handling(self, mock_google_auth, mock_google_drive):
         """Test handling of Google Drive API errors"""
         # Mock Google Drive to raise an exception
@@ -356,7 +365,7 @@ class DocumentManagementTest(TestCase):
         # Should return error status code
         self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    @patch('sop.views.OpenAI')
+    @patch('sop.services.openai_client.OpenAI')
     def test_openai_api_failure(self, mock_openai):
         """Test handling of OpenAI API failures"""
         # Mock OpenAI to raise an exception
@@ -410,8 +419,8 @@ class DocumentManagementTest(TestCase):
         # Should get error about invalid credentials
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
     def test_invalid_document_id(self, mock_google_auth, mock_google_drive):
         """Test behavior with non-existent document ID"""
         self.client.force_authenticate(user=self.owner)
@@ -439,8 +448,8 @@ class DocumentManagementTest(TestCase):
         # Should get 404
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
     def test_empty_document_data(self, mock_google_auth, mock_google_drive):
         """Test creating document with empty data"""
         mock_drive_instance = MagicMock()
@@ -471,8 +480,8 @@ class DocumentManagementTest(TestCase):
         # Should get validation error
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
     def test_document_in_nonexistent_team(self, mock_google_auth, mock_google_drive):
         """Test creating document in non-existent team"""
         self.client.force_authenticate(user=self.owner)
@@ -508,8 +517,8 @@ class DocumentManagementTest(TestCase):
         # Should get not found error
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
-    @patch('sop.views.GoogleDrive')
-    @patch('sop.views.GoogleAuth')
+    @patch('sop.services.drive_clients.GoogleDrive')
+    @patch('sop.services.drive_clients.GoogleAuth')
     def test_access_after_role_change(self, mock_google_auth, mock_google_drive):
         """Test document access after user's role changes"""
         # Create a simpler test that just checks permissions
@@ -0,0 +1,128 @@
+import datetime
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+from oauth2client.client import OAuth2Credentials
+
+from sop.models import DriveCredential, UserAccount
+from sop.services.drive_credentials import (
+    get_drive_credentials, refresh_credential, refresh_expiring_credentials, store_credentials
+)
+
+
+def make_credentials(access_token, expires_in):
+    """Credentials JSON whose access token expires ``expires_in`` seconds from now"""
+    expiry = datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in)
+    return OAuth2Credentials(
+        access_token, 'client', 'secret', 'refresh', expiry.replace(microsecond=0),
+        'https://oauth2.googleapis.com/token', 'tests'
+    ).to_json()
+
+
+def fake_refresh(credentials, http):
+    """Stand-in for the OAuth token endpoint"""
+    credentials.access_token = 'refreshed'
+    credentials.token_expiry = datetime.datetime.utcnow().replace(microsecond=0) + datetime.timedelta(hours=1)
+
+
+def access_token(credentials_json):
+    return json.loads(credentials_json)['access_token']
+
+
+@patch.object(OAuth2Credentials, 'refresh', autospec=True, side_effect=fake_refresh)
+class DriveCredentialStoreTests(TestCase):
+    """Persistent Drive credentials and their refresh"""
+
+    def setUp(self):
+        self.user = UserAccount.objects.create_user(email='owner@example.com', password='testpassword', name='Owner')
+
+    def make_request(self, session_credentials=None):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        request.session = {'google_drive_credentials': session_credentials} if session_credentials else {}
+        return request
+
+    def test_session_credentials_are_stored(self, mock_refresh):
+        credentials = make_credentials('first', 3600)
+
+        self.assertEqual(get_drive_credentials(self.make_request(credentials)), credentials)
+        stored = DriveCredential.objects.get(user=self.user)
+        self.assertEqual(stored.credentials, credentials)
+        self.assertIsNotNone(stored.token_expiry)
+
+        # Later requests no longer need the session copy
+        self.assertEqual(get_drive_credentials(self.make_request()), credentials)
+        mock_refresh.assert_not_called()
+
+    def test_stored_credentials_win_over_an_older_session_copy(self, mock_refresh):
+        store_credentials(self.user, make_credentials('refreshed-in-background', 3600))
+
+        result = get_drive_credentials(self.make_request(make_credentials('stale', 60)))
+
+        self.assertEqual(access_token(result), 'refreshed-in-background')
+
+    def test_new_sign_in_replaces_stored_credentials(self, mock_refresh):
+        store_credentials(self.user, make_credentials('old', 600))
+
+        result = get_drive_credentials(self.make_request(make_credentials('new', 3600)))
+
+        self.assertEqual(access_token(result), 'new')
+        self.assertEqual(access_token(DriveCredential.objects.get(user=self.user).credentials), 'new')
+
+    def test_requests_use_a_token_close_to_expiry_without_refreshing(self, mock_refresh):
+        store_credentials(self.user, make_credentials('current', 60))
+
+        self.assertEqual(access_token(get_drive_credentials(self.make_request())), 'current')
+        mock_refresh.assert_not_called()
+
+    def test_expired_token_fails_fast_without_refreshing(self, mock_refresh):
+        store_credentials(self.user, make_credentials('expired', -60))
+
+        self.assertIsNone(get_drive_credentials(self.make_request()))
+        mock_refresh.assert_not_called()
+
+    def test_refresh_rechecks_expiry_under_the_lock(self, mock_refresh):
+        store_credentials(self.user, make_credentials('expiring', 120))
+
+        refresh_credential(self.user.pk, margin=600)
+        refresh_credential(self.user.pk, margin=600)
+
+        self.assertEqual(mock_refresh.call_count, 1)
+
+    def test_background_refresh_only_renews_expiring_tokens(self, mock_refresh):
+        other = UserAccount.objects.create_user(email='other@example.com', password='testpassword', name='Other')
+        store_credentials(self.user, make_credentials('expiring', 120))
+        store_credentials(other, make_credentials('fresh', 3600))
+
+        self.assertEqual(refresh_expiring_credentials(), (1, 0))
+        self.assertEqual(access_token(DriveCredential.objects.get(user=self.user).credentials), 'refreshed')
+        self.assertEqual(access_token(DriveCredential.objects.get(user=other).credentials), 'fresh')
+
+    def test_refresh_failure_is_recorded_and_not_retried_at_once(self, mock_refresh):
+        store_credentials(self.user, make_credentials('revoked', 120))
+        mock_refresh.side_effect = Exception('invalid_grant')
+
+        self.assertEqual(refresh_expiring_credentials(), (0, 1))
+        self.assertEqual(refresh_expiring_credentials(), (0, 0))
+        self.assertEqual(mock_refresh.call_count, 1)
+        stored = DriveCredential.objects.get(user=self.user)
+        self.assertIsNotNone(stored.refresh_failed_at)
+        self.assertEqual(stored.refresh_error, 'invalid_grant')
+
+        # Signing in again clears the failure
+        store_credentials(self.user, make_credentials('new', 120))
+        mock_refresh.side_effect = fake_refresh
+        self.assertEqual(refresh_expiring_credentials(), (1, 0))
+        self.assertIsNone(DriveCredential.objects.get(user=self.user).refresh_failed_at)
+
+    def test_command_reports_failures(self, mock_refresh):
+        store_credentials(self.user, make_credentials('revoked', 120))
+        mock_refresh.side_effect = Exception('invalid_grant')
+        out = StringIO()
+
+        call_command('refresh_drive_credentials', stdout=out)
+
+        self.assertIn('Refreshed 0 Drive tokens, 1 failed', out.getvalue())
@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from sop.models import UserAccount
+from sop.services.google_drive_service import GOOGLE_DOC_MIME_TYPE
+from sop.tests.drive_test_case import FakeDriveMixin
+
+
+class ListDriveFilesTests(FakeDriveMixin, TestCase):
+    """Paged, cached listing of the Drive root against the fake Drive server"""
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+        for index in range(250):
+            self.drive.create_file(f'SOP {index}', GOOGLE_DOC_MIME_TYPE)
+        self.drive.reset_counters()
+
+        self.user = UserAccount.objects.create_user(email='owner@example.com', password='testpassword', name='Owner')
+        self.client.force_login(self.user)
+        self.sign_in_to_drive(self.client)
+        self.url = reverse('list_drive_files')
+
+    def test_first_page_is_one_drive_call(self):
+        response = self.client.get(self.url)
+
+        data = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data['files']), 100)
+        self.assertEqual(set(data['files'][0]), {'id', 'title'})
+        self.assertIsNotNone(data['next_page_token'])
+        self.assertEqual(self.drive.round_trips, 1)
+
+    def test_page_tokens_walk_the_listing(self):
+        titles = []
+        page_token = ''
+        while page_token is not None:
+            data = self.client.get(self.url, {'page_token': page_token, 'page_size': 120}).json()
+            titles.extend(f['title'] for f in data['files'])
+            page_token = data['next_page_token']
+
+        self.assertEqual(len(titles), 250)
+        self.assertEqual(self.drive.round_trips, 3)
+
+    def test_pages_are_cached_until_refreshed(self):
+        first = self.client.get(self.url).json()
+        self.drive.create_file('New SOP', GOOGLE_DOC_MIME_TYPE)
+
+        self.assertEqual(self.client.get(self.url).json(), first)
+        self.assertEqual(self.drive.round_trips, 1)
+
+        refreshed = self.client.get(self.url, {'refresh': 'true', 'page_size': 1000}).json()
+        self.assertIn('New SOP', [f['title'] for f in refreshed['files']])
+        self.assertEqual(self.drive.round_trips, 2)
+
+    def test_requires_drive_credentials(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_rejects_invalid_page_size(self):
+        self.assertEqual(self.client.get(self.url, {'page_size': 'all'}).status_code, 400)
@@ -0,0 +1,117 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from sop.models import Document, DriveCredential, DriveSyncState, UserAccount
+from sop.services.drive_credentials import store_credentials
+from sop.services.drive_sync import sync_drive_changes
+from sop.services.google_drive_service import GOOGLE_DOC_MIME_TYPE
+from sop.tests.drive_test_case import FakeDriveMixin
+
+
+class DriveSyncTests(FakeDriveMixin, TestCase):
+    """Applying the fake Drive changes feed to documents"""
+
+    drive_settings = {'GOOGLE_DRIVE_CHANGES_PAGE_SIZE': 2}
+
+    def setUp(self):
+        super().setUp()
+
+        self.user = UserAccount.objects.create_user(email='owner@example.com', password='testpassword', name='Owner')
+        store_credentials(self.user, self.credentials)
+        self.state = DriveSyncState.objects.create(user=self.user)
+
+        self.files = [self.drive.create_file(f'SOP {index}', GOOGLE_DOC_MIME_TYPE) for index in range(3)]
+        self.documents = [
+            Document.objects.create(
+                title=drive_file['title'], file_url=drive_file['alternateLink'],
+                google_drive_file_id=drive_file['id'], owner=self.user
+            )
+            for drive_file in self.files
+        ]
+
+    def test_first_sync_only_records_the_feed_position(self):
+        counts = sync_drive_changes(self.state, self.credentials)
+
+        self.assertEqual(counts, {'changes': 0, 'updated': 0})
+        self.assertEqual(self.state.page_token, str(len(self.drive.changes) + 1))
+        self.assertIsNotNone(DriveSyncState.objects.get(pk=self.state.pk).last_synced_at)
+
+    def test_sync_applies_only_changed_files(self):
+        sync_drive_changes(self.state, self.credentials)
+        renamed = self.drive.update_file(self.files[0]['id'], title='Renamed SOP')
+        self.drive.update_file(self.files[1]['id'], title='Renamed again')
+        self.drive.update_file(self.files[1]['id'], title='Final title')
+        self.drive.create_file('Not a document', GOOGLE_DOC_MIME_TYPE)
+        self.drive.reset_counters()
+
+        # Per page of two changes: one SELECT and one bulk UPDATE, then the token is saved
+        with self.assertNumQueries(6):
+            counts = sync_drive_changes(self.state, self.credentials)
+
+        # The second document changed on both pages, so it is written twice
+        self.assertEqual(counts, {'changes': 4, 'updated': 3})
+        self.assertEqual(self.drive.round_trips, 2)
+        document = Document.objects.get(pk=self.documents[0].pk)
+        self.assertEqual(document.title, 'Renamed SOP')
+        self.assertEqual(document.drive_modified_at, parse_datetime(renamed['modifiedDate']))
+        # updated_at is the time of the sync, so the document list's ETag moves
+        self.assertGreater(document.updated_at, self.documents[0].updated_at)
+        self.assertEqual(Document.objects.get(pk=self.documents[1].pk).title, 'Final title')
+        self.assertEqual(Document.objects.get(pk=self.documents[2].pk).title, 'SOP 2')
+
+        # Nothing new since the last sync
+        self.assertEqual(sync_drive_changes(self.state, self.credentials), {'changes': 0, 'updated': 0})
+
+    def test_deleted_files_keep_their_documents(self):
+        sync_drive_changes(self.state, self.credentials)
+        self.drive.files.pop(self.files[0]['id'])
+        with self.drive.lock:
+            self.drive.record_change(self.files[0]['id'])
+
+        counts = sync_drive_changes(self.state, self.credentials)
+
+        self.assertEqual(counts, {'changes': 1, 'updated': 0})
+        self.assertEqual(Document.objects.get(pk=self.documents[0].pk).title, 'SOP 0')
+
+    def test_command_syncs_each_stored_state(self):
+        sync_drive_changes(self.state, self.credentials)
+        self.drive.update_file(self.files[2]['id'], title='Updated by command')
+        out = StringIO()
+
+        call_command('sync_drive_changes', stdout=out)
+
+        self.assertIn('1 documents updated', out.getvalue())
+        self.assertEqual(Document.objects.get(pk=self.documents[2].pk).title, 'Updated by command')
+
+    def test_command_starts_syncing_users_without_a_state(self):
+        self.state.delete()
+
+        call_command('sync_drive_changes', stdout=StringIO())
+        self.drive.update_file(self.files[1]['id'], title='Renamed before any manual sync')
+        out = StringIO()
+        call_command('sync_drive_changes', stdout=out)
+
+        self.assertTrue(DriveSyncState.objects.filter(user=self.user).exists())
+        self.assertIn('1 documents updated', out.getvalue())
+        self.assertEqual(Document.objects.get(pk=self.documents[1].pk).title, 'Renamed before any manual sync')
+
+    def test_endpoint_stores_session_credentials(self):
+        self.state.delete()
+        DriveCredential.objects.all().delete()
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        session = client.session
+        session['google_drive_credentials'] = self.credentials
+        session.save()
+
+        response = client.post(reverse('google_drive_sync'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(DriveSyncState.objects.get(user=self.user).page_token)
+        self.assertEqual(DriveCredential.objects.get(user=self.user).credentials, self.credentials)
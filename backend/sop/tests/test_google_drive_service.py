@@ -0,0 +1,226 @@
+from unittest.mock import patch, MagicMock
+from urllib.parse import parse_qs, urlsplit
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from googleapiclient.errors import HttpError
+
+from sop.services.drive_clients import drive_client_pool, DriveClientPool, get_client_config, new_google_auth
+from sop.services.google_drive_service import GoogleDriveService, GOOGLE_DOC_MIME_TYPE, with_backoff
+from sop.tests.drive_test_case import FakeDriveMixin
+
+
+class FakeUploadRequest:
+    """Resumable insert request that pulls the media one chunk per call"""
+
+    def __init__(self, media):
+        self.media = media
+        self.offset = 0
+        self.chunk_sizes = []
+
+    def next_chunk(self, http=None):
+        chunk = self.media.getbytes(self.offset, self.media.chunksize())
+        self.chunk_sizes.append(len(chunk))
+        self.offset += len(chunk)
+        if self.offset < self.media.size():
+            return MagicMock(), None
+        return None, {'id': 'uploaded-id', 'title': 'Upload'}
+
+
+@override_settings(GOOGLE_DRIVE_UPLOAD_CHUNK_SIZE=256 * 1024)
+@patch('sop.services.drive_clients.OAuth2Credentials')
+@patch('sop.services.drive_clients.GoogleDrive')
+@patch('sop.services.drive_clients.GoogleAuth')
+class StreamingUploadTest(SimpleTestCase):
+    """Uploads stream to Drive in chunks without temporary files"""
+
+    def make_service(self):
+        drive_client_pool.clear()
+        self.addCleanup(drive_client_pool.clear)
+        service = GoogleDriveService('{}')
+        self.requests = []
+
+        def insert(body, media_body, **kwargs):
+            request = FakeUploadRequest(media_body)
+            self.requests.append(request)
+            return request
+
+        service.client.service.files.return_value.insert.side_effect = insert
+        service._convert_to_google_docs = MagicMock(return_value=None)
+        service._set_permissions = MagicMock()
+        service._get_file_url = MagicMock(return_value='https://docs.google.com/document/d/uploaded-id/edit')
+        service.drive.CreateFile.side_effect = lambda metadata: metadata
+        return service
+
+    def test_file_is_uploaded_in_bounded_chunks(self, *mocks):
+        service = self.make_service()
+        upload = SimpleUploadedFile('large.pdf', b'x' * (1024 * 1024 + 10), content_type='application/pdf')
+
+        with patch('tempfile.NamedTemporaryFile') as named_temporary_file:
+            result = service.upload_document('Upload', file_obj=upload)
+
+        named_temporary_file.assert_not_called()
+        self.assertEqual(result['file_id'], 'uploaded-id')
+        request = self.requests[0]
+        self.assertEqual(request.media.mimetype(), 'application/pdf')
+        self.assertTrue(request.media.resumable())
+        self.assertEqual(sum(request.chunk_sizes), 1024 * 1024 + 10)
+        self.assertLessEqual(max(request.chunk_sizes), 256 * 1024)
+
+    def test_text_content_is_uploaded_from_memory(self, *mocks):
+        service = self.make_service()
+        service.upload_document('Upload', text_content='<p>Body</p>', content_type='html')
+
+        media = self.requests[0].media
+        self.assertEqual(media.mimetype(), 'text/html')
+        self.assertIn(b'<p>Body</p>', media.getbytes(0, media.size()))
+
+
+class UploadPipelineTest(FakeDriveMixin, SimpleTestCase):
+    """The upload pipeline against the fake Drive server"""
+
+    def test_convertible_upload_uses_three_round_trips(self):
+        with GoogleDriveService(self.credentials) as service:
+            result = service.upload_document('SOP', text_content='<p>Steps</p>', content_type='html')
+
+        # Resumable session, one chunk, then the permission
+        self.assertEqual(self.drive.round_trips, 3)
+        self.assertEqual(self.drive.files[result['file_id']]['mimeType'], GOOGLE_DOC_MIME_TYPE)
+        self.assertEqual(result['file_url'], self.drive.files[result['file_id']]['alternateLink'])
+        self.assertIn(result['file_id'], self.drive.permissions)
+
+    def test_unconverted_upload_is_copied_and_cleaned_up_in_a_batch(self):
+        upload = SimpleUploadedFile('scan.pdf', b'%PDF-1.4 test', content_type='application/pdf')
+        with GoogleDriveService(self.credentials) as service:
+            result = service.upload_document('Scan', file_obj=upload)
+
+        self.assertEqual(list(self.drive.files), [result['file_id']])
+        self.assertEqual(self.drive.files[result['file_id']]['mimeType'], GOOGLE_DOC_MIME_TYPE)
+        self.assertIn(result['file_id'], self.drive.permissions)
+        self.assertIn(('POST', '/batch/drive/v2'), self.drive.calls)
+        self.assertEqual(self.drive.round_trips, 4)
+
+    def test_pydrive_calls_use_the_configured_server(self):
+        drive_file = self.drive.create_file('SOP', GOOGLE_DOC_MIME_TYPE)
+        with drive_client_pool.client(self.credentials) as client:
+            gfile = client.drive.CreateFile({'id': drive_file['id']})
+            gfile.FetchMetadata(fields='id, title')
+        self.assertEqual(gfile['title'], 'SOP')
+
+    @patch('sop.services.google_drive_service.time.sleep')
+    def test_injected_failure_is_retried(self, mock_sleep):
+        self.drive.fail_next(1, status=503)
+        with GoogleDriveService(self.credentials) as service:
+            result = service.upload_document('SOP', text_content='Steps')
+
+        self.assertEqual(self.drive.injected_errors, 1)
+        self.assertIn(result['file_id'], self.drive.files)
+        mock_sleep.assert_called_once()
+
+
+@patch('sop.services.google_drive_service.time.sleep')
+class BackoffTest(SimpleTestCase):
+    """Transient Drive failures are retried with bounded, jittered delays"""
+
+    def http_error(self, status):
+        return HttpError(MagicMock(status=status), b'{}')
+
+    @override_settings(GOOGLE_DRIVE_MAX_ATTEMPTS=4, GOOGLE_DRIVE_RETRY_BASE_DELAY=1, GOOGLE_DRIVE_RETRY_MAX_DELAY=3)
+    def test_retries_transient_errors(self, mock_sleep):
+        func = MagicMock(side_effect=[self.http_error(503), self.http_error(429), ConnectionError(), 'ok'])
+        self.assertEqual(with_backoff(func), 'ok')
+        self.assertEqual(func.call_count, 4)
+
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        for attempt, delay in enumerate(delays):
+            self.assertLessEqual(delay, min(3, 2 ** attempt))
+
+    def test_client_errors_are_not_retried(self, mock_sleep):
+        func = MagicMock(side_effect=self.http_error(404))
+        with self.assertRaises(HttpError):
+            with_backoff(func)
+        self.assertEqual(func.call_count, 1)
+        mock_sleep.assert_not_called()
+
+
+@patch('sop.services.drive_clients.OAuth2Credentials')
+@patch('sop.services.drive_clients.GoogleDrive')
+@patch('sop.services.drive_clients.GoogleAuth')
+class DriveClientPoolTest(SimpleTestCase):
+    """Drive clients are reused per credentials and bounded in number"""
+
+    def test_released_client_is_reused(self, *mocks):
+        pool = DriveClientPool(max_size=4)
+        with pool.client('creds-a') as first:
+            pass
+        with pool.client('creds-a') as second:
+            self.assertIs(second, first)
+        with pool.client('creds-b') as other:
+            self.assertIsNot(other, first)
+
+    def test_clients_are_checked_out_exclusively(self, *mocks):
+        pool = DriveClientPool(max_size=4)
+        with pool.client('creds-a') as first, pool.client('creds-a') as second:
+            self.assertIsNot(first, second)
+        self.assertEqual(pool.size(), 2)
+
+    def test_least_recently_used_credentials_are_evicted(self, *mocks):
+        pool = DriveClientPool(max_size=2)
+        for credentials in ('creds-a', 'creds-b', 'creds-c'):
+            with pool.client(credentials):
+                pass
+        self.assertEqual(pool.size(), 2)
+        self.assertNotIn(pool.make_key('creds-a'), pool._idle)
+
+    def test_pool_can_be_disabled(self, *mocks):
+        pool = DriveClientPool(max_size=0)
+        with pool.client('creds-a') as first:
+            pass
+        with pool.client('creds-a') as second:
+            self.assertIsNot(second, first)
+
+
+class ClientReuseTest(FakeDriveMixin, SimpleTestCase):
+    """Repeat uploads reuse the pooled client's open connection and config"""
+
+    def test_second_upload_opens_no_new_connection(self):
+        with GoogleDriveService(self.credentials) as service:
+            service.upload_document('First', text_content='one')
+        self.drive.reset_counters()
+
+        with patch('sop.services.drive_clients.build_drive_service') as build:
+            with GoogleDriveService(self.credentials) as service:
+                service.upload_document('Second', text_content='two')
+        build.assert_not_called()
+        self.assertEqual(self.drive.connections, 0)
+
+    @patch('sop.services.drive_clients.clientsecrets.loadfile')
+    def test_client_config_is_read_once(self, mock_loadfile):
+        mock_loadfile.return_value = ('web', {
+            'client_id': 'id', 'client_secret': 'secret', 'auth_uri': 'https://auth',
+            'token_uri': 'https://token', 'redirect_uris': ['http://localhost/callback'],
+        })
+        get_client_config.cache_clear()
+        self.addCleanup(get_client_config.cache_clear)
+
+        for _ in range(3):
+            gauth = new_google_auth(load_client_config=True)
+        self.assertEqual(gauth.client_config['client_id'], 'id')
+        mock_loadfile.assert_called_once()
+
+    @patch('sop.services.drive_clients.clientsecrets.loadfile')
+    def test_login_requests_offline_access(self, mock_loadfile):
+        mock_loadfile.return_value = ('web', {
+            'client_id': 'id', 'client_secret': 'secret', 'auth_uri': 'https://auth',
+            'token_uri': 'https://token', 'redirect_uris': ['http://localhost/callback'],
+        })
+        get_client_config.cache_clear()
+        self.addCleanup(get_client_config.cache_clear)
+
+        auth_url = self.client.get(reverse('google_drive_login')).json()['auth_url']
+
+        query = parse_qs(urlsplit(auth_url).query)
+        self.assertEqual(query['access_type'], ['offline'])
+        self.assertEqual(query['prompt'], ['consent'])
+        self.assertNotIn('approval_prompt', query)
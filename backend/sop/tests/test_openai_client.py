@@ -0,0 +1,57 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from sop.models import UserAccount
+from sop.services.ai_cache import get_ai_cache
+from sop.services.openai_client import get_openai_client, get_timeout, openai_latency, reset_openai_client
+from sop.tests.fake_openai import FakeOpenAIServer
+
+
+class SharedOpenAIClientTests(TestCase):
+    """One pooled OpenAI client shared by the AI views"""
+
+    def setUp(self):
+        self.server = FakeOpenAIServer().start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(OPENAI_API_KEY='test-key', OPENAI_BASE_URL=self.server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_openai_client()
+        self.addCleanup(reset_openai_client)
+        get_ai_cache().clear()
+        openai_latency.clear()
+
+        self.user = UserAccount.objects.create_user(email='owner@example.com', password='testpassword', name='Owner')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_back_to_back_calls_reuse_one_connection(self):
+        for n in range(3):
+            response = self.client.post(reverse('summarise_sop'), {'content': f'SOP {n}'}, format='json')
+            self.assertEqual(response.data, {'summary': f'Summary {n + 1}'})
+
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_client_is_shared_until_settings_change(self):
+        client = get_openai_client()
+        self.assertIs(get_openai_client(), client)
+
+        with override_settings(OPENAI_API_KEY='other-key'):
+            self.assertIsNot(get_openai_client(), client)
+
+    def test_upstream_latency_is_recorded_per_endpoint(self):
+        self.client.post(reverse('summarise_sop'), {'content': 'SOP'}, format='json')
+        self.client.post(reverse('improve_sop'), {'content': 'SOP'}, format='json')
+
+        stats = openai_latency.stats()
+        self.assertEqual(set(stats), {'summarise', 'improve'})
+        self.assertEqual(stats['summarise']['count'], 1)
+        self.assertGreater(stats['summarise']['p50_ms'], 0)
+
+    @override_settings(OPENAI_CONNECT_TIMEOUT=2, OPENAI_TIMEOUTS={'generate': 90, 'improve': 45, 'summarise': 15})
+    def test_timeouts_are_configured_per_endpoint(self):
+        self.assertEqual(get_timeout('summarise').read, 15)
+        self.assertEqual(get_timeout('generate').read, 90)
+        self.assertEqual(get_timeout('improve').connect, 2)
@@ -0,0 +1,108 @@
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from sop.models import UserAccount, Team, TeamMembership, Task, Document
+from sop.pagination import TaskCursorPagination
+
+
+class KeysetPaginationTests(TestCase):
+    """Opt-in cursor pagination for task, document and team lists"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserAccount.objects.create_user(
+            email='owner@example.com', password='testpass123', name='Owner')
+        self.team = Team.objects.create(name='Team', created_by=self.user)
+        TeamMembership.objects.create(user=self.user, team=self.team, role='owner')
+
+        # Several tasks share a due date so the id tie-breaker is exercised
+        today = date.today()
+        Task.objects.bulk_create([
+            Task(description=f'Task {i}', assigned_to=self.user, team=self.team,
+                 due_date=today + timedelta(days=i % 3))
+            for i in range(11)
+        ])
+        for i in range(5):
+            Document.objects.create(
+                title=f'Doc {i}', file_url='https://docs.google.com/document/d/x',
+                owner=self.user, team=self.team)
+
+        self.client.force_authenticate(user=self.user)
+
+    def walk(self, url, key=None):
+        """Follow next links, returning the ids seen and the query count of each page"""
+        ids, query_counts = [], []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = response.data[key] if key else response.data
+            ids.extend(item['id'] for item in data['results'])
+            query_counts.append(len(context.captured_queries))
+            url = data['next']
+        return ids, query_counts
+
+    def test_list_is_unpaginated_by_default(self):
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 11)
+
+    def test_task_pages_follow_due_date_then_id(self):
+        ids, query_counts = self.walk(reverse('task-list') + '?page_size=3')
+
+        expected = list(Task.objects.order_by('due_date', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(query_counts), 4)
+        # The last page costs the same as the first
+        self.assertEqual(len(set(query_counts)), 1)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(reverse('task-list') + '?page_size=4').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+
+        self.assertIsNone(first['previous'])
+        self.assertEqual(
+            [item['id'] for item in back['results']],
+            [item['id'] for item in first['results']]
+        )
+
+    def test_document_pages_follow_updated_at(self):
+        ids, _ = self.walk(reverse('document-list') + '?page_size=2')
+        expected = list(Document.objects.order_by('updated_at', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_team_documents_and_teams_paginate(self):
+        url = reverse('document-team-documents', args=[self.team.id]) + '?page_size=2'
+        ids, _ = self.walk(url)
+        self.assertEqual(len(ids), 5)
+
+        ids, _ = self.walk(reverse('team-list') + '?page_size=1')
+        self.assertEqual(ids, [self.team.id])
+
+    def test_user_and_team_tasks_paginate_each_list(self):
+        url = reverse('task-user-and-team-tasks') + '?page_size=4'
+        ids, _ = self.walk(url, key='team_tasks')
+        self.assertEqual(len(ids), 11)
+
+        response = self.client.get(url)
+        self.assertEqual(response.data['user_tasks']['results'], [])
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(reverse('task-list') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_seek_bounds_the_leading_column(self):
+        values = [date.today(), 5]
+
+        sql = str(Task.objects.filter(TaskCursorPagination().seek_filter(values)).query)
+        reverse_sql = str(Task.objects.filter(TaskCursorPagination().seek_filter(values, reverse=True)).query)
+
+        self.assertIn('"due_date" >=', sql)
+        self.assertIn('"due_date" <=', reverse_sql)
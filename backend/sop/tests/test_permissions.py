@@ -0,0 +1,135 @@
+import tempfile
+from types import SimpleNamespace
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+from sop.helpers.permission_helpers import (
+    get_membership_version, get_team_role, get_team_roles, is_team_owner,
+    reset_team_roles, validate_team_membership
+)
+from sop.models import UserAccount, Team, TeamMembership
+
+
+class TeamRoleHelperTests(TestCase):
+    """Membership lookups share one query per request"""
+
+    def setUp(self):
+        self.user = UserAccount.objects.create_user(
+            email='user@example.com', password='testpass123', name='User')
+        self.owned = Team.objects.create(name='Owned', created_by=self.user)
+        self.joined = Team.objects.create(name='Joined', created_by=self.user)
+        self.other = Team.objects.create(name='Other', created_by=self.user)
+        TeamMembership.objects.create(user=self.user, team=self.owned, role='owner')
+        TeamMembership.objects.create(user=self.user, team=self.joined, role='member')
+        self.request = SimpleNamespace(user=self.user)
+
+    def test_roles_loaded_once_per_request(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_team_role(self.request, self.owned), 'owner')
+            self.assertEqual(get_team_role(self.request, self.joined.id), 'member')
+            self.assertEqual(get_team_role(self.request, str(self.joined.id)), 'member')
+            self.assertIsNone(get_team_role(self.request, self.other))
+            self.assertIsNone(get_team_role(self.request, None))
+            self.assertTrue(is_team_owner(self.request, self.owned))
+            self.assertFalse(is_team_owner(self.request, self.joined))
+
+    def test_reset_reloads_roles(self):
+        get_team_roles(self.request)
+        TeamMembership.objects.create(user=self.user, team=self.other, role='admin')
+        reset_team_roles(self.request)
+        self.assertEqual(get_team_role(self.request, self.other), 'admin')
+
+    def test_anonymous_user_has_no_roles(self):
+        request = SimpleNamespace(user=AnonymousUser())
+        with self.assertNumQueries(0):
+            self.assertEqual(get_team_roles(request), {})
+
+    def test_validate_team_membership(self):
+        team, error = validate_team_membership(self.request, self.joined.id)
+        self.assertEqual(team, self.joined)
+        self.assertIsNone(error)
+
+        team, error = validate_team_membership(self.request, self.other.id)
+        self.assertIsNone(team)
+        self.assertEqual(error.status_code, status.HTTP_403_FORBIDDEN)
+
+        team, error = validate_team_membership(self.request, 99999)
+        self.assertEqual(error.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.assertEqual(validate_team_membership(self.request, None), (None, None))
+
+
+class TeamRoleCacheTests(TestCase):
+    """Team roles are cached across requests and invalidated on change"""
+
+    def setUp(self):
+        # A cache shared between processes, as Redis is in production
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name,
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = UserAccount.objects.create_user(
+            email='user@example.com', password='testpass123', name='User')
+        self.team = Team.objects.create(name='Team', created_by=self.user)
+        self.membership = TeamMembership.objects.create(user=self.user, team=self.team, role='member')
+
+    def roles(self):
+        """Look up roles the way a fresh request would"""
+        return get_team_roles(SimpleNamespace(user=self.user))
+
+    def test_steady_state_needs_no_queries(self):
+        self.assertEqual(self.roles(), {self.team.id: 'member'})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.roles(), {self.team.id: 'member'})
+
+    def test_role_change_invalidates_cache(self):
+        self.roles()
+        self.membership.role = 'owner'
+        self.membership.save()
+        self.assertEqual(self.roles(), {self.team.id: 'owner'})
+
+    def test_membership_delete_invalidates_cache(self):
+        self.roles()
+        self.membership.delete()
+        self.assertEqual(self.roles(), {})
+
+    def test_team_delete_invalidates_cache(self):
+        self.roles()
+        self.team.delete()
+        self.assertEqual(self.roles(), {})
+
+    def test_team_update_bumps_member_versions(self):
+        version = get_membership_version(self.user.pk)
+        self.team.name = 'Renamed'
+        self.team.save()
+        self.assertNotEqual(get_membership_version(self.user.pk), version)
+
+    def test_versions_survive_eviction(self):
+        self.roles()
+        cache.delete(f'team_roles:version:{self.user.pk}')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.roles(), {self.team.id: 'member'})
+
+
+class ProcessLocalCacheTests(TestCase):
+    """Without a shared cache, roles are only kept for the request"""
+
+    def setUp(self):
+        self.user = UserAccount.objects.create_user(
+            email='user@example.com', password='testpass123', name='User')
+        self.team = Team.objects.create(name='Team', created_by=self.user)
+        TeamMembership.objects.create(user=self.user, team=self.team, role='member')
+
+    def test_each_request_reads_roles_from_the_database(self):
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(get_team_roles(SimpleNamespace(user=self.user)), {self.team.id: 'member'})
+
+    def test_version_is_the_same_in_every_process(self):
+        self.assertEqual(get_membership_version(self.user.pk), 0)
@@ -83,4 +83,38 @@ class TaskSerializerTest(TestCase):
         self.assertEqual(data['team'], task.team.id)
         self.assertEqual(data['team_name'], task.team.name)
         self.assertEqual(data['due_date'], task.due_date)
-        self.assertEqual(data['status'], task.status)
\ No newline at end of file
+        self.assertEqual(data['status'], task.status)
+
+class SparseFieldsetTest(TestCase):
+    def setUp(self):
+        self.user = UserAccount.objects.create_user(email='testuser@example.com', password='testpass', name='Test')
+        self.team = Team.objects.create(name='Test Team', description='A test team', created_by=self.user)
+        TeamMembership.objects.create(user=self.user, team=self.team, role='owner')
+        self.task = Task.objects.create(
+            description='Test Task',
+            assigned_to=self.user,
+            team=self.team,
+            due_date='2023-10-01',
+            status='not_started'
+        )
+
+    def test_fields_limits_representation(self):
+        data = TaskSerializer(self.task, fields={'id', 'status'}).data
+        self.assertEqual(set(data), {'id', 'status'})
+
+    def test_expand_drops_unrequested_expandable_fields(self):
+        data = TaskSerializer(self.task, expand={'team_name'}).data
+        self.assertIn('team_name', data)
+        self.assertIn('description', data)
+        self.assertNotIn('team_members', data)
+        self.assertNotIn('assigned_to_name', data)
+
+    def test_fields_and_expand_combine(self):
+        data = TaskSerializer(self.task, fields={'id'}, expand={'team_members'}).data
+        self.assertEqual(set(data), {'id', 'team_members'})
+        self.assertEqual(len(data['team_members']), 1)
+
+    def test_default_representation_is_unchanged(self):
+        data = TeamSerializer(self.team).data
+        self.assertIn('members', data)
+        self.assertNotIn('members', TeamSerializer(self.team, expand=set()).data)
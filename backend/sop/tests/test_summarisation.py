@@ -0,0 +1,160 @@
+import json
+import time
+
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from sop.models import UserAccount
+from sop.services.ai_cache import get_ai_cache
+from sop.services.openai_client import reset_openai_client
+from sop.services.summarisation import estimate_tokens, map_reduce_params, merge_batches, split_sections
+from sop.tests.fake_openai import FakeOpenAIServer
+
+SECTION_NAMES = ['Purpose', 'Scope', 'Responsibilities', 'Procedure']
+
+LONG_SOP = (
+    '<html><head><style>.c1{color:red}</style></head><body>'
+    + ''.join(
+        f'<h2>{name}</h2>' + ''.join(f'<p>{name} requirement {n} applies to every shift.</p>' for n in range(12))
+        for name in SECTION_NAMES
+    )
+    + '</body></html>'
+)
+
+
+class SplitSectionsTests(SimpleTestCase):
+    """Splitting SOP content into token-bounded sections"""
+
+    def test_html_is_split_on_headings(self):
+        sections = split_sections(LONG_SOP, max_tokens=200)
+
+        self.assertEqual([section.splitlines()[0] for section in sections], SECTION_NAMES)
+        self.assertNotIn('color:red', ''.join(sections))
+        self.assertNotIn('<p>', ''.join(sections))
+
+    def test_plain_text_is_split_on_sop_section_names(self):
+        content = '\n'.join(f'{n}. {name}\n' + 'Text of the section. ' * 40 for n, name in enumerate(SECTION_NAMES, 1))
+
+        sections = split_sections(content, max_tokens=250)
+
+        self.assertEqual([section.splitlines()[0] for section in sections], [
+            f'{n}. {name}' for n, name in enumerate(SECTION_NAMES, 1)
+        ])
+
+    def test_short_sections_are_packed_and_long_ones_split(self):
+        content = '<h1>Title</h1><p>Cleaning</p><h2>Procedure</h2>' + '<p>Wipe every surface.</p>' * 100
+
+        sections = split_sections(content, max_tokens=100)
+
+        self.assertTrue(sections[0].startswith('Title\nCleaning\nProcedure'))
+        self.assertGreater(len(sections), 2)
+        self.assertTrue(all(len(section) <= 400 for section in sections))
+
+    def test_short_content_keeps_single_pass(self):
+        params = {'model': 'gpt-4o', 'messages': [], 'max_tokens': 300}
+
+        self.assertIs(map_reduce_params('<p>Short SOP</p>', params), params)
+
+    @override_settings(OPENAI_SUMMARY_SECTION_TOKENS=20)
+    def test_partials_are_merged_in_batches_of_at_least_two(self):
+        partials = [f'Summary of part {n}' for n in range(7)]
+
+        batches = merge_batches(partials)
+
+        self.assertEqual(sum(batches, []), partials)
+        self.assertGreater(len(batches), 1)
+        self.assertTrue(all(len(batch) >= 2 for batch in batches))
+
+    @override_settings(OPENAI_SUMMARY_SECTION_TOKENS=50)
+    def test_content_short_once_markup_is_removed_keeps_single_pass(self):
+        content = '<style>' + '.c1{color:red}' * 50 + '</style><p>Short SOP</p>'
+        system = {'role': 'system', 'content': 'Summarise'}
+        params = {'model': 'gpt-4o', 'messages': [system, {'role': 'user', 'content': content}], 'max_tokens': 300}
+
+        result = map_reduce_params(content, params)
+
+        self.assertEqual(result['messages'], [system, {'role': 'user', 'content': 'Short SOP'}])
+
+
+@override_settings(OPENAI_SUMMARY_SECTION_TOKENS=200)
+class MapReduceSummaryTests(TestCase):
+    """Long SOPs summarised per section, concurrently, against a fake OpenAI server"""
+
+    LATENCY = 0.3
+
+    def setUp(self):
+        self.server = FakeOpenAIServer(latency=self.LATENCY).start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(OPENAI_API_KEY='test-key', OPENAI_BASE_URL=self.server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_openai_client()
+        self.addCleanup(reset_openai_client)
+        get_ai_cache().clear()
+
+        self.user = UserAccount.objects.create_user(email='owner@example.com', password='testpassword', name='Owner')
+
+    def test_sections_are_summarised_concurrently_then_merged(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        started = time.perf_counter()
+        response = client.post(reverse('summarise_sop'), {'content': LONG_SOP}, format='json')
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(response.status_code, 200)
+        # One call per section, then the merge
+        self.assertEqual(self.server.requests, len(SECTION_NAMES) + 1)
+        self.assertEqual(response.data, {'summary': f'Summary {len(SECTION_NAMES) + 1}'})
+        self.assertGreater(self.server.max_in_flight, 1)
+        # Sections run side by side: about two round trips, not five
+        self.assertLess(elapsed, (len(SECTION_NAMES) + 1) * self.LATENCY)
+
+    def test_repeated_summary_skips_all_passes(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        client.post(reverse('summarise_sop'), {'content': LONG_SOP}, format='json')
+        response = client.post(reverse('summarise_sop'), {'content': LONG_SOP}, format='json')
+
+        self.assertEqual(response['X-AI-Cache'], 'hit')
+        self.assertEqual(self.server.requests, len(SECTION_NAMES) + 1)
+
+    async def test_async_view_summarises_sections_concurrently(self):
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+        started = time.perf_counter()
+        response = await AsyncClient().post(
+            reverse('async_summarise_sop'), json.dumps({'content': LONG_SOP}),
+            content_type='application/json', headers=headers,
+        )
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.requests, len(SECTION_NAMES) + 1)
+        self.assertLess(elapsed, (len(SECTION_NAMES) + 1) * self.LATENCY)
+
+    def test_partials_too_long_to_merge_at_once_are_merged_in_rounds(self):
+        content = ''.join(f'<h2>Part {n}</h2><p>{"word " * 130}</p>' for n in range(40))
+        params = {'model': 'gpt-4o', 'messages': [{'role': 'user', 'content': content}], 'max_tokens': 300}
+
+        result = map_reduce_params(content, params)
+
+        # 40 section summaries, then at least one extra round of batch merges
+        self.assertGreater(self.server.requests, 40)
+        self.assertLessEqual(estimate_tokens(result['messages'][-1]['content']), 200)
+
+    @override_settings(OPENAI_SUMMARY_WORKERS=2)
+    async def test_async_sections_are_bounded_by_the_worker_setting(self):
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+        response = await AsyncClient().post(
+            reverse('async_summarise_sop'), json.dumps({'content': LONG_SOP}),
+            content_type='application/json', headers=headers,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.requests, len(SECTION_NAMES) + 1)
+        self.assertEqual(self.server.max_in_flight, 2)
@@ -2,6 +2,8 @@ from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from sop.models import UserAccount, Team, TeamMembership, Task
 from datetime import date, timedelta
 
@@ -126,3 +128,168 @@ class TaskManagementTests(TestCase):
         response = self.client.put(url, update_data, format='json')
 
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TaskListQueryCountTests(TestCase):
+    """Task list endpoints should cost the same number of queries for any list size"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = UserAccount.objects.create_user(
+            email='owner@example.com', password='testpass123', name='Team Owner')
+        self.team = Team.objects.create(name='Big Team', created_by=self.owner)
+        TeamMembership.objects.create(user=self.owner, team=self.team, role='owner')
+        for i in range(5):
+            member = UserAccount.objects.create_user(
+                email=f'member{i}@example.com', password='testpass123', name=f'Member {i}')
+            TeamMembership.objects.create(user=member, team=self.team, role='member')
+        self.client.force_authenticate(user=self.owner)
+
+    def create_tasks(self, count):
+        Task.objects.bulk_create([
+            Task(description=f'Task {i}', assigned_to=self.owner, team=self.team,
+                 due_date=date.today() + timedelta(days=i))
+            for i in range(count)
+        ])
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries), response
+
+    def test_task_list_query_count_is_constant(self):
+        url = reverse('task-list')
+        self.create_tasks(3)
+        small_count, _ = self.count_queries(url)
+        self.create_tasks(40)
+        large_count, response = self.count_queries(url)
+
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(len(response.data), 43)
+        self.assertEqual(len(response.data[0]['team_members']), 6)
+        self.assertEqual(response.data[0]['team_members'][0]['team_name'], 'Big Team')
+
+    def test_user_and_team_tasks_query_count_is_constant(self):
+        url = reverse('task-user-and-team-tasks')
+        self.create_tasks(3)
+        small_count, _ = self.count_queries(url)
+        self.create_tasks(40)
+        large_count, response = self.count_queries(url)
+
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(len(response.data['team_tasks']), 43)
+
+    def test_sparse_fields_skip_related_queries(self):
+        self.create_tasks(5)
+        full_count, _ = self.count_queries(reverse('task-list'))
+        sparse_count, response = self.count_queries(
+            reverse('task-list') + '?fields=id,description,status,due_date')
+
+        self.assertLess(sparse_count, full_count)
+        self.assertEqual(set(response.data[0]), {'id', 'description', 'status', 'due_date'})
+
+    def test_expand_on_user_and_team_tasks(self):
+        self.create_tasks(2)
+        _, response = self.count_queries(
+            reverse('task-user-and-team-tasks') + '?fields=id&expand=team_name')
+        self.assertEqual(set(response.data['team_tasks'][0]), {'id', 'team_name'})
+
+
+class BulkTaskTests(TestCase):
+    """Bulk task create, update and status change"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = UserAccount.objects.create_user(
+            email='owner@example.com', password='testpass123', name='Team Owner')
+        self.member = UserAccount.objects.create_user(
+            email='member@example.com', password='testpass123', name='Team Member')
+        self.outsider = UserAccount.objects.create_user(
+            email='outsider@example.com', password='testpass123', name='Outsider')
+        self.team = Team.objects.create(name='Test Team', created_by=self.owner)
+        TeamMembership.objects.create(user=self.owner, team=self.team, role='owner')
+        TeamMembership.objects.create(user=self.member, team=self.team, role='member')
+
+        self.due = (date.today() + timedelta(days=7)).isoformat()
+        self.bulk_url = reverse('task-bulk')
+        self.status_url = reverse('task-bulk-status')
+        self.client.force_authenticate(user=self.owner)
+
+    def make_items(self, count):
+        return [
+            {'description': f'Step {i}', 'team': self.team.id,
+             'assigned_to': self.member.id if i % 2 else self.owner.id, 'due_date': self.due}
+            for i in range(count)
+        ]
+
+    def test_bulk_create_query_count_is_constant(self):
+        # Warm the cached team roles so both batches start from the same state
+        self.client.post(self.bulk_url, self.make_items(1), format='json')
+
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.post(self.bulk_url, self.make_items(3), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(self.bulk_url, self.make_items(60), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 60)
+        self.assertEqual(Task.objects.count(), 64)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_bulk_create_reports_item_errors_and_writes_nothing(self):
+        items = self.make_items(3)
+        items[1]['assigned_to'] = self.outsider.id
+        items[2]['due_date'] = 'not a date'
+        response = self.client.post(self.bulk_url, items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['errors']
+        self.assertIsNone(errors[0])
+        self.assertIn('assigned_to', errors[1])
+        self.assertIn('due_date', errors[2])
+        self.assertFalse(Task.objects.exists())
+
+    def test_member_cannot_bulk_assign_others(self):
+        self.client.force_authenticate(user=self.member)
+        items = self.make_items(2)
+        response = self.client.post(self.bulk_url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIsNotNone(response.data['errors'][0])
+        self.assertFalse(Task.objects.exists())
+
+    def test_bulk_update(self):
+        self.client.post(self.bulk_url, self.make_items(4), format='json')
+        tasks = list(Task.objects.order_by('id'))
+        items = [{'id': task.id, 'status': 'in_progress'} for task in tasks]
+        items[0]['description'] = 'Renamed'
+
+        response = self.client.patch(self.bulk_url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Task.objects.filter(status='in_progress').count(), 4)
+        self.assertEqual(Task.objects.get(id=tasks[0].id).description, 'Renamed')
+
+    def test_bulk_update_unknown_task(self):
+        response = self.client.patch(self.bulk_url, [{'id': 999999, 'status': 'complete'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data['errors']), 1)
+
+    def test_bulk_status(self):
+        self.client.post(self.bulk_url, self.make_items(5), format='json')
+        ids = list(Task.objects.values_list('id', flat=True))
+
+        response = self.client.post(self.status_url, {'ids': ids, 'status': 'complete'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 5)
+        self.assertEqual(Task.objects.filter(status='complete').count(), 5)
+
+    def test_bulk_status_requires_write_access(self):
+        self.client.post(self.bulk_url, self.make_items(2), format='json')
+        ids = list(Task.objects.values_list('id', flat=True))
+
+        self.client.force_authenticate(user=self.member)
+        response = self.client.post(self.status_url, {'ids': ids, 'status': 'complete'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data['errors']), 2)
+        self.assertFalse(Task.objects.filter(status='complete').exists())
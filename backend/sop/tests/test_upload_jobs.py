@@ -0,0 +1,157 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from sop.models import Document, DriveCredential, Team, TeamMembership, UploadJob, UserAccount
+from sop.services.drive_credentials import store_credentials
+from sop.services.upload_jobs import run_upload_job
+
+
+class InlineExecutor:
+    """Runs submitted jobs immediately on the test thread"""
+
+    def submit(self, func, *args):
+        run_upload_job(*args)
+
+
+class UploadJobTest(TestCase):
+    """Background document uploads with status polling"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings_override = override_settings(UPLOAD_JOB_DIR=self.directory.name, UPLOAD_JOB_BACKEND='local')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.owner = UserAccount.objects.create_user(email='owner@example.com', password='testpassword', name='Owner')
+        self.other = UserAccount.objects.create_user(email='other@example.com', password='testpassword', name='Other')
+        self.team = Team.objects.create(name='Team', created_by=self.owner)
+        TeamMembership.objects.create(user=self.owner, team=self.team, role='owner')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.owner)
+        session = self.client.session
+        session['google_drive_credentials'] = json.dumps({'access_token': 'token'})
+        session.save()
+        self.url = reverse('google_drive_upload')
+
+        executor_patch = patch('sop.services.upload_jobs.get_local_executor', return_value=InlineExecutor())
+        executor_patch.start()
+        self.addCleanup(executor_patch.stop)
+
+    def submit(self, **data):
+        payload = {'title': 'Async SOP', 'team_id': self.team.id, 'async': 'true'}
+        payload.update(data)
+        return self.client.post(self.url, payload, format='multipart')
+
+    @patch('sop.services.upload_jobs.GoogleDriveService')
+    def test_async_upload_returns_job_and_creates_document(self, mock_service):
+        def upload_document(**kwargs):
+            kwargs['progress'](0.5)
+            return {'file_id': 'drive-id', 'file_url': 'https://docs.google.com/document/d/drive-id/edit'}
+        mock_service.return_value.__enter__.return_value.upload_document.side_effect = upload_document
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.submit(text_content='<p>Body</p>', content_type='html')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = UploadJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual(job.status, UploadJob.Status.QUEUED)
+        self.assertFalse(Document.objects.exists())
+
+        for callback in callbacks:
+            callback()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, UploadJob.Status.SUCCEEDED)
+        self.assertEqual(job.progress, 100)
+        # The owner's stored credentials are used; the job keeps no copy
+        mock_service.assert_called_once_with(DriveCredential.objects.get(user=self.owner).credentials)
+        document = Document.objects.get()
+        self.assertEqual(document.google_drive_file_id, 'drive-id')
+        self.assertEqual(document.team, self.team)
+
+        status_response = self.client.get(response.data['status_url'])
+        self.assertEqual(status_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(status_response.data['status'], 'succeeded')
+        self.assertEqual(status_response.data['document']['id'], document.id)
+
+    @patch('sop.services.upload_jobs.GoogleDriveService')
+    def test_failed_upload_is_reported_and_payload_removed(self, mock_service):
+        stored_during_upload = []
+
+        def upload_document(**kwargs):
+            stored_during_upload.extend(name for _, _, names in os.walk(self.directory.name) for name in names)
+            raise RuntimeError('Drive unavailable')
+        mock_service.return_value.__enter__.return_value.upload_document.side_effect = upload_document
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.submit(file=SimpleUploadedFile('steps.txt', b'Step 1'))
+
+        job = UploadJob.objects.get(pk=response.data['job_id'])
+        self.assertEqual(job.status, UploadJob.Status.FAILED)
+        self.assertIn('Drive unavailable', job.error)
+        self.assertFalse(Document.objects.exists())
+        # The payload was written to the configured directory, then removed
+        self.assertEqual(stored_during_upload, ['steps.txt'])
+        stored = [name for _, _, names in os.walk(self.directory.name) for name in names]
+        self.assertEqual(stored, [])
+
+    @patch('sop.services.upload_jobs.GoogleDriveService')
+    def test_job_runs_once(self, mock_service):
+        mock_service.return_value.__enter__.return_value.upload_document.return_value = {'file_id': 'id', 'file_url': 'https://example.com'}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.submit(text_content='Body')
+
+        run_upload_job(response.data['job_id'])
+        self.assertEqual(mock_service.return_value.__enter__.return_value.upload_document.call_count, 1)
+        self.assertEqual(Document.objects.count(), 1)
+
+    @patch('sop.services.upload_jobs.GoogleDriveService')
+    def test_job_abandoned_by_a_crashed_worker_is_reclaimed(self, mock_service):
+        mock_service.return_value.__enter__.return_value.upload_document.return_value = {'file_id': 'id', 'file_url': 'https://example.com'}
+        store_credentials(self.owner, '{}')
+        job = UploadJob.objects.create(owner=self.owner, title='SOP', text_content='Body')
+        UploadJob.objects.filter(pk=job.pk).update(status=UploadJob.Status.RUNNING, updated_at=timezone.now())
+
+        # Still reporting progress: a redelivery leaves it alone
+        run_upload_job(job.pk)
+        mock_service.assert_not_called()
+
+        stale = timezone.now() - timedelta(seconds=settings.UPLOAD_JOB_STALE_AFTER + 1)
+        UploadJob.objects.filter(pk=job.pk).update(updated_at=stale)
+        run_upload_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, UploadJob.Status.SUCCEEDED)
+        self.assertEqual(Document.objects.count(), 1)
+
+    def test_other_users_cannot_see_job(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.submit(text_content='Body')
+
+        self.client.force_authenticate(user=self.other)
+        status_response = self.client.get(reverse('upload_job_status', args=[response.data['job_id']]))
+        self.assertEqual(status_response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @patch('sop.services.upload_jobs.GoogleDriveService')
+    def test_job_fails_without_stored_credentials(self, mock_service):
+        job = UploadJob.objects.create(owner=self.other, title='SOP', text_content='Body')
+
+        run_upload_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, UploadJob.Status.FAILED)
+        self.assertIn('Not authenticated with Google Drive', job.error)
+        mock_service.assert_not_called()
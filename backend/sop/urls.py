@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TeamViewSet, UsersInSameTeamView, TaskViewSet, GoogleDriveLoginView, GoogleDriveCallbackView, ListDriveFilesView, GoogleDriveUploadView, DocumentViewSet, GoogleDriveFileContentView, GenerateSOPView, SummariseSOPView, ImproveSOPView, DocumentDeleteView, DocumentReviewDateUpdateView
+from .views import TeamViewSet, UsersInSameTeamView, TaskViewSet, GoogleDriveLoginView, GoogleDriveCallbackView, ListDriveFilesView, GoogleDriveUploadView, DocumentViewSet, GoogleDriveFileContentView, GenerateSOPView, SummariseSOPView, ImproveSOPView, AsyncGenerateSOPView, AsyncSummariseSOPView, AsyncImproveSOPView, AIStatsView, DocumentDeleteView, DocumentReviewDateUpdateView, DashboardView, UploadJobStatusView, DriveSyncView, GoogleDriveBatchUploadView
 
 router = DefaultRouter()
 router.register(r'teams', TeamViewSet, basename='team')
@@ -9,15 +9,24 @@ router.register(r'documents', DocumentViewSet, basename='document')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
     path('teams/<int:team_id>/users-in-same-team/', UsersInSameTeamView.as_view(), name='users-in-same-team'),
     path('google-drive/login/', GoogleDriveLoginView.as_view(), name='google_drive_login'),
     path('google-drive/callback/', GoogleDriveCallbackView.as_view(), name='google_drive_callback'),
     path('google-drive/files/', ListDriveFilesView.as_view(), name='list_drive_files'),
     path('google-drive/upload/', GoogleDriveUploadView.as_view(), name='google_drive_upload'),
+    path('google-drive/upload-batch/', GoogleDriveBatchUploadView.as_view(), name='google_drive_batch_upload'),
+    path('google-drive/upload-jobs/<uuid:job_id>/', UploadJobStatusView.as_view(), name='upload_job_status'),
+    path('google-drive/sync/', DriveSyncView.as_view(), name='google_drive_sync'),
     path('google-drive/file-content/<int:document_id>/', GoogleDriveFileContentView.as_view(), name='google_drive_file_content'),
     path('generate-sop/', GenerateSOPView.as_view(), name='generate_sop'),
     path('summarise-sop/', SummariseSOPView.as_view(), name='summarise_sop'),
     path('improve-sop/', ImproveSOPView.as_view(), name='improve_sop'),
+    # Same endpoints as async views, for deployments served by an ASGI server
+    path('async/generate-sop/', AsyncGenerateSOPView.as_view(), name='async_generate_sop'),
+    path('async/summarise-sop/', AsyncSummariseSOPView.as_view(), name='async_summarise_sop'),
+    path('async/improve-sop/', AsyncImproveSOPView.as_view(), name='async_improve_sop'),
+    path('ai/stats/', AIStatsView.as_view(), name='ai_stats'),
     path('documents/<int:document_id>/delete/', DocumentDeleteView.as_view(), name='document-delete'),
     path('documents/<int:document_id>/update-review/', DocumentReviewDateUpdateView.as_view(), name='update_document_review'),
     ]
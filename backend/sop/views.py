@@ -1,32 +1,49 @@
 # Disclaimer: Portions of this code were modified from Django and React tutorials to fit the requirements of the project (see requirements tutorials section).
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.sites.shortcuts import get_current_site
+from django.core.cache import cache
 from django.core.mail import send_mail
-from django.db.models import Q 
+from django.db import transaction
+from django.db.models import Q, Count, Prefetch, prefetch_related_objects
 from django.http import JsonResponse, HttpResponse
 from django.shortcuts import  redirect, get_object_or_404
-from django.utils.dateparse import parse_datetime
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.utils.decorators import method_decorator
 from django.views import View
-from pydrive2.auth import GoogleAuth
-from pydrive2.drive import GoogleDrive
-from oauth2client.client import OAuth2Credentials
-from openai import OpenAI
 from rest_framework import status, generics, viewsets, permissions
 from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, BasePermission
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, BasePermission
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from sop.serializers import UserCreateSerializer, DocumentSerializer
-from .models import UserAccount, Team, TeamMembership, Task, Document
+from .models import UserAccount, Team, TeamMembership, Task, Document, UploadJob, DriveSyncState
+from .pagination import TaskCursorPagination, DocumentCursorPagination, TeamCursorPagination
 from .permissions import IsTeamMemberOrTaskOwner
-from .serializers import TeamSerializer, TaskSerializer
-from .services.google_drive_service import GoogleDriveService
-from .helpers.permission_helpers import validate_team_membership
-
+from .serializers import TeamSerializer, TaskSerializer, UploadJobSerializer
+from .services.openai_client import create_completion, acreate_completion, openai_latency
+from .services.summarisation import map_reduce_params, amap_reduce_params
+from .services.google_drive_service import GoogleDriveService, batch_delete_files, upload_documents, with_backoff
+from .services.ai_cache import get_ai_cache
+from .services.content_cache import get_content_cache
+from .services.drive_clients import drive_client_pool, new_google_auth, export_session
+from .services.drive_credentials import get_drive_credentials, store_credentials
+from .services.drive_sync import sync_drive_changes
+from .services.upload_jobs import enqueue_upload_job
+from .helpers.conditional import ConditionalGetMixin, conditional_response
+from .helpers.streaming import (
+    is_true, request_flag, wants_stream, stream_completion, stream_text, astream_completion, astream_text
+)
+from .helpers.permission_helpers import validate_team_membership, get_team_role, is_team_owner, reset_team_roles
+
+import json
 import logging
-import requests
+from datetime import timedelta
+from functools import partial
 
 # Initialize Django's logging system
 logger = logging.getLogger(__name__)
@@ -34,6 +51,11 @@ logger = logging.getLogger(__name__)
 # Get the user model specified in settings
 User = get_user_model()
 
+# Drive root listing: files per page (Drive allows up to 1000) and the cache key per account/page
+DRIVE_FILES_PAGE_SIZE = 100
+DRIVE_FILES_MAX_PAGE_SIZE = 1000
+DRIVE_FILES_CACHE_KEY = 'drive_files:{account}:{page_token}:{page_size}'
+
 # Prompt template for OpenAI API to generate SOPs with the correct format
 GENERATION_PROMPT = """Generate a Standard Operating Procedure (SOP) in a formal manner with relevant sections and detailed steps.
 
@@ -57,7 +79,7 @@ The SOP should be formatted in structured paragraphs under each section heading.
 - Adjust language and terminology according to the specific industry or organization where the SOP will be used.
 - Ensure the SOP is comprehensive and can be followed by someone unfamiliar with the process."""
 
-class TeamViewSet(viewsets.ModelViewSet):
+class TeamViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for Team model operations.
     Provides CRUD operations with permission checks.
@@ -65,13 +87,17 @@ class TeamViewSet(viewsets.ModelViewSet):
     queryset = Team.objects.all()
     serializer_class = TeamSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TeamCursorPagination
 
     def get_queryset(self):
         """
         Only return teams the current user belongs to.
         """
         user = self.request.user
-        return Team.objects.filter(team_memberships__user=user)
+        queryset = Team.objects.filter(team_memberships__user=user)
+        if self.action in ('list', 'retrieve'):
+            queryset = TeamSerializer.setup_eager_loading(queryset, self.get_serializer().fields)
+        return queryset
 
     def perform_create(self, serializer):
         """
@@ -86,21 +112,16 @@ class TeamViewSet(viewsets.ModelViewSet):
             team=team,
             role='owner'
         )
+        # The creator's memberships changed during this request
+        reset_team_roles(self.request)
 
     def perform_destroy(self, instance):
         """Only allow team owners to delete teams.
         Raises PermissionDenied if non-owner attempts deletion."""
         # Check if the requesting user is the owner
-        is_owner = TeamMembership.objects.filter(
-            user=self.request.user, 
-            team=instance, 
-            role='owner'
-        ).exists()
-        
-        if is_owner:
+        if is_team_owner(self.request, instance):
             instance.delete()
         else:
-            from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("Only team owners can delete a team.")
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
@@ -118,12 +139,11 @@ class TeamViewSet(viewsets.ModelViewSet):
         role = request.data.get('role', 'member')  # Default role is 'member'
 
         # Check if the requesting user is a team owner
-        try:
-            membership = TeamMembership.objects.get(team=team, user=request.user)
-            if membership.role != 'owner':
-                return Response({'error': 'Only team owners can invite members.'}, status=status.HTTP_403_FORBIDDEN)
-        except TeamMembership.DoesNotExist:
+        role_in_team = get_team_role(request, team)
+        if role_in_team is None:
             return Response({'error': 'You are not a member of this team.'}, status=status.HTTP_403_FORBIDDEN)
+        if role_in_team != 'owner':
+            return Response({'error': 'Only team owners can invite members.'}, status=status.HTTP_403_FORBIDDEN)
 
         # Validate the role
         if role not in dict(TeamMembership.ROLE_CHOICES):
@@ -185,9 +205,7 @@ class TeamViewSet(viewsets.ModelViewSet):
         team = self.get_object()
 
         # ✅ Ensure the requesting user is the owner
-        is_owner = TeamMembership.objects.filter(user=request.user, team=team, role='owner').exists()
-        
-        if not is_owner:
+        if not is_team_owner(request, team):
             return Response({'error': 'Only the team owner can update member roles'}, status=status.HTTP_403_FORBIDDEN)
 
         user_id = request.data.get('user_id')
@@ -215,7 +233,7 @@ class TeamViewSet(viewsets.ModelViewSet):
         team = self.get_object()
 
         # Check if the requesting user is the owner
-        if not TeamMembership.objects.filter(user=request.user, team=team, role='owner').exists():
+        if not is_team_owner(request, team):
             return Response({'error': 'Only the team owner can remove members'}, status=status.HTTP_403_FORBIDDEN)
 
         user_id = request.data.get('user_id')
@@ -236,14 +254,15 @@ class TeamViewSet(viewsets.ModelViewSet):
 class IsTeamOwner(BasePermission):
     """ Custom permission: Only team owners can edit roles or remove members. """
     def has_object_permission(self, request, view, obj):
-        return TeamMembership.objects.filter(user=request.user, team=obj, role='owner').exists()
+        return is_team_owner(request, obj)
 
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for managing tasks with proper filtering"""
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated, IsTeamMemberOrTaskOwner]
+    pagination_class = TaskCursorPagination
     
     def get_queryset(self):
         """
@@ -282,28 +301,244 @@ class TaskViewSet(viewsets.ModelViewSet):
         due_after = self.request.query_params.get('due_after', None)
         if due_after is not None:
             queryset = queryset.filter(due_date__gte=due_after)
+
+        # Load related rows for serialization in a fixed number of queries
+        if self.action in ('list', 'retrieve'):
+            queryset = TaskSerializer.setup_eager_loading(queryset, self.get_serializer().fields)
         
         return queryset
     
-    def perform_create(self, serializer):
-        user = self.request.user
-        team = serializer.validated_data.get('team')
-        assigned_to = serializer.validated_data.get('assigned_to')
+    # Largest number of tasks accepted by one bulk request
+    bulk_limit = 500
 
+    def check_assignment(self, team, assigned_to):
+        """
+        Check the requester may create a task in the team for the assignee
+
+        Raises PermissionDenied if they are not a member of the team, or
+        assign someone else without owning it.
+        """
         if team:
-            try:
-                membership = TeamMembership.objects.get(user=user, team=team)
-            except TeamMembership.DoesNotExist:
-                from rest_framework.exceptions import PermissionDenied
+            role = get_team_role(self.request, team)
+            if role is None:
                 raise PermissionDenied("You are not a member of the selected team.")
 
             # Only allow assigning to others if requester is team owner
-            if assigned_to and assigned_to != user:
-                if membership.role != 'owner':
-                    from rest_framework.exceptions import PermissionDenied
+            if assigned_to and assigned_to != self.request.user:
+                if role != 'owner':
                     raise PermissionDenied("Only team owners can assign tasks to other members.")
 
+    def perform_create(self, serializer):
+        self.check_assignment(
+            serializer.validated_data.get('team'),
+            serializer.validated_data.get('assigned_to')
+        )
         serializer.save()
+
+    def get_bulk_items(self, request):
+        """Return the list of items in a bulk request body, or an error Response"""
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return None, Response({'error': 'Expected a non-empty list of tasks'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.bulk_limit:
+            return None, Response(
+                {'error': f'A bulk request may contain at most {self.bulk_limit} tasks'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not all(isinstance(item, dict) for item in items):
+            return None, Response({'error': 'Each task must be an object'}, status=status.HTTP_400_BAD_REQUEST)
+        return items, None
+
+    def get_bulk_context(self, items, tasks=()):
+        """
+        Preload every team, user and membership a batch refers to
+
+        One query per model replaces the per-item foreign key lookups and
+        membership checks that TaskSerializer would otherwise run.
+        """
+        def to_pk(value):
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return None
+
+        team_ids = {to_pk(item.get('team')) for item in items}
+        user_ids = {to_pk(item.get('assigned_to')) for item in items}
+        for task in tasks:
+            team_ids.add(task.team_id)
+            user_ids.add(task.assigned_to_id)
+        team_ids.discard(None)
+        user_ids.discard(None)
+
+        teams = Team.objects.in_bulk(team_ids)
+        users = User.objects.in_bulk(user_ids)
+        team_member_pairs = set(
+            TeamMembership.objects.filter(team_id__in=list(teams), user_id__in=list(users))
+            .values_list('team_id', 'user_id')
+        ) if teams and users else set()
+
+        context = self.get_serializer_context()
+        context['related_cache'] = {Team: teams, User: users}
+        context['team_member_pairs'] = team_member_pairs
+        return context
+
+    def bulk_response(self, tasks, success_status):
+        """Serialize the written tasks with their related rows loaded in bulk"""
+        prefetch_related_objects(
+            tasks,
+            Prefetch('team__team_memberships', queryset=TeamMembership.objects.select_related('user'))
+        )
+        return Response(TaskSerializer(tasks, many=True, context=self.get_serializer_context()).data, status=success_status)
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Create (POST) or update (PATCH) a list of tasks in one request
+
+        The batch is validated as a whole and written with a single
+        bulk_create/bulk_update inside one transaction. If any item is
+        invalid nothing is written and the response lists the errors of
+        each item by position (null for valid items).
+        """
+        items, error_response = self.get_bulk_items(request)
+        if error_response:
+            return error_response
+
+        if request.method == 'POST':
+            return self.bulk_create(items)
+        return self.bulk_update(items)
+
+    def bulk_create(self, items):
+        context = self.get_bulk_context(items)
+        errors = []
+        tasks = []
+
+        for item in items:
+            serializer = TaskSerializer(data=item, context=context)
+            if not serializer.is_valid():
+                errors.append(serializer.errors)
+                continue
+            try:
+                self.check_assignment(
+                    serializer.validated_data.get('team'),
+                    serializer.validated_data.get('assigned_to')
+                )
+            except PermissionDenied as exc:
+                errors.append({'detail': exc.detail})
+                continue
+            errors.append(None)
+            tasks.append(Task(**serializer.validated_data))
+
+        if any(errors):
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            tasks = Task.objects.bulk_create(tasks)
+        return self.bulk_response(tasks, status.HTTP_201_CREATED)
+
+    def bulk_update(self, items):
+        ids = [item.get('id') for item in items]
+        try:
+            ids = [int(task_id) for task_id in ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'Each task must include its integer id'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(set(ids)) != len(ids):
+            return Response({'error': 'Each task may only appear once'}, status=status.HTTP_400_BAD_REQUEST)
+
+        existing = Task.objects.in_bulk(ids)
+        context = self.get_bulk_context(items, existing.values())
+        permission = IsTeamMemberOrTaskOwner()
+        errors = []
+        tasks = []
+        changed_fields = set()
+
+        for task_id, item in zip(ids, items):
+            task = existing.get(task_id)
+            if task is None or not permission.has_object_permission(self.request, self, task):
+                errors.append({'detail': 'Not found.'} if task is None else
+                              {'detail': 'You do not have permission to update this task.'})
+                continue
+
+            # Validate the merged task so cross-field rules see the full row
+            data = {
+                'description': task.description,
+                'assigned_to': task.assigned_to_id,
+                'team': task.team_id,
+                'due_date': task.due_date,
+                'status': task.status,
+            }
+            data.update({key: value for key, value in item.items() if key != 'id'})
+            serializer = TaskSerializer(task, data=data, context=context)
+            if not serializer.is_valid():
+                errors.append(serializer.errors)
+                continue
+
+            validated = serializer.validated_data
+            if validated.get('team') and validated.get('team').pk != task.team_id:
+                try:
+                    self.check_assignment(validated.get('team'), validated.get('assigned_to'))
+                except PermissionDenied as exc:
+                    errors.append({'detail': exc.detail})
+                    continue
+
+            errors.append(None)
+            for field, value in validated.items():
+                setattr(task, field, value)
+            changed_fields.update(validated)
+            tasks.append(task)
+
+        if any(errors):
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        # bulk_update skips auto_now, so stamp updated_at for the ETag validators
+        now = timezone.now()
+        for task in tasks:
+            task.updated_at = now
+        with transaction.atomic():
+            Task.objects.bulk_update(tasks, sorted(changed_fields) + ['updated_at'])
+        return self.bulk_response(tasks, status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request):
+        """
+        Set the status of several tasks with one UPDATE
+
+        Expects {"ids": [...], "status": "..."}. If any task is missing or
+        not writable by the user nothing is changed.
+        """
+        new_status = request.data.get('status')
+        ids = request.data.get('ids')
+        if new_status not in Task.Status.values:
+            return Response(
+                {'status': f"Status must be one of: {', '.join(Task.Status.values)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not isinstance(ids, list) or not ids or len(ids) > self.bulk_limit:
+            return Response(
+                {'ids': f'Expected a list of 1 to {self.bulk_limit} task ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            ids = [int(task_id) for task_id in ids]
+        except (TypeError, ValueError):
+            return Response({'ids': 'Task ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        existing = Task.objects.in_bulk(ids)
+        permission = IsTeamMemberOrTaskOwner()
+        errors = {}
+        for task_id in ids:
+            task = existing.get(task_id)
+            if task is None:
+                errors[task_id] = 'Not found.'
+            elif not permission.has_object_permission(request, self, task):
+                errors[task_id] = 'You do not have permission to update this task.'
+
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            updated = Task.objects.filter(id__in=ids).update(status=new_status, updated_at=timezone.now())
+        return Response({'updated': updated, 'status': new_status})
     
     @action(detail=False, methods=['get'], url_path='user-and-team-tasks')
     def user_and_team_tasks(self, request):
@@ -331,13 +566,33 @@ class TaskViewSet(viewsets.ModelViewSet):
             user_tasks_query = Task.objects.none()  # No personal tasks when filtering by team
             team_tasks_query = team_tasks_query.filter(team_id=team_id)
         
-        user_tasks = TaskSerializer(user_tasks_query, many=True).data
-        team_tasks = TaskSerializer(team_tasks_query, many=True).data
-        
-        return Response({
-            'user_tasks': user_tasks,
-            'team_tasks': team_tasks
-        })
+        # Honour ?fields= / ?expand= and only load what those fields need
+        context = self.get_serializer_context()
+        field_names = TaskSerializer(context=context).fields
+        user_tasks_query = TaskSerializer.setup_eager_loading(user_tasks_query, field_names)
+        team_tasks_query = TaskSerializer.setup_eager_loading(team_tasks_query, field_names)
+
+        def build_response():
+            # Each list pages independently when the client opts in to pagination
+            user_paginator = TaskCursorPagination(cursor_query_param='user_cursor')
+            team_paginator = TaskCursorPagination(cursor_query_param='team_cursor')
+            if user_paginator.is_requested(request) or team_paginator.is_requested(request):
+                user_page = user_paginator.get_page(user_tasks_query, request)
+                team_page = team_paginator.get_page(team_tasks_query, request)
+                return Response({
+                    'user_tasks': user_paginator.get_paginated_data(TaskSerializer(user_page, many=True, context=context).data),
+                    'team_tasks': team_paginator.get_paginated_data(TaskSerializer(team_page, many=True, context=context).data)
+                })
+
+            user_tasks = TaskSerializer(user_tasks_query, many=True, context=context).data
+            team_tasks = TaskSerializer(team_tasks_query, many=True, context=context).data
+
+            return Response({
+                'user_tasks': user_tasks,
+                'team_tasks': team_tasks
+            })
+
+        return conditional_response(request, [user_tasks_query, team_tasks_query], build_response)
     
 class UsersInSameTeamView(generics.ListAPIView):
     serializer_class = UserCreateSerializer
@@ -348,18 +603,96 @@ class UsersInSameTeamView(generics.ListAPIView):
         return UserAccount.objects.filter(team_memberships__team_id=team_id)
     
 
+class DashboardView(APIView):
+    """
+    API endpoint with aggregated dashboard figures for the current user.
+
+    Every figure is a conditional COUNT computed in the database, so the
+    response size and cost stay flat however many tasks and documents exist.
+    """
+    permission_classes = [IsAuthenticated]
+    max_review_days = 365
+
+    def get(self, request):
+        """Return task, document and team counts for the dashboard"""
+        user = request.user
+        today = timezone.now().date()
+
+        try:
+            review_days = int(request.query_params.get('review_days', 14))
+        except ValueError:
+            return Response({'error': 'review_days must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= review_days <= self.max_review_days:
+            return Response(
+                {'error': f'review_days must be between 0 and {self.max_review_days}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        open_task = ~Q(status=Task.Status.COMPLETE)
+        task_counts = {
+            'total': Count('id'),
+            'not_started': Count('id', filter=Q(status=Task.Status.NOT_STARTED)),
+            'in_progress': Count('id', filter=Q(status=Task.Status.IN_PROGRESS)),
+            'complete': Count('id', filter=Q(status=Task.Status.COMPLETE)),
+            'overdue': Count('id', filter=open_task & Q(due_date__lt=today)),
+            'due_this_week': Count(
+                'id', filter=open_task & Q(due_date__gte=today, due_date__lte=today + timedelta(days=7))
+            ),
+        }
+
+        # Personal tasks match the user_tasks list of user_and_team_tasks
+        personal_tasks = Task.objects.filter(assigned_to=user, team__isnull=True).aggregate(**task_counts)
+
+        # One grouped row per team the user belongs to
+        team_tasks = list(
+            Task.objects.filter(team__team_memberships__user=user)
+            .values('team_id', 'team__name')
+            .annotate(**task_counts)
+            .order_by('team__name', 'team_id')
+        )
+        for row in team_tasks:
+            row['team_name'] = row.pop('team__name')
+
+        documents = Document.objects.filter(
+            Q(team__in=user.teams.all()) | Q(owner=user, team__isnull=True)
+        ).aggregate(
+            total=Count('id'),
+            review_due=Count(
+                'id', filter=Q(review_date__gte=today, review_date__lte=today + timedelta(days=review_days))
+            ),
+            review_overdue=Count('id', filter=Q(review_date__lt=today)),
+        )
+        documents['review_window_days'] = review_days
+
+        teams = TeamMembership.objects.filter(user=user).aggregate(
+            total=Count('id'),
+            owned=Count('id', filter=Q(role='owner')),
+        )
+
+        return Response({
+            'tasks': {
+                'personal': personal_tasks,
+                'teams': team_tasks,
+            },
+            'documents': documents,
+            'teams': teams,
+        })
+
+
 class GoogleDriveLoginView(View):
     def get(self, request, *args, **kwargs):
         """
         Initiate OAuth flow with Google Drive.
         """
-        gauth = GoogleAuth()
-        gauth.DEFAULT_SETTINGS['client_config_file'] = settings.GOOGLE_CLIENT_SECRETS_FILE
-        gauth.LoadClientConfigFile(settings.GOOGLE_CLIENT_SECRETS_FILE)
+        # Client config is read from disk once per process
+        gauth = new_google_auth(load_client_config=True)
 
         # Force the correct web-based flow
         gauth.GetFlow()
         gauth.flow.redirect_uri = "http://localhost:8000/api/google-drive/callback/"  # This must match the authorized redirect URI
+        # Always show the consent screen, as Google only returns a refresh token on consent
+        gauth.flow.params.pop('approval_prompt', None)
+        gauth.flow.params['prompt'] = 'consent'
         auth_url = gauth.flow.step1_get_authorize_url()
         #return redirect(auth_url)
         return JsonResponse({ "auth_url": auth_url })
@@ -376,36 +709,68 @@ class GoogleDriveCallbackView(View):
         if not code:
             return HttpResponse("Error: No authorization code provided", status=400)
         
-        gauth = GoogleAuth()
-        gauth.DEFAULT_SETTINGS['client_config_file'] = settings.GOOGLE_CLIENT_SECRETS_FILE
+        gauth = new_google_auth(load_client_config=True)
         
         # Exchange the code for credentials
         gauth.Auth(code=code)
         
         # Save the credentials (as JSON) in the session
         request.session['google_drive_credentials'] = gauth.credentials.to_json()
+
+        # Keep them in the credential store too when the user is known
+        if request.user.is_authenticated:
+            store_credentials(request.user, request.session['google_drive_credentials'])
         
         return redirect("http://localhost:3000/google-auth-callback?drive_auth=success")
 
 class ListDriveFilesView(View):
+    """
+    List the files in the user's Drive root one page at a time
+
+    Query params: page_token (from the previous page), page_size and
+    refresh=true to bypass the short-lived per-account cache.
+    """
+
     def get(self, request, *args, **kwargs):
-        creds_json = request.session.get('google_drive_credentials')
+        creds_json = get_drive_credentials(request)
         if not creds_json:
             return HttpResponse("Not authenticated with Google Drive", status=401)
-        
-        gauth = GoogleAuth()
-        gauth.DEFAULT_SETTINGS['client_config_file'] = settings.GOOGLE_CLIENT_SECRETS_FILE
-        
-        # Load the credentials using from_json, which returns an OAuth2Credentials instance.
-        credentials = OAuth2Credentials.from_json(creds_json)
-        gauth.credentials = credentials
-        
-        drive = GoogleDrive(gauth)
-        file_list = drive.ListFile({'q': "'root' in parents and trashed=false"}).GetList()
-        files = [{"id": f['id'], "title": f['title']} for f in file_list]
-        
-        return JsonResponse({"files": files})
-    
+
+        page_token = request.GET.get('page_token') or None
+        try:
+            page_size = min(int(request.GET.get('page_size', DRIVE_FILES_PAGE_SIZE)), DRIVE_FILES_MAX_PAGE_SIZE)
+        except ValueError:
+            return JsonResponse({"error": "page_size must be an integer."}, status=400)
+        if page_size < 1:
+            return JsonResponse({"error": "page_size must be positive."}, status=400)
+
+        cache_key = DRIVE_FILES_CACHE_KEY.format(
+            account=drive_client_pool.make_key(creds_json), page_token=page_token or '', page_size=page_size
+        )
+        if request.GET.get('refresh', '').lower() not in ('true', '1'):
+            page = cache.get(cache_key)
+            if page is not None:
+                return JsonResponse(page)
+
+        # One Drive call per page, returning only the fields we send back
+        try:
+            with drive_client_pool.client(creds_json) as client:
+                result = with_backoff(client.service.files().list(
+                    q="'root' in parents and trashed=false",
+                    maxResults=page_size,
+                    pageToken=page_token,
+                    fields='nextPageToken, items(id, title)',
+                ).execute, description='List files')
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        page = {
+            "files": [{"id": f['id'], "title": f['title']} for f in result.get('items', [])],
+            "next_page_token": result.get('nextPageToken'),
+        }
+        cache.set(cache_key, page, settings.GOOGLE_DRIVE_FILE_LIST_CACHE_TIMEOUT)
+        return JsonResponse(page)
+
 class GoogleDriveUploadView(APIView):
     """API endpoint for uploading documents to Google Drive."""
     permission_classes = [IsAuthenticated]
@@ -429,26 +794,45 @@ class GoogleDriveUploadView(APIView):
                 return Response({"error": "You must provide either a file or text content."}, status=status.HTTP_400_BAD_REQUEST)
             
             # Check if the user belongs to the specified team
-            team, error_response = validate_team_membership(request.user, team_id)
+            team, error_response = validate_team_membership(request, team_id)
             if error_response:
                 return error_response
             
-            # Get Google Drive credentials from session
-            creds_json = request.session.get('google_drive_credentials')
+            # Get Google Drive credentials (stored, or from the session)
+            creds_json = get_drive_credentials(request)
             if not creds_json:
                 return Response({"error": "Not authenticated with Google Drive."}, status=status.HTTP_401_UNAUTHORIZED)
+
+            # Async mode: persist the payload and let a background worker talk to Drive
+            if str(request.data.get('async', request.query_params.get('async', ''))).lower() in ('1', 'true'):
+                job = UploadJob.objects.create(
+                    owner=request.user,
+                    team=team,
+                    title=title,
+                    review_date=review_date if review_date else None,
+                    content_type=content_type or '',
+                    text_content=text_content or '',
+                    file=file_obj
+                )
+                enqueue_upload_job(job)
+                return Response({
+                    "job_id": str(job.pk),
+                    "status": job.status,
+                    "status_url": request.build_absolute_uri(reverse('upload_job_status', args=[job.pk]))
+                }, status=status.HTTP_202_ACCEPTED)
             
             # Upload document to Google Drive using service class
             try:
                 drive_service = GoogleDriveService(creds_json)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            with drive_service:
                 result = drive_service.upload_document(
                     title=title,
                     text_content=text_content,
                     file_obj=file_obj,
                     content_type=content_type
                 )
-            except ValueError as e:
-                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
             # Save metadata to database
             document = Document.objects.create(
@@ -470,12 +854,152 @@ class GoogleDriveUploadView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class GoogleDriveBatchUploadView(APIView):
+    """API endpoint for uploading several files to Google Drive in one request."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Upload every file in ``files`` with shared team_id and review_date settings
+
+        Optional ``titles`` (one per file) default to the file names. Files
+        go to Drive concurrently, all the Document rows are created with
+        one bulk insert, and each file gets its own result.
+        """
+        files = request.FILES.getlist('files')
+        titles = request.data.getlist('titles') if hasattr(request.data, 'getlist') else []
+        if not files:
+            return Response({"error": "At least one file is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(files) > settings.GOOGLE_DRIVE_MAX_FILES_PER_UPLOAD:
+            return Response(
+                {"error": f"At most {settings.GOOGLE_DRIVE_MAX_FILES_PER_UPLOAD} files can be uploaded at once."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if titles and len(titles) != len(files):
+            return Response({"error": "Provide one title per file."}, status=status.HTTP_400_BAD_REQUEST)
+
+        review_date = request.data.get('review_date') or None
+        if review_date is not None:
+            try:
+                review_date = parse_date(review_date)
+            except ValueError:
+                review_date = None
+            if review_date is None:
+                return Response({"error": "review_date must be a date (YYYY-MM-DD)."}, status=status.HTTP_400_BAD_REQUEST)
+
+        team, error_response = validate_team_membership(request, request.data.get('team_id'))
+        if error_response:
+            return error_response
+
+        creds_json = get_drive_credentials(request)
+        if not creds_json:
+            return Response({"error": "Not authenticated with Google Drive."}, status=status.HTTP_401_UNAUTHORIZED)
+
+        titles = [title or file_obj.name.rsplit('.', 1)[0] for title, file_obj in zip(titles or [None] * len(files), files)]
+        uploads = upload_documents(creds_json, [
+            {'title': title, 'file_obj': file_obj} for title, file_obj in zip(titles, files)
+        ])
+
+        documents = Document.objects.bulk_create([
+            Document(
+                title=title,
+                file_url=result['file_url'],
+                google_drive_file_id=result['file_id'],
+                owner=request.user,
+                team=team,
+                review_date=review_date
+            )
+            for title, result in zip(titles, uploads) if not isinstance(result, Exception)
+        ])
+
+        created = iter(DocumentSerializer(documents, many=True).data)
+        results = []
+        for file_obj, result in zip(files, uploads):
+            if isinstance(result, Exception):
+                results.append({"file": file_obj.name, "status": "error", "error": str(result)})
+            else:
+                results.append({"file": file_obj.name, "status": "created", "document": next(created)})
+        return Response({"results": results})
+
+
+class UploadJobStatusView(generics.RetrieveAPIView):
+    """API endpoint reporting the status and progress of a background upload"""
+    permission_classes = [IsAuthenticated]
+    serializer_class = UploadJobSerializer
+    lookup_url_kwarg = 'job_id'
+
+    def get_queryset(self):
+        # Users can only see their own jobs
+        return UploadJob.objects.filter(owner=self.request.user).select_related('document__owner', 'document__team')
+
+
+class DriveSyncView(APIView):
+    """API endpoint that applies the user's Drive changes feed to their documents"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        creds_json = get_drive_credentials(request)
+        if not creds_json:
+            return Response({'error': 'Not authenticated with Google Drive'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        state, _ = DriveSyncState.objects.get_or_create(user=request.user)
+        try:
+            counts = sync_drive_changes(state, creds_json)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error("Drive sync failed for user %s: %s", request.user.pk, e, exc_info=True)
+            return Response({'error': 'Failed to sync with Google Drive.'}, status=status.HTTP_502_BAD_GATEWAY)
+
+        return Response(dict(counts, last_synced_at=state.last_synced_at))
+
+
+def generation_params(prompt):
+    """Chat completion parameters for generating an SOP from a prompt"""
+    return dict(
+        model="gpt-4o",
+        messages=[
+            # System message with SOP format instructions
+            {"role": "developer", "content": GENERATION_PROMPT},
+            # User's specific request
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7, # Moderate creativity
+        max_tokens=1000 # Limit response length
+    )
+
+
+def summary_params(content):
+    """Chat completion parameters for summarising an SOP"""
+    return dict(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": "Summarise the following SOP as clearly and concisely as possible."},
+            {"role": "user", "content": content}
+        ],
+        max_tokens=300
+    )
+
+
+def improvement_params(content):
+    """Chat completion parameters for improving an SOP"""
+    return dict(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant that improves Standard Operating Procedures (SOPs) for clarity, formality, and tone."},
+            {"role": "user", "content": f"Please improve this SOP:\n\n{content}"}
+        ],
+        temperature=0.7,
+        max_tokens=1500
+    )
+
+
 class GenerateSOPView(APIView):
     """
     API endpoint for generating SOPs using OpenAI GPT.
     
-    Takes a user prompt and returns AI-generated SOP content.
-    Requires authentication.
+    Takes a user prompt and returns AI-generated SOP content, or streams
+    it as server-sent events when ``stream`` is set. Requires authentication.
     """
     permission_classes = [IsAuthenticated]
 
@@ -487,21 +1011,12 @@ class GenerateSOPView(APIView):
             return Response({'error': 'Prompt is required.'}, status=400)
 
         try:
-            # Initialize OpenAI client with API key from settings
-            client = OpenAI(api_key=settings.OPENAI_API_KEY)
-
             # Call the OpenAI API with SOP generation prompt
-            completion = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    # System message with SOP format instructions
-                    {"role": "developer", "content": GENERATION_PROMPT},
-                    # User's specific request
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7, # Moderate creativity
-                max_tokens=1000 # Limit response length
-            )
+            params = generation_params(prompt)
+            # Send the text as it is generated instead of waiting for all of it
+            if wants_stream(request):
+                return stream_completion('generate', **params)
+            completion = create_completion('generate', **params)
 
             # Extract the generated text from the response
             sop_text = completion.choices[0].message.content
@@ -512,29 +1027,63 @@ class GenerateSOPView(APIView):
             return Response({"error": f"OpenAI error: {str(e)}"}, status=500)
 
 
-class SummariseSOPView(APIView):
+class CachedCompletionMixin:
+    """
+    Serve repeated AI requests from the completion cache
+
+    Completions are cached by a hash of their model, prompts, content and
+    parameters, so the same request for unchanged content costs no API
+    call. ``refresh=true`` skips the lookup and stores the new result.
+    The X-AI-Cache header reports hit, miss or bypass. On a miss,
+    ``prepare`` can replace the parameters sent upstream, e.g. with those
+    of a final map-reduce pass, while the cache stays keyed by ``params``.
+    """
+    ai_endpoint = None  # Key of the endpoint's timeout in OPENAI_TIMEOUTS
+
+    def cached_completion(self, request, params, result_key, prepare=None):
+        ai_cache = get_ai_cache()
+        if request_flag(request, 'refresh'):
+            cache_status, text = 'bypass', None
+        else:
+            text = ai_cache.get(params)
+            cache_status = 'miss' if text is None else 'hit'
+
+        request_params = prepare() if text is None and prepare else params
+        if wants_stream(request):
+            if text is not None:
+                response = stream_text(text)
+            else:
+                response = stream_completion(
+                    self.ai_endpoint, on_complete=partial(ai_cache.set, params), **request_params
+                )
+        else:
+            if text is None:
+                completion = create_completion(self.ai_endpoint, **request_params)
+                text = completion.choices[0].message.content
+                ai_cache.set(params, text)
+            response = Response({result_key: text})
+
+        response['X-AI-Cache'] = cache_status
+        return response
+
+
+class SummariseSOPView(CachedCompletionMixin, APIView):
     permission_classes = [IsAuthenticated]
+    ai_endpoint = 'summarise'
 
     def post(self, request):
         content = request.data.get('content', '')
         if not content:
             return Response({'error': 'No content provided'}, status=400)
 
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "Summarise the following SOP as clearly and concisely as possible."},
-                {"role": "user", "content": content}
-            ],
-            max_tokens=300
-        )
-        summary = response.choices[0].message.content
-        return Response({'summary': summary})
+        # Long SOPs are summarised section by section, then merged
+        params = summary_params(content)
+        return self.cached_completion(request, params, 'summary', prepare=partial(map_reduce_params, content, params))
 
 
-class ImproveSOPView(APIView):
+class ImproveSOPView(CachedCompletionMixin, APIView):
     permission_classes = [IsAuthenticated]
+    ai_endpoint = 'improve'
 
     def post(self, request):
         content = request.data.get('content', '')
@@ -542,46 +1091,280 @@ class ImproveSOPView(APIView):
             return Response({'error': 'No content provided.'}, status=400)
 
         try:
-            client = OpenAI(api_key=settings.OPENAI_API_KEY)
-
-            completion = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that improves Standard Operating Procedures (SOPs) for clarity, formality, and tone."},
-                    {"role": "user", "content": f"Please improve this SOP:\n\n{content}"}
-                ],
-                temperature=0.7,
-                max_tokens=1500
-            )
-
-            improved = completion.choices[0].message.content
-            return Response({"improved": improved})
+            return self.cached_completion(request, improvement_params(content), 'improved')
 
         except Exception as e:
             return Response({"error": str(e)}, status=500)
 
 
+class AsyncCompletionView(View):
+    """
+    Async counterpart of the AI views, for deployments served over ASGI
+
+    The OpenAI call is awaited on the async client, so a slow completion
+    holds no worker thread while it runs and one process can serve many
+    generations alongside ordinary requests. Accepts the same JSON body,
+    ``stream`` and ``refresh`` options and returns the same responses as
+    the synchronous view it mirrors.
+    """
+    http_method_names = ['post', 'options']
+    ai_endpoint = None  # Key of the endpoint's timeout in OPENAI_TIMEOUTS
+    input_field = None
+    result_key = None
+    missing_input_error = None
+    cached = True
+
+    def get_params(self, value):
+        raise NotImplementedError
+
+    async def prepare_params(self, value, params):
+        """Parameters sent upstream on a cache miss; the cache stays keyed by ``params``"""
+        return params
+
+    async def post(self, request):
+        # The middlewares resolve the user from the JWT or session; reading it may query the database
+        if not await sync_to_async(lambda: request.user.is_authenticated)():
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'Invalid JSON.'}, status=400)
+        value = data.get(self.input_field)
+        if not value:
+            return JsonResponse({'error': self.missing_input_error}, status=400)
+
+        params = self.get_params(value)
+        stream = is_true(data.get('stream', request.GET.get('stream')))
+        ai_cache = get_ai_cache() if self.cached else None
+        text, cache_status = None, None
+        if ai_cache is not None:
+            if is_true(data.get('refresh', request.GET.get('refresh'))):
+                cache_status = 'bypass'
+            else:
+                text = await ai_cache.aget(params)
+                cache_status = 'miss' if text is None else 'hit'
+
+        try:
+            request_params = await self.prepare_params(value, params) if text is None else params
+            if stream:
+                if text is not None:
+                    response = astream_text(text)
+                else:
+                    on_complete = partial(ai_cache.aset, params) if ai_cache is not None else None
+                    response = await astream_completion(self.ai_endpoint, on_complete=on_complete, **request_params)
+            else:
+                if text is None:
+                    completion = await acreate_completion(self.ai_endpoint, **request_params)
+                    text = completion.choices[0].message.content
+                    if ai_cache is not None:
+                        await ai_cache.aset(params, text)
+                response = JsonResponse({self.result_key: text})
+        except Exception as e:
+            return JsonResponse({'error': f'OpenAI error: {str(e)}'}, status=500)
+
+        if cache_status:
+            response['X-AI-Cache'] = cache_status
+        return response
+
+
+class AsyncGenerateSOPView(AsyncCompletionView):
+    ai_endpoint = 'generate'
+    input_field = 'prompt'
+    result_key = 'sop'
+    missing_input_error = 'Prompt is required.'
+    cached = False  # Every generation is expected to differ
+
+    def get_params(self, value):
+        return generation_params(value)
+
+
+class AsyncSummariseSOPView(AsyncCompletionView):
+    ai_endpoint = 'summarise'
+    input_field = 'content'
+    result_key = 'summary'
+    missing_input_error = 'No content provided'
+
+    def get_params(self, value):
+        return summary_params(value)
+
+    async def prepare_params(self, value, params):
+        return await amap_reduce_params(value, params)
+
+
+class AsyncImproveSOPView(AsyncCompletionView):
+    ai_endpoint = 'improve'
+    input_field = 'content'
+    result_key = 'improved'
+    missing_input_error = 'No content provided.'
+
+    def get_params(self, value):
+        return improvement_params(value)
+
+
+class AIStatsView(APIView):
+    """
+    API endpoint reporting AI cache and OpenAI latency figures, for staff users.
+
+    With the "django" cache backend the cache counts are shared by all
+    workers; the per-endpoint p50/p95 latencies are those of the worker
+    serving the request.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({'cache': get_ai_cache().stats(), 'openai_latency': openai_latency.stats()})
+
 
-class DocumentViewSet(viewsets.ReadOnlyModelViewSet):
+class DocumentViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     
     serializer_class = DocumentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = DocumentCursorPagination
 
     def get_queryset(self):
         user = self.request.user
         
-        return Document.objects.filter(
+        queryset = Document.objects.filter(
             Q(team__in=user.teams.all()) | 
             Q(owner=user, team__isnull=True))
+        return DocumentSerializer.setup_eager_loading(queryset, self.get_serializer().fields)
     
     @action(detail=False, methods=['get'], url_path='team/(?P<team_id>\d+)')
     def team_documents(self, request, team_id=None):
         """Get all documents for a specific team"""
         team = get_object_or_404(Team, id=team_id)
-        documents = Document.objects.filter(team=team)
-        serializer = DocumentSerializer(documents, many=True)
-        return Response(serializer.data)
-    
+        documents = DocumentSerializer.setup_eager_loading(
+            Document.objects.filter(team=team), self.get_serializer().fields
+        )
+
+        def build_response():
+            page = self.paginate_queryset(documents)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+
+            serializer = self.get_serializer(documents, many=True)
+            return Response(serializer.data)
+
+        return conditional_response(request, [documents], build_response)
+
+    bulk_limit = 500
+
+    def get_document_error(self, request, document):
+        """Apply the single delete/review-date rule: team owners or the creator only"""
+        if document.team_id:
+            role = get_team_role(request, document.team_id)
+            if role is None:
+                return 'You are not a member of this team.'
+            if role != 'owner' and document.owner_id != request.user.pk:
+                return 'Only team owners or the document creator can change team documents.'
+        elif document.owner_id != request.user.pk:
+            return 'You do not have permission to change this document.'
+        return None
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Delete or update many documents at once
+
+        Body: {"action": "delete" | "update", "ids": [...], "changes": {"review_date", "team"}}.
+        Permissions are checked against one query, database changes are a
+        single DELETE or UPDATE, and each document gets its own result.
+        """
+        operation = request.data.get('action')
+        ids = request.data.get('ids')
+        if operation not in ('delete', 'update'):
+            return Response({'error': 'action must be "delete" or "update".'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(ids, list) or not ids:
+            return Response({'error': 'ids must be a non-empty list.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.bulk_limit:
+            return Response(
+                {'error': f'At most {self.bulk_limit} documents can be changed at once.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            ids = list(dict.fromkeys(int(document_id) for document_id in ids))
+        except (TypeError, ValueError):
+            return Response({'error': 'ids must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if operation == 'update':
+            changes, error = self.get_bulk_changes(request)
+            if error:
+                return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            creds_json = get_drive_credentials(request)
+            if not creds_json:
+                return Response({'error': 'Not authenticated with Google Drive'},
+                                status=status.HTTP_401_UNAUTHORIZED)
+
+        documents = Document.objects.only('id', 'owner_id', 'team_id', 'google_drive_file_id').in_bulk(ids)
+        results = {}
+        allowed = []
+        for document_id in ids:
+            document = documents.get(document_id)
+            error = 'Document not found.' if document is None else self.get_document_error(request, document)
+            if error:
+                results[document_id] = {'id': document_id, 'status': 'error', 'error': error}
+            else:
+                allowed.append(document)
+
+        if operation == 'delete':
+            self.bulk_delete(creds_json, allowed, results)
+        elif allowed:
+            Document.objects.filter(id__in=[document.id for document in allowed]).update(
+                updated_at=timezone.now(), **changes
+            )
+            for document in allowed:
+                results[document.id] = {'id': document.id, 'status': 'updated'}
+
+        return Response({'results': [results[document_id] for document_id in ids]})
+
+    def get_bulk_changes(self, request):
+        """Validate the fields a bulk update sets; returns (changes, error)"""
+        data = request.data.get('changes')
+        if not isinstance(data, dict) or not data.keys() & {'review_date', 'team'}:
+            return None, 'changes must set review_date and/or team.'
+
+        changes = {}
+        if 'review_date' in data:
+            review_date = data['review_date']
+            if review_date is not None:
+                try:
+                    review_date = parse_date(str(review_date))
+                except ValueError:
+                    review_date = None
+                if review_date is None:
+                    return None, 'review_date must be a date (YYYY-MM-DD) or null.'
+            changes['review_date'] = review_date
+        if 'team' in data:
+            team_id = data['team']
+            if team_id is not None and get_team_role(request, team_id) is None:
+                return None, 'You are not a member of the target team.'
+            changes['team_id'] = team_id
+        return changes, None
+
+    def bulk_delete(self, creds_json, documents, results):
+        """Delete the Drive files in batches, then the documents whose file is gone"""
+        file_ids = [document.google_drive_file_id for document in documents if document.google_drive_file_id]
+        drive_errors = {}
+        if file_ids:
+            try:
+                with drive_client_pool.client(creds_json) as client:
+                    drive_errors = batch_delete_files(client.service, file_ids)
+            except ValueError as e:
+                drive_errors = {file_id: str(e) for file_id in file_ids}
+
+        deleted = []
+        for document in documents:
+            error = drive_errors.get(document.google_drive_file_id) if document.google_drive_file_id else None
+            if error:
+                results[document.id] = {'id': document.id, 'status': 'error', 'error': error}
+            else:
+                deleted.append(document.id)
+                results[document.id] = {'id': document.id, 'status': 'deleted'}
+        if deleted:
+            Document.objects.filter(id__in=deleted).delete()
+
 class GoogleDriveFileContentView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -591,13 +1374,10 @@ class GoogleDriveFileContentView(APIView):
         file_id = document.google_drive_file_id
 
         # Check permissions for team documents
-        if document.team:
+        if document.team_id:
             try:
                 # Verify team membership (all members including admins can view)
-                if not TeamMembership.objects.filter(
-                    team=document.team, 
-                    user=request.user
-                ).exists():
+                if get_team_role(request, document.team_id) is None:
                     return Response(
                         {"error": "You don't have permission to view this document."},
                         status=status.HTTP_403_FORBIDDEN
@@ -609,7 +1389,7 @@ class GoogleDriveFileContentView(APIView):
                     status=status.HTTP_403_FORBIDDEN
                 )
         # For personal documents, only the owner can view
-        elif document.owner != request.user:
+        elif document.owner_id != request.user.pk:
             return Response(
                 {"error": "You don't have permission to view this document."},
                 status=status.HTTP_403_FORBIDDEN
@@ -618,40 +1398,47 @@ class GoogleDriveFileContentView(APIView):
         if not file_id:
             return Response({"error": "Document does not have an associated Google Drive file ID."}, status=400)
 
-        # Load stored credentials from session.
-        creds_json = request.session.get('google_drive_credentials')
+        # Load stored credentials, falling back to the session.
+        creds_json = get_drive_credentials(request)
         if not creds_json:
             return Response({"error": "Not authenticated with Google Drive."}, status=401)
 
+        # Fetch file metadata with a pooled client, ensuring we get the export links
         try:
-            credentials = OAuth2Credentials.from_json(creds_json)
-        except Exception as e:
-            logger.error("Failed to load credentials: %s", e, exc_info=True)
-            return Response({"error": "Invalid Google Drive credentials."}, status=400)
-
-        # Prepare PyDrive2 authentication
-        gauth = GoogleAuth()
-        gauth.DEFAULT_SETTINGS['client_config_file'] = settings.GOOGLE_CLIENT_SECRETS_FILE
-        gauth.credentials = credentials
-        drive = GoogleDrive(gauth)
-
-        # Fetch file metadata, ensuring we get the export links
-        gfile = drive.CreateFile({'id': file_id})
-        gfile.FetchMetadata(fields='id, title, mimeType, modifiedDate, exportLinks')
-
-        # Update document metadata in your DB
-        document.title = gfile['title']
-
-        # Update `updated_at` using modifiedDate from Google (parse it into Django datetime format)
-        if 'modifiedDate' in gfile:
-            document.updated_at = parse_datetime(gfile['modifiedDate'])
-
-        document.save(update_fields=['title', 'updated_at'])
+            with drive_client_pool.client(creds_json) as client:
+                gfile = client.drive.CreateFile({'id': file_id})
+                gfile.FetchMetadata(fields='id, title, mimeType, modifiedDate, exportLinks')
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        # Update document metadata in your DB, only when Drive reports a change
+        modified = gfile.get('modifiedDate')
+        changes = {}
+        if document.title != gfile['title']:
+            changes['title'] = gfile['title']
+
+        # Record modifiedDate from Google separately; updated_at stays the row's own change time
+        if modified:
+            modified_at = parse_datetime(modified)
+            if document.drive_modified_at != modified_at:
+                changes['drive_modified_at'] = modified_at
+
+        if changes:
+            for field, value in changes.items():
+                setattr(document, field, value)
+            document.save(update_fields=[*changes, 'updated_at'])
 
         # Check if the file is a Google Doc
         if gfile.get('mimeType') != 'application/vnd.google-apps.document':
             return Response({"error": "This API only supports Google Docs files."}, status=400)
 
+        # The same revision of a file always exports to the same HTML
+        content_cache = get_content_cache()
+        if modified:
+            content = content_cache.get(file_id, modified)
+            if content is not None:
+                return Response({"title": document.title, "content": content, "file_url": document.file_url}, status=200)
+
         # Fetch the export link for html, plain text removes formatting
         export_links = gfile.get('exportLinks', {})
         html_export_link = export_links.get('text/html')
@@ -662,13 +1449,16 @@ class GoogleDriveFileContentView(APIView):
 
         # Download the document content
         try:
-            response = requests.get(html_export_link)
+            response = export_session.get(html_export_link)
             response.raise_for_status()  # Raise an error for failed HTTP responses
             content = response.text
         except Exception as e:
             logger.error("Failed to download Google Docs HTML content: %s", e, exc_info=True)
             return Response({"error": "Failed to retrieve document content."}, status=500)
 
+        if modified:
+            content_cache.set(file_id, modified, content)
+
         return Response({"title":document.title, "content": content, "file_url": document.file_url}, status=200)
 
 class DocumentDeleteView(APIView):
@@ -681,26 +1471,24 @@ class DocumentDeleteView(APIView):
         document = get_object_or_404(Document, id=document_id)
         
         # Check permissions based of if team or personal document
-        if document.team:
-            try:
-                # For team documents, check if user is a member of this team
-                membership = TeamMembership.objects.get(team=document.team, user=request.user)
-                
-                # Only team owners or the document creator can delete documents
-                if membership.role != 'owner' and document.owner != request.user:
-                    return Response(
-                        {'error': 'Only team owners or the document creator can delete team documents.'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
-                    
-            except TeamMembership.DoesNotExist:
+        if document.team_id:
+            # For team documents, check if user is a member of this team
+            role = get_team_role(request, document.team_id)
+            if role is None:
                 # User is not a team member
                 return Response(
                     {'error': 'You are not a member of this team.'},
                     status=status.HTTP_403_FORBIDDEN
                 )
+
+            # Only team owners or the document creator can delete documents
+            if role != 'owner' and document.owner_id != request.user.pk:
+                return Response(
+                    {'error': 'Only team owners or the document creator can delete team documents.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
         # For personal documents, only the owner can delete
-        elif document.owner != request.user:
+        elif document.owner_id != request.user.pk:
             return Response(
                 {'error': 'You do not have permission to delete this document.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -708,22 +1496,16 @@ class DocumentDeleteView(APIView):
         
         # user has permission to delete the document
         try:
-            # Get credentials from session
-            creds_json = request.session.get('google_drive_credentials')
+            # Get stored or session credentials
+            creds_json = get_drive_credentials(request)
             if not creds_json:
                 return Response({'error': 'Not authenticated with Google Drive'}, 
                                status=status.HTTP_401_UNAUTHORIZED)
             
-            # Load the stored credentials
-            gauth = GoogleAuth()
-            gauth.DEFAULT_SETTINGS['client_config_file'] = settings.GOOGLE_CLIENT_SECRETS_FILE
-            credentials = OAuth2Credentials.from_json(creds_json)
-            gauth.credentials = credentials
-            
-            # Now use the authenticated drive instance
-            drive = GoogleDrive(gauth)
-            file1 = drive.CreateFile({'id': document.google_drive_file_id})
-            file1.Delete()
+            # Delete the Drive file with a pooled client for the stored credentials
+            with drive_client_pool.client(creds_json) as client:
+                file1 = client.drive.CreateFile({'id': document.google_drive_file_id})
+                file1.Delete()
             
             # Delete from database
             document.delete()
@@ -745,38 +1527,37 @@ class DocumentPermission(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         """Determine if the user has permission for the specific document."""
         # Check if user is the document owner
-        if obj.owner == request.user:
+        if obj.owner_id == request.user.pk:
             return True
             
         # Check if document belongs to a team
-        if obj.team:
+        if obj.team_id:
             # Check user's role in the team
-            try:
-                membership = TeamMembership.objects.get(team=obj.team, user=request.user)
-                
-                # Admin users can only use safe methods (GET, HEAD, OPTIONS)
-                if membership.role == 'admin' and request.method in permissions.SAFE_METHODS:
-                    return True
-                
-                # Member and owner roles can use safe methods
-                if request.method in permissions.SAFE_METHODS:
-                    return True
-                    
-                # Allow editing for members and owners
-                if request.method in ['PUT', 'PATCH'] and membership.role in ['member', 'owner']:
-                    return True
-                    
-                # Allow deletion only for owners and document creator
-                if request.method == 'DELETE':
-                    if membership.role == 'owner' or obj.owner == request.user:
-                        return True
-                    
-                return False
-            except TeamMembership.DoesNotExist:
+            role = get_team_role(request, obj.team_id)
+            if role is None:
                 return False
+
+            # Admin users can only use safe methods (GET, HEAD, OPTIONS)
+            if role == 'admin' and request.method in permissions.SAFE_METHODS:
+                return True
+
+            # Member and owner roles can use safe methods
+            if request.method in permissions.SAFE_METHODS:
+                return True
+
+            # Allow editing for members and owners
+            if request.method in ['PUT', 'PATCH'] and role in ['member', 'owner']:
+                return True
+
+            # Allow deletion only for owners and document creator
+            if request.method == 'DELETE':
+                if role == 'owner' or obj.owner_id == request.user.pk:
+                    return True
+
+            return False
                 
         # If document doesn't belong to a team, only owner can access
-        return obj.owner == request.user
+        return obj.owner_id == request.user.pk
 
 class DocumentReviewDateUpdateView(APIView):
     """API endpoint for updating a document's review date."""
@@ -797,16 +1578,15 @@ class DocumentReviewDateUpdateView(APIView):
             document = get_object_or_404(Document, id=document_id)
             
             # Check permissions (same as delete)
-            if document.team:
-                try:
-                    membership = TeamMembership.objects.get(user=request.user, team=document.team)
-                    if document.owner != request.user and membership.role != 'owner':
-                        return Response({'error': 'Only team owners or document creator can update review dates'},
-                                      status=status.HTTP_403_FORBIDDEN)
-                except TeamMembership.DoesNotExist:
+            if document.team_id:
+                role = get_team_role(request, document.team_id)
+                if role is None:
                     return Response({'error': 'You are not a member of this team'},
                                   status=status.HTTP_403_FORBIDDEN)
-            elif document.owner != request.user:
+                if document.owner_id != request.user.pk and role != 'owner':
+                    return Response({'error': 'Only team owners or document creator can update review dates'},
+                                  status=status.HTTP_403_FORBIDDEN)
+            elif document.owner_id != request.user.pk:
                 return Response({'error': 'You do not have permission to update this document'},
                               status=status.HTTP_403_FORBIDDEN)
             